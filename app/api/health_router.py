@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+from fastapi import APIRouter
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+from app.config.config import Config
+from app.db.mongo_client_manager import MongoClientManager
+from app.db.redis_client_manager import RedisClientManager
+
+router = APIRouter(tags=["Health"])
+
+
+@router.get(path="/health/live",
+            summary="Liveness probe",
+            description="Returns 200 while the process is running.")
+async def live():
+    return JSONResponse(status_code=status.HTTP_200_OK, content={"status": "ok"})
+
+
+@router.get(path="/health/ready",
+            summary="Readiness probe",
+            description="Pings MongoDB and Redis; returns 503 if a required dependency is unreachable.")
+async def ready():
+    mongo, redis = await asyncio.gather(_check(MongoClientManager.ping), _check(RedisClientManager.ping))
+    # Redis yapılandırılmamışsa uygulama süreç içi yedeklerle çalışır
+    is_ready = mongo["status"] == "ok" and redis["status"] in ("ok", "disabled")
+    return JSONResponse(status_code=status.HTTP_200_OK if is_ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+                        content={"status": "ready" if is_ready else "unavailable",
+                                 "checks": {"mongo": mongo, "redis": redis}})
+
+
+async def _check(ping) -> dict:
+    started = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(ping(), timeout=Config.HEALTH_CHECK_TIMEOUT)
+    except asyncio.TimeoutError:
+        result = False
+    latency_ms = round((time.perf_counter() - started) * 1000, 1)
+    if result is None:
+        return {"status": "disabled"}
+    return {"status": "ok" if result else "error", "latency_ms": latency_ms}
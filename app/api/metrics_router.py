@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.utils.metrics import MetricsRegistry
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get(path="/metrics",
+            summary="Prometheus metrics",
+            description="Workflow node, tool, LLM and cache metrics in Prometheus text format.",
+            response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(content=MetricsRegistry.get_instance().render(),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,17 +1,14 @@
-import logging
-from asyncio import sleep
+import json
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import ValidationError
 from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi import status
 from app.models.query_model import QueryRequest, QueryAgentResponse
 from app.services.chain_service import ChainService
-from app.utils.web_socket_connection_manager import ConnectionManager
 
 router = APIRouter(tags=["Agent Service"])
-manager = ConnectionManager()  # WebSocket bağlantı yöneticisi
 
 
 @router.post(path="/llm/query_agent",
@@ -21,27 +18,47 @@ manager = ConnectionManager()  # WebSocket bağlantı yöneticisi
 async def handle_query_v3(query: QueryRequest):
     """
     Query Router:
-    - Başlatılan sorgu sırasında WebSocket bağlantısı açılır.
+    - İlerleme mesajları, /ws üzerinden bu oturuma (ya da kullanıcıya) bağlı istemcilere gönderilir.
     - Mesaj gönderilmez, bu ToolExecution tarafından yapılır.
     """
     try:
-        # WebSocket bağlantısının hazır olduğundan emin olun
-        if not manager.active_connections:
-            await manager.connect_websocket()
-            logging.info("WebSocket connections initialized.")
-
-        chain_service = ChainService()
+        chain_service = ChainService.get_instance()
         results, errors = await chain_service.execute_workflow(query=query)
 
         if errors:
             return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content=jsonable_encoder(errors))
 
         return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(results))
-        await sleep(5)
-        await manager.close_connections()
-
 
     except ValidationError as e:
         return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"details": e.errors()})
     except Exception as e:
         return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={"message": str(e)})
+
+
+@router.post(path="/llm/query_agent/stream",
+             summary="Stream Query Agent events",
+             description="Query to LLM model and stream plan, tool progress and answer tokens as Server-Sent Events. "
+                         "Event types: session, plan, tool_start, tool_end, token, done, error.")
+async def handle_query_stream(query: QueryRequest):
+    """
+    SSE Router:
+    - Her olay `event: <tip>` ve JSON `data:` satırları ile gönderilir.
+    - Son olay `done` (QueryAgentResponse) ya da `error` olur.
+    """
+    chain_service = ChainService.get_instance()
+
+    async def event_stream():
+        async for event in chain_service.stream_workflow(query=query):
+            payload = json.dumps(jsonable_encoder(event), ensure_ascii=False)
+            yield f"event: {event['event']}\ndata: {payload}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.get(path="/llm/cache/stats",
+            summary="Cache statistics",
+            description="Hit/miss counters and sizes of the response caches.")
+async def cache_stats():
+    return JSONResponse(status_code=status.HTTP_200_OK, content=ChainService.get_instance().cache_stats())
@@ -1,29 +1,32 @@
 ﻿import logging
+from typing import Optional
+
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from app.utils.web_socket_connection_manager import ConnectionManager
+from app.utils.web_socket_connection_manager import connection_manager as manager
 
 router = APIRouter(tags=["Web Socket"])
 
-manager = ConnectionManager()
 
 @router.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, session_id: Optional[str] = None, user_id: Optional[str] = None):
     """
     WebSocket endpoint for real-time communication.
-    - Path: /ws
+    - Path: /ws?session_id=<session id>&user_id=<user id>
     - Protocol: WebSocket
+    - Only notifications of the given session (or, before a session exists, of the given user) are delivered.
     """
-    await manager.connect(websocket)
+    await manager.connect(websocket, session_id=session_id, user_id=user_id)
     logging.info("New WebSocket connection established.")
     try:
         while True:
             data = await websocket.receive_text()
             logging.info(f"Message received from client: {data}")
-            await manager.broadcast(f"Echo: {data}")
+            await manager.send_message(websocket, f"Echo: {data}")
     except WebSocketDisconnect:
         manager.disconnect(websocket)
         logging.warning("Client disconnected.")
     except Exception as e:
+        manager.disconnect(websocket)
         logging.error(f"Unexpected error: {e}")
 
 @router.get(
@@ -38,5 +41,6 @@ async def ws_info():
     """
     return {
         "message": "WebSocket status",
-        "active_connections": len(manager.active_connections)
+        "active_connections": len(manager.active_connections),
+        "subscriptions": len(manager.connections)
     }
@@ -8,13 +8,47 @@ class Config:
     MONGO_URI = os.getenv("MONGO_URI")
     MONGO_DB_NAME = os.getenv("MONGO_DB_NAME")
     MONGO_HOST = os.getenv("MONGO_HOST")
-    MONGO_PORT = int(os.getenv("MONGO_PORT"))
+    MONGO_PORT = int(os.getenv("MONGO_PORT", "27017"))
     MONGO_USER = os.getenv("MONGO_USER")
     MONGO_PASSWORD = os.getenv("MONGO_PASSWORD")
     MONGO_DB_COLLECTION_NAME = os.getenv("MONGO_DB_COLLECTION_NAME")
     MONGO_DB_PROMPT_COLLECTION_NAME = os.getenv("MONGO_DB_PROMPT_COLLECTION_NAME")
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "5"))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "20000"))
+    MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+    HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+    # "turns": konuşma başına doküman, "session": oturum başına tek doküman
+    CHAT_STORAGE_MODE = os.getenv("CHAT_STORAGE_MODE", "turns")
+    CHAT_SESSION_MAX_TURNS = int(os.getenv("CHAT_SESSION_MAX_TURNS", "200"))
+
+    CHAT_HISTORY_MAX_TURNS = int(os.getenv("CHAT_HISTORY_MAX_TURNS", "20"))
+    CHAT_HISTORY_MAX_TOKENS = int(os.getenv("CHAT_HISTORY_MAX_TOKENS", "6000"))
+    PLANNER_HISTORY_MAX_TOKENS = int(os.getenv("PLANNER_HISTORY_MAX_TOKENS", "1500"))
+    SOLVER_HISTORY_MAX_TOKENS = int(os.getenv("SOLVER_HISTORY_MAX_TOKENS", "3000"))
+    SOLVER_EVIDENCE_MAX_TOKENS = int(os.getenv("SOLVER_EVIDENCE_MAX_TOKENS", "1200"))
+    SUMMARY_TRIGGER_TOKENS = int(os.getenv("SUMMARY_TRIGGER_TOKENS", "2000"))
+    SUMMARY_KEEP_RECENT_TURNS = int(os.getenv("SUMMARY_KEEP_RECENT_TURNS", "4"))
+    SUMMARY_MAX_WORDS = int(os.getenv("SUMMARY_MAX_WORDS", "300"))
+    TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "4096"))
+
+    # Konuşmaların Mongo/Redis'e arka planda (write-behind) yazılması
+    CHAT_WRITE_BEHIND = os.getenv("CHAT_WRITE_BEHIND", "true").lower() == "true"
+    CHAT_PERSIST_QUEUE_SIZE = int(os.getenv("CHAT_PERSIST_QUEUE_SIZE", "1000"))
+    CHAT_PERSIST_BATCH_SIZE = int(os.getenv("CHAT_PERSIST_BATCH_SIZE", "50"))
+    CHAT_PERSIST_FLUSH_SECONDS = float(os.getenv("CHAT_PERSIST_FLUSH_SECONDS", "0.05"))
+    CHAT_PERSIST_MAX_RETRIES = int(os.getenv("CHAT_PERSIST_MAX_RETRIES", "3"))
+    CHAT_PERSIST_SPILL_FILE = os.getenv("CHAT_PERSIST_SPILL_FILE", "chat_persist_spill.jsonl")
 
     LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME")
+    # Aşama başına model; boş bırakılırsa LLM_MODEL_NAME kullanılır
+    PLANNER_MODEL_NAME = os.getenv("PLANNER_MODEL_NAME")
+    TOOL_MODEL_NAME = os.getenv("TOOL_MODEL_NAME")
+    SOLVER_MODEL_NAME = os.getenv("SOLVER_MODEL_NAME")
+    SUMMARY_MODEL_NAME = os.getenv("SUMMARY_MODEL_NAME")
 
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     LANGCHAIN_API_KEY = os.getenv("LANGCHAIN_API_KEY")
@@ -24,10 +58,67 @@ class Config:
     USER_AGENT = os.getenv("USER_AGENT")
     SEARCH_ENGINE_ID = os.getenv("SEARCH_ENGINE_ID")
 
+    TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "4"))
+    STREAMING_PLANNER = os.getenv("STREAMING_PLANNER", "true").lower() == "true"
+    FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+    FAST_PATH_CLASSIFIER = os.getenv("FAST_PATH_CLASSIFIER", "true").lower() == "true"
+    MATH_TOOL_WORKERS = int(os.getenv("MATH_TOOL_WORKERS", "2"))
+    MATH_TOOL_TIMEOUT = float(os.getenv("MATH_TOOL_TIMEOUT", "3"))
+
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "6"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+
+    HTML_EXTRACTOR_BACKEND = os.getenv("HTML_EXTRACTOR_BACKEND", "auto")
+    PARSER_MAX_BYTES = int(os.getenv("PARSER_MAX_BYTES", "1048576"))
+    PARSER_MAX_PARAGRAPHS = int(os.getenv("PARSER_MAX_PARAGRAPHS", "5"))
+    PARSER_MAX_CHARS = int(os.getenv("PARSER_MAX_CHARS", "4000"))
+
     CONTEXTUALIZE_Q_SYSTEM_PROMPT = os.getenv("CONTEXTUALIZE_Q_SYSTEM_PROMPT")
     SYSTEM_PROMPT = os.getenv("SYSTEM_PROMPT")
     TOOL_SETUP_PROMPT = os.getenv("TOOL_SETUP_PROMPT")
     PLANNER_PROMPT_TEMPLATE = os.getenv("PLANNER_PROMPT_TEMPLATE")
+    PROMPT_REGISTRY_REFRESH_SECONDS = float(os.getenv("PROMPT_REGISTRY_REFRESH_SECONDS", "30"))
+
+    STREAM_WEBSOCKET_EVENTS = os.getenv("STREAM_WEBSOCKET_EVENTS", "true").lower() == "true"
+    WS_CLIENT_QUEUE_SIZE = int(os.getenv("WS_CLIENT_QUEUE_SIZE", "1000"))
 
     REDIS_URL = os.getenv("REDIS_URL")
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+    REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", "5"))
+    REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "5"))
+    REDIS_RETRY_SECONDS = float(os.getenv("REDIS_RETRY_SECONDS", "30"))
+    # Backend'e devredilen oturum verisi (hash) ve ömrü
+    SESSION_REDIS_PREFIX = os.getenv("SESSION_REDIS_PREFIX", "session:")
+    SESSION_REDIS_TTL_SECONDS = int(os.getenv("SESSION_REDIS_TTL_SECONDS", "86400"))
+    NOTIFICATION_BUS_ENABLED = os.getenv("NOTIFICATION_BUS_ENABLED", "true").lower() == "true"
+    NOTIFICATION_CHANNEL_PREFIX = os.getenv("NOTIFICATION_CHANNEL_PREFIX", "ws:")
+    NOTIFICATION_QUEUE_SIZE = int(os.getenv("NOTIFICATION_QUEUE_SIZE", "10000"))
+    # Diğer worker'lardaki abone bilgisinin (PUBSUB NUMSUB) ne kadar süre geçerli sayılacağı
+    NOTIFICATION_PRESENCE_TTL_SECONDS = float(os.getenv("NOTIFICATION_PRESENCE_TTL_SECONDS", "2"))
+    CACHE_REDIS_PREFIX = os.getenv("CACHE_REDIS_PREFIX", "cache:")
+    # Bu boyutu aşan değerler Redis'e yazılmaz, yalnızca bellek katmanında tutulur
+    CACHE_REDIS_MAX_ENTRY_BYTES = int(os.getenv("CACHE_REDIS_MAX_ENTRY_BYTES", "65536"))
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+    LLM_CACHE_REDIS_MAX_ENTRIES = int(os.getenv("LLM_CACHE_REDIS_MAX_ENTRIES", "10000"))
+    SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", "21600"))
+    SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "512"))
+    SEARCH_CACHE_REDIS_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_REDIS_MAX_ENTRIES", "5000"))
+    PAGE_CACHE_TTL_SECONDS = int(os.getenv("PAGE_CACHE_TTL_SECONDS", "86400"))
+    PAGE_CACHE_FRESH_SECONDS = int(os.getenv("PAGE_CACHE_FRESH_SECONDS", "900"))
+    PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "256"))
+    PAGE_CACHE_REDIS_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_REDIS_MAX_ENTRIES", "2000"))
+
+    # PLANNER_PROMPT'taki web arama politikası
+    SEARCH_FREE_QUESTIONS = int(os.getenv("SEARCH_FREE_QUESTIONS", "7"))
+    SEARCH_PAUSE_QUESTIONS = int(os.getenv("SEARCH_PAUSE_QUESTIONS", "4"))
+    SEARCH_MAX_PER_QUESTION = int(os.getenv("SEARCH_MAX_PER_QUESTION", "1"))
+    SEARCH_MAX_PER_CONVERSATION = int(os.getenv("SEARCH_MAX_PER_CONVERSATION", "7"))
+    SEARCH_DAILY_LIMIT = int(os.getenv("SEARCH_DAILY_LIMIT", "0"))
+    SEARCH_QUOTA_TTL_SECONDS = int(os.getenv("SEARCH_QUOTA_TTL_SECONDS", "604800"))
     BACKEND_URL = os.getenv("BACKEND_URL")
\ No newline at end of file
@@ -1 +1,2 @@
-﻿from app.db.mongo_client_manager import MongoClientManager
\ No newline at end of file
+﻿from app.db.mongo_client_manager import MongoClientManager
+from app.db.redis_client_manager import RedisClientManager
@@ -1,11 +1,19 @@
-﻿# app/db/mongo_client_manager.py
+# app/db/mongo_client_manager.py
 
+import asyncio
 import logging
+import time
+
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config.config import Config
 
 
 class MongoClientManager:
+    """
+    Uygulama genelinde paylaşılan MongoDB istemcisi ve bağlantı havuzu.
+    Havuz boyutu, zaman aşımları ve okuma tercihi Config'ten alınır. İstemci uygulama başlangıcında
+    açılıp ısıtılır (start), kapanışta kapatılır (close); böylece ilk istekler bağlantı kurma maliyeti ödemez.
+    """
     _client = None
 
     @staticmethod
@@ -13,7 +21,21 @@ class MongoClientManager:
         if MongoClientManager._client is None:
             try:
                 logging.info("Initializing MongoDB client...")
-                MongoClientManager._client = AsyncIOMotorClient(Config.MONGO_URI)
+                options = dict(maxPoolSize=Config.MONGO_MAX_POOL_SIZE,
+                               minPoolSize=Config.MONGO_MIN_POOL_SIZE,
+                               maxIdleTimeMS=Config.MONGO_MAX_IDLE_TIME_MS,
+                               connectTimeoutMS=Config.MONGO_CONNECT_TIMEOUT_MS,
+                               serverSelectionTimeoutMS=Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                               socketTimeoutMS=Config.MONGO_SOCKET_TIMEOUT_MS,
+                               readPreference=Config.MONGO_READ_PREFERENCE)
+                if Config.MONGO_URI:
+                    MongoClientManager._client = AsyncIOMotorClient(Config.MONGO_URI, **options)
+                else:
+                    MongoClientManager._client = AsyncIOMotorClient(host=Config.MONGO_HOST or "localhost",
+                                                                    port=Config.MONGO_PORT,
+                                                                    username=Config.MONGO_USER,
+                                                                    password=Config.MONGO_PASSWORD,
+                                                                    **options)
             except Exception as e:
                 logging.error(f"Error initializing MongoDB client: {e}")
                 raise
@@ -23,3 +45,35 @@ class MongoClientManager:
     def get_database(db_name: str):
         client = MongoClientManager.get_client()
         return client[db_name]
+
+    @staticmethod
+    async def start():
+        """
+        Bağlantı havuzunu ısıtır: MONGO_MIN_POOL_SIZE kadar eşzamanlı ping ile bağlantılar önceden açılır.
+        MongoDB erişilemezse uygulama yine de açılır; durum /health/ready ile izlenir.
+        """
+        client = MongoClientManager.get_client()
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(client.admin.command("ping")
+                                   for _ in range(max(Config.MONGO_MIN_POOL_SIZE, 1))))
+            logging.info(f"MongoDB connection pool warmed up in {(time.perf_counter() - started) * 1000:.0f} ms.")
+        except Exception as e:
+            logging.error(f"MongoDB warm-up failed: {e}")
+
+    @staticmethod
+    async def ping() -> bool:
+        try:
+            await MongoClientManager.get_client().admin.command("ping")
+            return True
+        except Exception as e:
+            logging.warning(f"MongoDB ping failed: {e}")
+            return False
+
+    @staticmethod
+    def close():
+        """Bağlantı havuzunu kapatır. Uygulama kapanırken çağrılır."""
+        if MongoClientManager._client is not None:
+            MongoClientManager._client.close()
+            MongoClientManager._client = None
+            logging.info("MongoDB client closed.")
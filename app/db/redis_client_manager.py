@@ -0,0 +1,93 @@
+# app/db/redis_client_manager.py
+
+import logging
+import time
+
+import redis.asyncio as redis
+
+from app.config.config import Config
+
+
+class RedisClientManager:
+    """
+    Uygulamanın tüm Redis kullanıcılarının (önbellekler, arama kotası, bildirim veri yolu,
+    oturum verisi) paylaştığı tek bağlantı havuzu. Havuz uygulama başlangıcında açılır, kapanışta kapatılır.
+    Bir Redis hatasından sonra istemci REDIS_RETRY_SECONDS boyunca verilmez; kullanıcılar bu sürede
+    kendi süreç içi yedeklerine düşer ve her istek yeniden bağlanmayı denemez.
+    """
+    _client = None
+    _retry_at = 0.0
+
+    @staticmethod
+    def get_client():
+        """Paylaşılan istemciyi döndürür. Redis yapılandırılmamışsa ya da kısa süre önce hata verdiyse None döner."""
+        if not Config.REDIS_URL or time.monotonic() < RedisClientManager._retry_at:
+            return None
+        if RedisClientManager._client is None:
+            try:
+                logging.info("Initializing Redis connection pool...")
+                pool = redis.BlockingConnectionPool.from_url(
+                    Config.REDIS_URL,
+                    decode_responses=True,
+                    max_connections=Config.REDIS_MAX_CONNECTIONS,
+                    timeout=Config.REDIS_POOL_TIMEOUT,
+                    socket_connect_timeout=Config.REDIS_SOCKET_TIMEOUT,
+                    socket_timeout=Config.REDIS_SOCKET_TIMEOUT,
+                    health_check_interval=30)
+                RedisClientManager._client = redis.Redis(connection_pool=pool)
+            except Exception as e:
+                logging.error(f"Error initializing Redis client: {e}")
+                RedisClientManager.mark_failed(e)
+                return None
+        return RedisClientManager._client
+
+    @staticmethod
+    async def start():
+        """Havuzu açar ve bağlantıyı doğrular. Redis erişilemezse uygulama yine de açılır."""
+        client = RedisClientManager.get_client()
+        if client is None:
+            logging.info("Redis is not configured, shared state is kept in process.")
+            return
+        try:
+            await client.ping()
+            logging.info("Redis connection pool ready.")
+        except Exception as e:
+            RedisClientManager.mark_failed(e)
+
+    @staticmethod
+    async def close():
+        """Bağlantı havuzunu kapatır. Uygulama kapanırken çağrılır."""
+        if RedisClientManager._client is not None:
+            client, RedisClientManager._client = RedisClientManager._client, None
+            try:
+                await client.aclose(close_connection_pool=True)
+                logging.info("Redis connection pool closed.")
+            except Exception as e:
+                logging.error(f"Error closing Redis connection pool: {e}")
+
+    @staticmethod
+    async def ping():
+        """Redis'e ping atar. Redis yapılandırılmamışsa None döner."""
+        if not Config.REDIS_URL:
+            return None
+        # Hata sonrası bekleme süresinde de gerçek durum ölçülsün diye havuz doğrudan kullanılır
+        client = RedisClientManager._client or RedisClientManager.get_client()
+        if client is None:
+            return False
+        try:
+            await client.ping()
+            RedisClientManager._retry_at = 0.0
+            return True
+        except Exception as e:
+            logging.warning(f"Redis ping failed: {e}")
+            return False
+
+    @staticmethod
+    def mark_failed(error):
+        """Redis hatası bildirir; istemci bir süre kullanılmaz."""
+        logging.warning(f"Redis unavailable, retrying in {Config.REDIS_RETRY_SECONDS}s: {error}")
+        RedisClientManager._retry_at = time.monotonic() + Config.REDIS_RETRY_SECONDS
+
+    @staticmethod
+    def is_available() -> bool:
+        return RedisClientManager._client is not None and time.monotonic() >= RedisClientManager._retry_at
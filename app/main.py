@@ -1,14 +1,58 @@
 import webbrowser
+from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import FastAPI
 
+from app.api.health_router import router as health_router
+from app.api.metrics_router import router as metrics_router
 from app.api.query_router import router as query_router
 from app.api.websocket_router import router as websocket_router
 from app.api.prompt_manager_router import router as prompt_manager_router
+from app.config.logger import logging
+from app.db.mongo_client_manager import MongoClientManager
+from app.db.redis_client_manager import RedisClientManager
+from app.services.chain_service import ChainService
+from app.services.notification_bus_service import NotificationBus
+from app.services.prompt_registry_service import PromptRegistry
+from app.services.user_notification_service import UserNotificationService
+from app.tools.math_tool import MathTool
+from app.utils.http_client_manager import HttpClientManager
+from app.utils.token_counter import TokenCounter
 
-app = FastAPI(title="LLM API", docs_url="/api/docs", redoc_url="/api/redoc", )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Paylaşılan kaynakları başlangıçta aç, kapanışta serbest bırak
+    HttpClientManager.get_client()
+    await RedisClientManager.start()
+    await MongoClientManager.start()
+    TokenCounter.get_encoding()
+    MathTool.start()
+    try:
+        ChainService.get_instance().warm_up()
+    except Exception as e:
+        # Eksik ortam değişkenleri uygulamanın açılmasını engellemez; istekler hatayı döndürür
+        logging.error(f"ChainService warm-up failed: {e}")
+    await ChainService.get_instance().mongo_db_repository.ensure_indexes()
+    await ChainService.get_instance().chat_persistence.start()
+    await PromptRegistry.get_instance().start()
+    await NotificationBus.get_instance().start()
+    yield
+    await NotificationBus.get_instance().stop()
+    await ChainService.get_instance().shutdown()
+    await PromptRegistry.get_instance().stop()
+    await UserNotificationService.flush()
+    await MathTool.shutdown()
+    await HttpClientManager.close()
+    await RedisClientManager.close()
+    MongoClientManager.close()
+
+
+app = FastAPI(title="LLM API", docs_url="/api/docs", redoc_url="/api/redoc", lifespan=lifespan)
+
+app.include_router(health_router)
+app.include_router(metrics_router)
 app.include_router(query_router)
 app.include_router(prompt_manager_router)
 app.include_router(websocket_router)
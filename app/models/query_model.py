@@ -12,6 +12,13 @@ class QueryRequest(BaseModel):
     index_name: Optional[str] = None
 
 
+class ModelUsage(BaseModel):
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: float = 0.0
+
+
 class QueryAgentResponse(BaseModel):
     answer: str
     session_id: str
@@ -19,3 +26,5 @@ class QueryAgentResponse(BaseModel):
     response_model_name: str = str(Config.LLM_MODEL_NAME)
     prompt_tokens: int
     completion_tokens: int
+    # Aşama modelleri farklı olabileceğinden kullanım model bazında da raporlanır
+    model_usage: Dict[str, ModelUsage] = Field(default_factory=dict)
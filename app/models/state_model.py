@@ -1,4 +1,5 @@
-﻿from typing import TypedDict, Optional, List, Dict, Set
+﻿import asyncio
+from typing import TypedDict, Optional, List, Dict, Set
 from pydantic import BaseModel
 import typing_extensions
 
@@ -9,7 +10,13 @@ from langchain_core.messages import BaseMessage
 
 @dataclass
 class WorkflowState:
+    session_id: str = ""
+    user_id: str = ""
+    # Oturum bu istekte oluşturulduysa True: istemci oturum kimliğini henüz bilmez, bildirimler kullanıcıya gider
+    new_session: bool = False
     messages: Optional[List[BaseMessage]] = None
+    summary: str = ""
+    question_number: int = 0
     index_name: Optional[str] = None
     steps: List[tuple] = field(default_factory=list)
     plan_string: str = ""
@@ -21,5 +28,13 @@ class WorkflowState:
     completed_steps: Set[str] = field(default_factory=set)
     final_result: str = ""
     final_plan: str = ""
+    # Plan/araç adımları atlanıp doğrudan solver'a gidildiyse True
+    fast_path: bool = False
     prompt_tokens: Optional[int] = 0
     completion_tokens: Optional[int] = 0
+    # Model adı -> {"calls", "prompt_tokens", "completion_tokens", "latency_ms"}
+    model_usage: Dict[str, dict] = field(default_factory=dict)
+    event_queue: Optional[asyncio.Queue] = None
+    # Stream planner modunda: planner'ın ayrıştırdığı adımlar ve planner görevi
+    plan_stream: Optional[asyncio.Queue] = None
+    plan_task: Optional[asyncio.Task] = None
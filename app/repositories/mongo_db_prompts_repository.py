@@ -8,13 +8,16 @@ class MongoDBPromptRepository:
     def __init__(self, db_name: str, collection_name: str):
         self.collection = MongoClientManager.get_database(db_name)[collection_name]
 
-    async def add_prompt(self, prompt_type: str, template: str, placeholders: list, description: str):
+    async def add_prompt(self, prompt_type: str, template: str, placeholders: list, description: str,
+                         is_active: bool = True, id: str = None, created_at: datetime = None):
         prompt_data = {
+            "id": id,
             "type": prompt_type,
             "template": template,
             "placeholders": placeholders,
             "description": description,
-            "created_at": datetime.now(timezone.utc)
+            "is_active": is_active,
+            "created_at": created_at or datetime.now(timezone.utc)
         }
         try:
             await self.collection.insert_one(prompt_data)
@@ -65,6 +68,19 @@ class MongoDBPromptRepository:
             logging.error(f"Error deleting prompt: {e}")
             return False
 
+    async def list_active_prompts(self):
+        """Aktif promptları, en yenisi en sonda olacak şekilde döndürür."""
+        try:
+            cursor = self.collection.find({"is_active": {"$ne": False}}, {"_id": 0}).sort("created_at", 1)
+            return await cursor.to_list(length=None)
+        except PyMongoError as e:
+            logging.error(f"Error listing active prompts: {e}")
+            return None
+
+    def watch_prompts(self):
+        """Prompt koleksiyonundaki değişiklikler için bir change stream döndürür (replica set gerekir)."""
+        return self.collection.watch()
+
     async def list_all_prompts(self):
         try:
             prompts = await self.collection.find({}, {"_id": 0}).to_list(length=None)
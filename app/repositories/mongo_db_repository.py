@@ -1,14 +1,153 @@
 ﻿import logging
 from datetime import datetime, timezone
-from pymongo.errors import PyMongoError
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, PyMongoError
+from app.config.config import Config
 from app.db.mongo_client_manager import MongoClientManager
+from app.utils.token_counter import TokenCounter
 
 
 class MongoDBRepository:
-    def __init__(self, db_name: str, collection_name: str):
-        self.collection = MongoClientManager.get_database(db_name)[collection_name]
+    """
+    Konuşma geçmişini iki düzenden birinde saklar (CHAT_STORAGE_MODE):
+    - "turns": her konuşma ayrı bir doküman; geçmiş (session_id, timestamp) indeksiyle okunur.
+    - "session": oturum başına tek doküman (`{collection}_sessions`, _id = session_id). Konuşmalar `turns`
+      dizisine $push + $slice ile eklenir ve son CHAT_SESSION_MAX_TURNS konuşma tutulur; toplam token ve
+      konuşma sayısı dokümanda $inc ile güncellenir. Geçmiş tek bir birincil anahtar okumasıdır.
+    """
+    TURNS = "turns"
+    SESSION = "session"
+    HISTORY_PROJECTION = {"_id": 0, "simplified": 1, "token_count": 1}
+    SUMMARY_SOURCE_PROJECTION = {"_id": 0, "simplified": 1, "token_count": 1, "timestamp": 1}
 
-    async def add_new_chat_to_db(self, session_id: str, question_id: str, question: str, answer: str) -> bool:
+    def __init__(self, db_name: str, collection_name: str, storage_mode: str = None):
+        database = MongoClientManager.get_database(db_name)
+        self.storage_mode = storage_mode or Config.CHAT_STORAGE_MODE
+        if self.storage_mode not in (MongoDBRepository.TURNS, MongoDBRepository.SESSION):
+            raise ValueError(f"Unknown chat storage mode: {self.storage_mode}")
+        self.collection = database[collection_name]
+        self.session_collection = database[f"{collection_name}_sessions"]
+        # Oturum başına tek bir özet dokümanı, konuşmaların yanında ayrı bir koleksiyonda tutulur
+        self.summary_collection = database[f"{collection_name}_summaries"]
+
+    async def ensure_indexes(self):
+        """Oturum geçmişi sorguları için gereken indeksleri oluşturur. Uygulama başlangıcında çağrılır."""
+        if self.storage_mode == MongoDBRepository.SESSION:
+            # Oturum dokümanları yalnızca _id ile okunur
+            return True
+        try:
+            await self.collection.create_index([("session_id", ASCENDING), ("timestamp", DESCENDING)],
+                                               name="session_id_timestamp")
+            logging.info("MongoDB indexes ensured for chat history.")
+            return True
+        except PyMongoError as e:
+            logging.error(f"Error creating chat history indexes: {e}")
+            return False
+
+    async def add_new_chat_to_db(self, session_id: str, question_id: str, question: str, answer: str,
+                                 token_count: int = None) -> bool:
+        message_data = MongoDBRepository._chat_document(session_id, question_id, question, answer, token_count)
+        if self.storage_mode == MongoDBRepository.SESSION:
+            return await self._push_turns({session_id: [message_data]})
+        try:
+            await self.collection.insert_one(message_data)
+            return True
+        except PyMongoError as e:
+            logging.error(f"Error adding message to session: {e}")
+            return False
+
+    async def add_chats_to_db(self, turns: list) -> bool:
+        """
+        Birden fazla konuşmayı tek bir insert_many ile yazar (write-behind kuyruğu için).
+        Her konuşmanın `id` alanı dokümanın _id'si olur; böylece yeniden denemelerde daha önce
+        yazılmış konuşmaların duplicate key hataları yok sayılır ve kayıtlar çoğalmaz.
+        """
+        documents = [MongoDBRepository._chat_document(turn["session_id"], turn["question_id"], turn["question"],
+                                                      turn["answer"], turn.get("token_count"),
+                                                      timestamp=turn.get("timestamp"), document_id=turn.get("id"))
+                     for turn in turns]
+        if self.storage_mode == MongoDBRepository.SESSION:
+            by_session = {}
+            for document in documents:
+                by_session.setdefault(document["session_id"], []).append(document)
+            return await self._push_turns(by_session)
+        try:
+            await self.collection.insert_many(documents, ordered=False)
+            return True
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if errors and all(error.get("code") == 11000 for error in errors) and \
+                    not e.details.get("writeConcernErrors"):
+                return True
+            logging.error(f"Error adding messages in batch: {e}")
+            return False
+        except PyMongoError as e:
+            logging.error(f"Error adding messages in batch: {e}")
+            return False
+
+    async def _push_turns(self, turns_by_session: dict) -> bool:
+        """
+        Oturum dokümanlarına konuşmaları ekler. Önce eksik dokümanlar yalnızca _id ile oluşturulur
+        ($setOnInsert); eşzamanlı iki yazıcı aynı dokümanı oluşturmaya çalışırsa kaybeden tarafın duplicate
+        key hatası yok sayılır, çünkü doküman artık vardır. Ardından oturum başına tek bir atomik
+        güncelleme upsert olmadan yapılır: filtre, eklenecek konuşmalardan biri dokümanda zaten varsa eşleşmez.
+        Böylece yeniden denemeler konuşmaları iki kez eklemez ve hiçbir konuşma sessizce kaybolmaz.
+        """
+        now = datetime.now(timezone.utc)
+        creates, pushes = [], []
+        for session_id, documents in turns_by_session.items():
+            entries = [MongoDBRepository._session_turn(document) for document in documents]
+            creates.append(UpdateOne(
+                {"_id": session_id},
+                {"$setOnInsert": {"turns": [], "token_count": 0, "turn_count": 0, "created_at": now}},
+                upsert=True))
+            pushes.append(UpdateOne(
+                {"_id": session_id, "turns.id": {"$nin": [entry["id"] for entry in entries]}},
+                {"$push": {"turns": {"$each": entries, "$slice": -Config.CHAT_SESSION_MAX_TURNS}},
+                 "$inc": {"token_count": sum(entry["token_count"] for entry in entries),
+                          "turn_count": len(entries)},
+                 "$set": {"updated_at": now}}))
+        try:
+            try:
+                await self.session_collection.bulk_write(creates, ordered=False)
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if not errors or any(error.get("code") != 11000 for error in errors) or \
+                        e.details.get("writeConcernErrors"):
+                    raise
+            await self.session_collection.bulk_write(pushes, ordered=False)
+            return True
+        except PyMongoError as e:
+            logging.error(f"Error appending turns to session documents: {e}")
+            return False
+
+    @staticmethod
+    def build_session_document(session_id: str, documents: list) -> dict:
+        """
+        Bir oturumun konuşma dokümanlarından (eskiden yeniye) oturum dokümanını oluşturur.
+        "turns" düzeninden "session" düzenine geçişte kullanılır.
+        """
+        entries = [MongoDBRepository._session_turn(document) for document in documents]
+        return {"_id": session_id,
+                "turns": entries[-Config.CHAT_SESSION_MAX_TURNS:],
+                "token_count": sum(entry["token_count"] for entry in entries),
+                "turn_count": len(entries),
+                "created_at": entries[0]["timestamp"] if entries else datetime.now(timezone.utc),
+                "updated_at": entries[-1]["timestamp"] if entries else datetime.now(timezone.utc)}
+
+    @staticmethod
+    def _session_turn(document: dict) -> dict:
+        """Konuşma dokümanını oturum dokümanındaki `turns` dizisi elemanına çevirir."""
+        return {"id": str(document.get("_id") or ObjectId()),
+                "question_id": document.get("question_id"),
+                "simplified": document["simplified"],
+                "token_count": MongoDBRepository._turn_tokens(document),
+                "timestamp": document["timestamp"]}
+
+    @staticmethod
+    def _chat_document(session_id: str, question_id: str, question: str, answer: str, token_count: int = None,
+                       timestamp: datetime = None, document_id: str = None) -> dict:
         message_data = {
             "session_id": session_id,
             "question_id": question_id,
@@ -22,21 +161,143 @@ class MongoDBRepository:
                     "content": answer
                 }
             },
-            "timestamp": datetime.now(timezone.utc)
+            "token_count": token_count if token_count is not None
+            else MongoDBRepository._estimate_tokens(question, answer),
+            "timestamp": timestamp or datetime.now(timezone.utc)
         }
-        try:
-            await self.collection.insert_one(message_data)
-            return True
-        except PyMongoError as e:
-            logging.error(f"Error adding message to session: {e}")
-            return False
+        if document_id:
+            message_data["_id"] = ObjectId(document_id)
+        return message_data
+
+    async def get_session_history(self, session_id: str, max_turns: int = None, max_tokens: int = None,
+                                  since: datetime = None):
+        """
+        Oturumun son konuşmalarını eskiden yeniye sıralı döndürür.
+        (session_id, timestamp) indeksi üzerinde ters sıralı, limitli bir cursor kullanılır;
+        yalnızca `simplified` alanı okunur.
+
+        Args:
+            session_id (str): Oturum kimliği.
+            max_turns (int): En fazla okunacak son konuşma sayısı.
+            max_tokens (int): Okunan konuşmaların toplam token bütçesi.
+            since (datetime): Verilirse yalnızca bu zamandan sonraki (henüz özetlenmemiş) konuşmalar okunur.
+        """
+        if self.storage_mode == MongoDBRepository.SESSION:
+            turns = await self._session_turns(session_id, since, max_turns)
+            return MongoDBRepository._select_recent(reversed(turns or []), max_tokens)
 
-    async def get_session_history(self, session_id: str):
         try:
-            cursor = self.collection.find({"session_id": session_id}).sort("timestamp", 1)
-            session_data = await cursor.to_list(length=None)
-            simplified_data = [item['simplified'] for item in session_data]
+            cursor = self.collection.find(MongoDBRepository._session_filter(session_id, since),
+                                          self.HISTORY_PROJECTION).sort("timestamp", DESCENDING)
+            if max_turns:
+                cursor = cursor.limit(max_turns)
+
+            simplified_data = []
+            total_tokens = 0
+            async for item in cursor:
+                if max_tokens:
+                    token_count = MongoDBRepository._turn_tokens(item)
+                    if total_tokens + token_count > max_tokens:
+                        break
+                    total_tokens += token_count
+                simplified_data.append(item['simplified'])
+
+            simplified_data.reverse()
             return simplified_data
         except PyMongoError as e:
             logging.error(f"Error fetching session history: {e}")
             return []
+
+    @staticmethod
+    def _select_recent(items_newest_first, max_tokens: int = None):
+        """Yeniden eskiye konuşmaları token bütçesi dolana kadar alır, eskiden yeniye döndürür."""
+        simplified_data = []
+        total_tokens = 0
+        for item in items_newest_first:
+            if max_tokens:
+                token_count = MongoDBRepository._turn_tokens(item)
+                if total_tokens + token_count > max_tokens:
+                    break
+                total_tokens += token_count
+            simplified_data.append(item['simplified'])
+
+        simplified_data.reverse()
+        return simplified_data
+
+    async def _session_turns(self, session_id: str, since: datetime = None, max_turns: int = None):
+        """Oturum dokümanından son max_turns konuşmayı (since sonrası) eskiden yeniye okur."""
+        projection = {"_id": 0, "turns": {"$slice": -max_turns} if max_turns else 1}
+        try:
+            document = await self.session_collection.find_one({"_id": session_id}, projection)
+        except PyMongoError as e:
+            logging.error(f"Error fetching session document: {e}")
+            return None
+        turns = (document or {}).get("turns", [])
+        if since is not None:
+            turns = [turn for turn in turns if MongoDBRepository._as_utc(turn["timestamp"]) >
+                     MongoDBRepository._as_utc(since)]
+        return turns
+
+    async def get_turns_since(self, session_id: str, since: datetime = None, limit: int = None):
+        """
+        Özetlenmemiş konuşmaları zaman damgası ve token sayısı ile eskiden yeniye döndürür.
+        En fazla `limit` konuşma (en eskiler) okunur; kalanlar bir sonraki çağrıda gelir.
+        """
+        limit = limit or Config.CHAT_HISTORY_MAX_TURNS + Config.SUMMARY_KEEP_RECENT_TURNS
+        if self.storage_mode == MongoDBRepository.SESSION:
+            turns = await self._session_turns(session_id, since)
+            return [{"simplified": turn["simplified"], "token_count": turn.get("token_count"),
+                     "timestamp": turn["timestamp"]} for turn in (turns or [])[:limit]]
+        try:
+            cursor = self.collection.find(MongoDBRepository._session_filter(session_id, since),
+                                          self.SUMMARY_SOURCE_PROJECTION).sort("timestamp", ASCENDING).limit(limit)
+            return await cursor.to_list(length=limit)
+        except PyMongoError as e:
+            logging.error(f"Error fetching turns to summarize: {e}")
+            return []
+
+    async def get_session_summary(self, session_id: str):
+        try:
+            return await self.summary_collection.find_one({"_id": session_id})
+        except PyMongoError as e:
+            logging.error(f"Error fetching session summary: {e}")
+            return None
+
+    async def save_session_summary(self, session_id: str, summary: str, summarized_until: datetime,
+                                   summarized_turns: int) -> bool:
+        try:
+            await self.summary_collection.update_one(
+                {"_id": session_id},
+                {"$set": {"summary": summary,
+                          "summarized_until": summarized_until,
+                          "updated_at": datetime.now(timezone.utc)},
+                 "$inc": {"summarized_turns": summarized_turns}},
+                upsert=True)
+            return True
+        except PyMongoError as e:
+            logging.error(f"Error saving session summary: {e}")
+            return False
+
+    @staticmethod
+    def _session_filter(session_id: str, since: datetime = None) -> dict:
+        if since is None:
+            return {"session_id": session_id}
+        return {"session_id": session_id, "timestamp": {"$gt": since}}
+
+    @staticmethod
+    def _as_utc(timestamp: datetime) -> datetime:
+        # Motor varsayılan olarak zaman damgalarını saat dilimi bilgisi olmadan döndürür
+        return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=timezone.utc)
+
+    @staticmethod
+    def _turn_tokens(item: dict) -> int:
+        token_count = item.get("token_count")
+        if token_count is None:
+            token_count = MongoDBRepository._estimate_tokens(item['simplified']['question']['content'],
+                                                             item['simplified']['answer']['content'])
+        return token_count
+
+    @staticmethod
+    def _estimate_tokens(question: str, answer: str) -> int:
+        """token_count alanı olmayan eski kayıtlar için konuşmanın token sayısı."""
+        return TokenCounter.count(question) + TokenCounter.count(answer)
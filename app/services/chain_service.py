@@ -1,4 +1,5 @@
-﻿from asyncio import sleep
+﻿import asyncio
+import time
 from uuid import uuid4
 from datetime import datetime, timezone
 
@@ -10,15 +11,31 @@ from app.models import QueryRequest, QueryAgentResponse
 from app.models.state_model import WorkflowState
 from app.repositories.mongo_db_repository import MongoDBRepository
 
+from app.services.chat_persistence_service import ChatPersistenceService
+from app.services.conversation_summary_service import ConversationSummaryService
 from app.services.llm_service import LLMService
+from app.services.prompt_registry_service import PromptRegistry
+from app.services.search_quota_service import SearchQuotaService
+from app.services.stream_event_service import StreamEventService
 from app.tools.plan_tool import PlanTool
 from app.tools.solve_tool import SolveTool
 from app.tools.tool_execution import ToolExecution
 from app.utils.chat_history_optimizer import ChatHistoryOptimizer
+from app.utils.fast_path_classifier import FastPathClassifier
+from app.utils.metrics import Metrics
+from app.utils.token_counter import TokenCounter
 from app.services.save_psg_service import RedisService
 
 
 class ChainService:
+    """
+    Plan -> tool -> solve iş akışını yürütür.
+    Uygulama başlangıcında bir kez oluşturulur (get_instance) ve tüm isteklerce paylaşılır;
+    LLM istemcileri ve derlenmiş LangGraph iş akışı yeniden kullanılır. İsteğe özel
+    tüm veriler WorkflowState içinde taşınır.
+    """
+    _instance = None
+
     def __init__(self):
         self._llm_service = None
         self._plan_tool = None
@@ -27,6 +44,34 @@ class ChainService:
         self._chat_history_optimizer = None
         self._save_redis = None
         self._mongo_db_repository = None
+        self._summary_service = None
+        self._chat_persistence = None
+        self._compiled_graph = None
+
+    @staticmethod
+    def get_instance():
+        if ChainService._instance is None:
+            ChainService._instance = ChainService()
+        return ChainService._instance
+
+    def warm_up(self):
+        """LLM istemcisini, araçları ve iş akışı grafiğini önceden oluşturur."""
+        logging.info("Warming up ChainService: building LLM clients and workflow graph.")
+        return self.compiled_graph
+
+    async def shutdown(self):
+        """Arka plan görevlerini durdurur. Uygulama kapanırken çağrılır."""
+        if self._chat_persistence is not None:
+            await self._chat_persistence.stop()
+        if self._summary_service is not None:
+            await self._summary_service.stop()
+
+    def cache_stats(self) -> dict:
+        """Önbelleklerin isabet/ıskalama sayaçlarını ve web arama kotası sayaçlarını döndürür."""
+        return {"llm": self.llm_service.response_cache.stats(),
+                "search": self.tool_execution.search_cache.stats(),
+                "page": self.tool_execution.page_cache.stats(),
+                "search_quota": SearchQuotaService.get_instance().stats()}
 
     @property
     def mongo_db_repository(self):
@@ -35,6 +80,20 @@ class ChainService:
                                                           collection_name=Config.MONGO_DB_COLLECTION_NAME)
         return self._mongo_db_repository
 
+    @property
+    def summary_service(self):
+        if self._summary_service is None:
+            self._summary_service = ConversationSummaryService(self.llm_service, self.mongo_db_repository)
+        return self._summary_service
+
+    @property
+    def chat_persistence(self):
+        if self._chat_persistence is None:
+            self._chat_persistence = ChatPersistenceService(
+                self.mongo_db_repository, self.save_redis,
+                on_persisted=lambda session_id: self.summary_service.schedule(session_id))
+        return self._chat_persistence
+
     @property
     def save_redis(self):
         if self._save_redis is None:
@@ -50,7 +109,7 @@ class ChainService:
     @property
     def plan_tool(self):
         if self._plan_tool is None:
-            self._plan_tool = PlanTool(self.llm_service)
+            self._plan_tool = PlanTool(self.llm_service, PromptRegistry.get_instance())
         return self._plan_tool
 
     @property
@@ -62,10 +121,34 @@ class ChainService:
     @property
     def solve_tool(self):
         if self._solve_tool is None:
-            self._solve_tool = SolveTool(self.llm_service)
+            self._solve_tool = SolveTool(self.llm_service, PromptRegistry.get_instance())
         return self._solve_tool
 
-    async def execute_workflow(self, query: QueryRequest):
+    async def stream_workflow(self, query: QueryRequest):
+        """
+        İş akışını çalıştırır ve ilerleme olaylarını (session, plan, tool_start/tool_end, token)
+        üretildikleri anda döndürür. Son olay `done` (cevap) ya da `error` olur.
+        """
+        event_queue = asyncio.Queue()
+        workflow = asyncio.create_task(self.execute_workflow(query=query, event_queue=event_queue))
+        workflow.add_done_callback(lambda _: event_queue.put_nowait(None))
+
+        while (event := await event_queue.get()) is not None:
+            yield event
+
+        try:
+            results, errors = await workflow
+        except Exception as e:
+            logging.error(f"Streaming workflow failed: {e}")
+            results, errors = None, {"message": str(e)}
+
+        if errors:
+            yield {"event": StreamEventService.ERROR, "session_id": query.sessionID, "data": errors}
+        else:
+            yield {"event": StreamEventService.DONE, "session_id": results.session_id,
+                   "data": results.dict()}
+
+    async def execute_workflow(self, query: QueryRequest, event_queue: asyncio.Queue = None):
         logging.info("---------------------- Execute Workflow -----------------------")
         question = query.question
         session_id = query.sessionID
@@ -73,16 +156,31 @@ class ChainService:
         if session_id is None:
             session_id = str(uuid4())
             chat_history_messages = []
+            summary = ""
         else:
-            # Yeni async sınıfa uygun çağrı
-            chat_history = await self.mongo_db_repository.get_session_history(session_id=session_id)
+            # Özet ve özetlenmemiş son konuşmalar; henüz yazılmamış konuşmalar okumadan önce alınır
+            pending_history = self.chat_persistence.pending_history(session_id)
+            summary, summarized_until = await self.summary_service.get_summary(session_id)
+            chat_history = await self.mongo_db_repository.get_session_history(
+                session_id=session_id,
+                max_turns=Config.CHAT_HISTORY_MAX_TURNS,
+                max_tokens=Config.CHAT_HISTORY_MAX_TOKENS,
+                since=summarized_until)
+            chat_history = ChatPersistenceService.merge_history(chat_history, pending_history,
+                                                                max_turns=Config.CHAT_HISTORY_MAX_TURNS)
             chat_history_messages = ChatHistoryOptimizer.convert_chat_hist_to_messages(chat_history)
 
-            await sleep(5)
+        question_number = await SearchQuotaService.get_instance().start_question(session_id)
 
         initial_state = WorkflowState(
+            session_id=session_id,
+            user_id=query.userID,
+            new_session=query.sessionID is None,
+            question_number=question_number,
+            event_queue=event_queue,
             task=question,
             messages=chat_history_messages,
+            summary=summary,
             results={},
             steps=[],
             plan_string="",
@@ -90,56 +188,99 @@ class ChainService:
             completion_tokens=0,
             date=str(datetime.now(timezone.utc))
         )
+        StreamEventService.emit(initial_state, StreamEventService.SESSION, {"question": question})
 
         result = await self._get_plan(state=initial_state)
 
-        request_result = await self.mongo_db_repository.add_new_chat_to_db(
-            session_id=session_id,
-            question_id=str(uuid4()),
-            question=question,
-            answer=result["final_result"]
-        )
+        question_id = str(uuid4())
+        token_count = TokenCounter.count(question) + TokenCounter.count(result["final_result"])
+        chat_data = {"question": question,
+                     "answer": result["final_result"],
+                     "prompt_tokens": result["prompt_tokens"],
+                     "completion_tokens": result["completion_tokens"]}
 
-        await sleep(5)
+        if Config.CHAT_WRITE_BEHIND:
+            # Mongo ve Redis yazmaları arka planda toplu yapılır; cevap beklemeden döner
+            await self.chat_persistence.submit(ChatPersistenceService.build_turn(
+                session_id=session_id, question_id=question_id, question=question,
+                answer=result["final_result"], token_count=token_count, chat_data=chat_data))
+            request_result = True
+        else:
+            request_result = await self.mongo_db_repository.add_new_chat_to_db(
+                session_id=session_id,
+                question_id=question_id,
+                question=question,
+                answer=result["final_result"],
+                token_count=token_count
+            )
 
-        await self.save_redis.write_to_redis(session_id=session_id,
-                                             chat_data={"question": question,
-                                                        "answer": result["final_result"],
-                                                        "prompt_tokens": result["prompt_tokens"],
-                                                        "completion_tokens": result["completion_tokens"]}
-                                             )
+            await self.save_redis.write_to_redis(session_id=session_id, chat_data=chat_data)
+            if request_result:
+                self.summary_service.schedule(session_id)
 
         if request_result:
-            logging.info(f"Session: {session_id}, Chat saved to MongoDB.")
+            logging.info(f"Session: {session_id}, Chat queued/saved to MongoDB.")
             logging.info(f"Session: {session_id}, Workflow is completed.")
             logging.info("-------------------------------------------------------------")
 
             return QueryAgentResponse(session_id=session_id, question=question, answer=result["final_result"],
+                                      response_model_name=str(self.llm_service.model_for(self.llm_service.SOLVER)),
                                       prompt_tokens=result["prompt_tokens"],
-                                      completion_tokens=result["completion_tokens"]), None
+                                      completion_tokens=result["completion_tokens"],
+                                      model_usage=result["model_usage"]), None
 
         else:
             logging.error(f"Session: {session_id}, Chat could not be saved to MongoDB.")
             return None, {"message": "Failed to save chat to MongoDB."}
 
-    async def _get_plan(self, state: WorkflowState):
+    @property
+    def compiled_graph(self):
+        if self._compiled_graph is None:
+            self._compiled_graph = self._build_graph()
+        return self._compiled_graph
+
+    def _build_graph(self):
         graph = StateGraph(state_schema=WorkflowState)
 
-        graph.add_node("plan", self.plan_tool.run)
-        graph.add_node("tool", self.tool_execution.run)
-        graph.add_node("solve", self.solve_tool.run)
+        graph.add_node("plan", Metrics.instrument_node("plan", self.plan_tool.run))
+        graph.add_node("tool", Metrics.instrument_node("tool", self.tool_execution.run))
+        graph.add_node("solve", Metrics.instrument_node("solve", self.solve_tool.run))
 
-        graph.add_edge("plan", "tool")
+        graph.add_conditional_edges(START, ChainService._route_start, ["plan", "solve"])
+        graph.add_conditional_edges("plan", ChainService._route_plan, ["tool", "solve"])
+        graph.add_conditional_edges("tool", ChainService._route, ["tool", "solve"])
         graph.add_edge("solve", END)
-        graph.add_conditional_edges("tool", ChainService._route)
-        graph.add_edge(START, "plan")
 
-        compiled_graph = graph.compile()
-        result = await compiled_graph.ainvoke(state)
-        return result
+        return graph.compile()
+
+    async def _get_plan(self, state: WorkflowState):
+        started = time.perf_counter()
+        try:
+            return await self.compiled_graph.ainvoke(state)
+        finally:
+            Metrics.WORKFLOW_DURATION.observe(time.perf_counter() - started)
+
+    @staticmethod
+    def _route_start(state: WorkflowState):
+        """Selamlaşma ve önceki cevaba dair kısa takip mesajları plan yapılmadan solver'a gönderilir."""
+        if Config.FAST_PATH_CLASSIFIER and FastPathClassifier.is_direct(state.task, has_history=bool(state.messages)):
+            logging.info("Direct-answer message, routing to 'solve' without planning.")
+            return "solve"
+        return "plan"
+
+    @staticmethod
+    def _route_plan(state: WorkflowState):
+        if state.fast_path:
+            logging.info("LLM-only plan, routing to 'solve' without tool execution.")
+            return "solve"
+        return "tool"
 
     @staticmethod
     def _route(state: WorkflowState):
+        if state.fast_path:
+            logging.info("LLM-only plan, routing to 'solve' without tool execution.")
+            return "solve"
+
         total_steps = len(state.steps)
         completed_steps = len(state.completed_steps)
 
@@ -0,0 +1,260 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+from bson import ObjectId
+
+from app.config.config import Config
+
+
+class ChatPersistenceService:
+    """
+    Tamamlanan konuşmaları cevap döndükten sonra arka planda (write-behind) kalıcı hale getirir.
+    Konuşmalar sınırlı bir kuyruğa alınır; tek bir işçi kuyruğu toplu olarak boşaltır: Mongo'ya tek
+    insert_many, Redis'e tek pipeline. Başarısız yazmalar artan beklemeyle yeniden denenir. Kuyruk doluysa
+    ya da denemeler tükenirse konuşmalar JSONL dosyasına (spill) eklenir ve kuyruk boşaldığında ya da
+    uygulama yeniden başladığında tekrar yazılır. Mongo'ya henüz yazılmamış konuşmalar pending_history
+    ile geçmiş okumalarına eklenir; böylece aynı oturumdaki bir sonraki soru önceki cevabı görür.
+    """
+    SHUTDOWN_TIMEOUT = 10
+    MAX_RETRY_DELAY = 2.0
+
+    def __init__(self, mongo_db_repository, redis_service, on_persisted=None):
+        self.mongo_db_repository = mongo_db_repository
+        self.redis_service = redis_service
+        # Konuşması Mongo'ya yazılan her oturum için çağrılır (ör. özet güncellemesi)
+        self.on_persisted = on_persisted
+        self.spill_path = Config.CHAT_PERSIST_SPILL_FILE
+        self._queue = None
+        self._worker = None
+        self._in_flight = []
+        self._pending = {}
+        self._spill_lock = asyncio.Lock()
+        self._replaying = False
+        self._counters = {"persisted": 0, "batches": 0, "retries": 0, "spilled": 0}
+
+    @staticmethod
+    def build_turn(session_id: str, question_id: str, question: str, answer: str, token_count: int,
+                   chat_data: dict) -> dict:
+        """Kuyruğa alınacak konuşma kaydı. `id` Mongo _id'si olur; yeniden denemeler kaydı çoğaltmaz."""
+        return {"id": str(ObjectId()),
+                "session_id": session_id,
+                "question_id": question_id,
+                "question": question,
+                "answer": answer,
+                "token_count": token_count,
+                "timestamp": datetime.now(timezone.utc),
+                "redis": chat_data,
+                "mongo_done": False,
+                "redis_done": False}
+
+    async def start(self):
+        """Önceki çalışmadan kalan spill dosyasını yazar ve işçiyi başlatır."""
+        self._ensure_worker()
+        await self._replay_spill()
+
+    async def stop(self):
+        """Kuyruğun boşalmasını bekler; süre aşılırsa yazılamayan konuşmaları spill dosyasına ekler."""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=ChatPersistenceService.SHUTDOWN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logging.warning("Chat persistence queue did not drain in time, spilling remaining turns.")
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        self._worker = None
+
+        remaining = list(self._in_flight)
+        while not self._queue.empty():
+            remaining.append(self._queue.get_nowait())
+            self._queue.task_done()
+        self._in_flight = []
+        self._queue = None
+        if remaining:
+            await self._spill(remaining)
+
+    async def submit(self, turn: dict):
+        """Konuşmayı yazılmak üzere kuyruğa alır; kuyruk doluysa doğrudan spill dosyasına ekler."""
+        self._add_pending(turn)
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(turn)
+        except asyncio.QueueFull:
+            logging.warning(f"Session: {turn['session_id']}, chat persistence queue is full, spilling turn.")
+            await self._spill([turn])
+
+    def pending_history(self, session_id: str) -> list:
+        """Oturumun Mongo'ya henüz yazılmamış konuşmalarını `simplified` biçiminde döndürür."""
+        return [ChatPersistenceService._simplified(turn) for turn in self._pending.get(session_id, [])]
+
+    @staticmethod
+    def merge_history(history: list, pending: list, max_turns: int = None) -> list:
+        """
+        Mongo'dan okunan geçmişin sonuna bekleyen konuşmaları ekler. Okuma sırasında yazılmış olan
+        (her iki listede de bulunan) konuşmalar bir kez alınır.
+        """
+        if not pending:
+            return history
+        tail = history[-len(pending):]
+        merged = history + [turn for turn in pending if turn not in tail]
+        return merged[-max_turns:] if max_turns else merged
+
+    def stats(self) -> dict:
+        return {**self._counters,
+                "queued": self._queue.qsize() if self._queue is not None else 0,
+                "pending_sessions": len(self._pending)}
+
+    def _ensure_worker(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=Config.CHAT_PERSIST_QUEUE_SIZE)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            # İlk konuşmadan sonra kısa bir süre daha toplanır; yoğun anlarda yazmalar birleşir
+            deadline = loop.time() + Config.CHAT_PERSIST_FLUSH_SECONDS
+            while len(batch) < Config.CHAT_PERSIST_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                try:
+                    batch.append(self._queue.get_nowait() if timeout <= 0 else
+                                 await asyncio.wait_for(self._queue.get(), timeout=timeout))
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+
+            self._in_flight = batch
+            written = False
+            try:
+                written = await self._write_batch(batch)
+            except Exception as e:
+                logging.error(f"Chat persistence batch failed: {e}")
+                await self._spill(batch)
+            finally:
+                self._in_flight = []
+                for _ in batch:
+                    self._queue.task_done()
+
+            # Yazmalar yeniden başarılı olduğunda ve kuyrukta iş yokken spill dosyası boşaltılır
+            if written and self._queue.empty() and os.path.exists(self.spill_path):
+                await self._replay_spill()
+
+    async def _write_batch(self, batch: list) -> bool:
+        """Konuşmaları yazar; yazılamayanları spill dosyasına ekler. Hepsi yazıldıysa True döner."""
+        self._counters["batches"] += 1
+
+        to_mongo = [turn for turn in batch if not turn["mongo_done"]]
+        if to_mongo and await self._retry(lambda: self.mongo_db_repository.add_chats_to_db(to_mongo)):
+            for turn in to_mongo:
+                turn["mongo_done"] = True
+                self._remove_pending(turn)
+            self._counters["persisted"] += len(to_mongo)
+            if self.on_persisted is not None:
+                for session_id in dict.fromkeys(turn["session_id"] for turn in to_mongo):
+                    self.on_persisted(session_id)
+
+        to_redis = [turn for turn in batch if not turn["redis_done"]]
+        if not self.redis_service.redis_url:
+            # Redis yapılandırılmamışsa devredilecek bir yer yok
+            for turn in to_redis:
+                turn["redis_done"] = True
+            to_redis = []
+        if to_redis and await self._retry(lambda: self.redis_service.write_many_to_redis(
+                [(turn["id"], turn["session_id"], turn["redis"]) for turn in to_redis])):
+            for turn in to_redis:
+                turn["redis_done"] = True
+
+        failed = [turn for turn in batch if not (turn["mongo_done"] and turn["redis_done"])]
+        if failed:
+            await self._spill(failed)
+        return not failed
+
+    async def _retry(self, operation) -> bool:
+        for attempt in range(Config.CHAT_PERSIST_MAX_RETRIES + 1):
+            if await operation():
+                return True
+            if attempt < Config.CHAT_PERSIST_MAX_RETRIES:
+                self._counters["retries"] += 1
+                await asyncio.sleep(min(0.1 * 2 ** attempt, ChatPersistenceService.MAX_RETRY_DELAY))
+        return False
+
+    async def _spill(self, turns: list):
+        lines = [json.dumps({**turn, "timestamp": turn["timestamp"].isoformat()}, ensure_ascii=False)
+                 for turn in turns]
+        async with self._spill_lock:
+            try:
+                await asyncio.to_thread(ChatPersistenceService._append_lines, self.spill_path, lines)
+                self._counters["spilled"] += len(turns)
+                logging.warning(f"{len(turns)} chat turns written to spill file {self.spill_path}.")
+            except OSError as e:
+                logging.error(f"Could not write chat turns to spill file, {len(turns)} turns lost: {e}")
+
+    async def _replay_spill(self):
+        """Spill dosyasını devralır ve içindeki konuşmaları toplu olarak yeniden yazar."""
+        if self._replaying:
+            return
+        replay_path = f"{self.spill_path}.replay"
+        self._replaying = True
+        try:
+            await self._replay_file(replay_path)
+        finally:
+            self._replaying = False
+
+    async def _replay_file(self, replay_path: str):
+        async with self._spill_lock:
+            # Yarıda kalan önceki bir tekrar dosyası varsa önce o işlenir
+            if not os.path.exists(replay_path):
+                if not os.path.exists(self.spill_path):
+                    return
+                os.replace(self.spill_path, replay_path)
+            turns = await asyncio.to_thread(ChatPersistenceService._read_turns, replay_path)
+
+        logging.info(f"Replaying {len(turns)} spilled chat turns.")
+        for start in range(0, len(turns), Config.CHAT_PERSIST_BATCH_SIZE):
+            await self._write_batch(turns[start:start + Config.CHAT_PERSIST_BATCH_SIZE])
+        os.remove(replay_path)
+
+    def _add_pending(self, turn: dict):
+        turns = self._pending.setdefault(turn["session_id"], [])
+        turns.append(turn)
+        # Geçmişe en fazla CHAT_HISTORY_MAX_TURNS konuşma eklenir; daha eskileri tutulmaz
+        del turns[:-Config.CHAT_HISTORY_MAX_TURNS]
+
+    def _remove_pending(self, turn: dict):
+        turns = self._pending.get(turn["session_id"])
+        if turns is None:
+            return
+        turns[:] = [pending for pending in turns if pending["id"] != turn["id"]]
+        if not turns:
+            del self._pending[turn["session_id"]]
+
+    @staticmethod
+    def _simplified(turn: dict) -> dict:
+        return {"question": {"role": "human", "content": turn["question"]},
+                "answer": {"role": "ai", "content": turn["answer"]}}
+
+    @staticmethod
+    def _append_lines(path: str, lines: list):
+        with open(path, "a", encoding="utf-8") as file:
+            file.write("".join(f"{line}\n" for line in lines))
+            file.flush()
+            os.fsync(file.fileno())
+
+    @staticmethod
+    def _read_turns(path: str) -> list:
+        turns = []
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    turn = json.loads(line)
+                    turn["timestamp"] = datetime.fromisoformat(turn["timestamp"])
+                    turns.append(turn)
+                except (ValueError, KeyError) as e:
+                    logging.error(f"Skipping corrupt spilled chat turn: {e}")
+        return turns
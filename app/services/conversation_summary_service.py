@@ -0,0 +1,78 @@
+import asyncio
+import logging
+
+from app.config.config import Config
+from app.repositories.mongo_db_repository import MongoDBRepository
+from app.utils.chat_history_optimizer import ChatHistoryOptimizer
+from app.utils.promts import SUMMARY_PROMPT
+
+
+class ConversationSummaryService:
+    """
+    Oturum başına kayan (rolling) bir konuşma özeti tutar.
+    Özetlenmemiş konuşmalar SUMMARY_TRIGGER_TOKENS sınırını aşınca, son SUMMARY_KEEP_RECENT_TURNS
+    konuşma dışındakiler arka planda özete eklenir; istek akışı bu işlemi beklemez.
+    Bir güncellemede en fazla CHAT_HISTORY_MAX_TURNS + SUMMARY_KEEP_RECENT_TURNS konuşma okunur;
+    birikmiş daha eski konuşmalar sonraki güncellemelerde özete eklenir.
+    """
+
+    def __init__(self, llm_service, mongo_db_repository: MongoDBRepository):
+        self.llm_service = llm_service
+        self.mongo_db_repository = mongo_db_repository
+        self._running = {}
+
+    async def get_summary(self, session_id: str):
+        """Oturumun özetini ve özetin kapsadığı son konuşmanın zamanını döndürür."""
+        document = await self.mongo_db_repository.get_session_summary(session_id)
+        if not document:
+            return "", None
+        return document.get("summary", ""), document.get("summarized_until")
+
+    def schedule(self, session_id: str):
+        """Oturum için özet güncellemesini arka planda başlatır. Aynı oturum için tek görev çalışır."""
+        if session_id in self._running:
+            return
+        task = asyncio.create_task(self._update_summary(session_id))
+        self._running[session_id] = task
+        task.add_done_callback(lambda _: self._running.pop(session_id, None))
+
+    async def stop(self):
+        for task in list(self._running.values()):
+            task.cancel()
+        await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    async def _update_summary(self, session_id: str):
+        try:
+            summary, summarized_until = await self.get_summary(session_id)
+            turns = await self.mongo_db_repository.get_turns_since(session_id, since=summarized_until)
+
+            pending_tokens = sum(turn.get("token_count") or 0 for turn in turns)
+            if pending_tokens <= Config.SUMMARY_TRIGGER_TOKENS:
+                return
+
+            turns_to_fold = turns[:max(len(turns) - Config.SUMMARY_KEEP_RECENT_TURNS, 0)]
+            if not turns_to_fold:
+                return
+
+            conversation = ChatHistoryOptimizer.filter_chat_history(
+                [turn["simplified"] for turn in turns_to_fold])
+            prompt = SUMMARY_PROMPT.format(max_words=Config.SUMMARY_MAX_WORDS,
+                                           summary=summary or "(none)",
+                                           conversation=conversation)
+            result = await self.llm_service.invoke(prompt=prompt, use_cache=False,
+                                                   stage=self.llm_service.SUMMARY)
+            new_summary = getattr(result, "content", "")
+            if not new_summary:
+                logging.warning(f"Session: {session_id}, summary generation returned no content.")
+                return
+
+            await self.mongo_db_repository.save_session_summary(
+                session_id=session_id,
+                summary=new_summary.strip(),
+                summarized_until=turns_to_fold[-1]["timestamp"],
+                summarized_turns=len(turns_to_fold))
+            logging.info(f"Session: {session_id}, {len(turns_to_fold)} turns folded into the summary.")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.error(f"Session: {session_id}, summary update failed: {e}")
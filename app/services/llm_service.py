@@ -1,16 +1,26 @@
 ﻿import os
 import logging
 import json
+import hashlib
+import re
+import unicodedata
 
+from langchain_core.messages import AIMessage, AIMessageChunk
 from langchain_core.prompts import HumanMessagePromptTemplate
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.callbacks.manager import CallbackManager
 from langchain.callbacks.tracers import LangChainTracer
 from app.config.config import Config
+from app.utils.tiered_cache import TieredCache
 
 
 class LLMService:
+    PLANNER = "planner"
+    TOOL = "tool"
+    SOLVER = "solver"
+    SUMMARY = "summary"
+
     def __init__(self):
         # Çevresel değişkenleri kontrol edin
         langsmith_api_key = Config.LANGCHAIN_API_KEY
@@ -29,42 +39,145 @@ class LLMService:
         except Exception as e:
             logging.error(f"--- Failed to set model name for LLM: {str(e)} [Step 4]")
 
+        # Aşama başına model: planner ve ara LLM adımları küçük/hızlı, solver kaliteli model kullanabilir
+        self.stage_models = {
+            LLMService.PLANNER: Config.PLANNER_MODEL_NAME or self.model_name,
+            LLMService.TOOL: Config.TOOL_MODEL_NAME or self.model_name,
+            LLMService.SOLVER: Config.SOLVER_MODEL_NAME or self.model_name,
+            LLMService.SUMMARY: Config.SUMMARY_MODEL_NAME or self.model_name,
+        }
+        logging.info(f"--- Models by stage: {self.stage_models}")
+
         # CallbackManager ve tracer ayarları
         tracer = LangChainTracer(project_name=os.getenv("LANGCHAIN_PROJECT", "default_project"))
-        callback_manager = CallbackManager([tracer])
+        self._callback_manager = CallbackManager([tracer])
+        self._openai_api_key = openai_api_key
+        self._llms = {}
 
         # LLM başlatma
-        try:
-            logging.info("--- Initializing ChatOpenAI--- [Step 5]")
-            self.llm = ChatOpenAI(api_key=openai_api_key, model_name=self.model_name, callbacks=callback_manager)
-            logging.info("--- ChatOpenAI initialized successfully. [Step 5]")
-        except Exception as e:
-            logging.error(f"--- Failed to initialize ChatOpenAI: {str(e)} [Step 5]")
+        self.llm = self.get_llm(LLMService.SOLVER)
+
+        # Aynı prompt için tekrar LLM çağrısı yapılmasın diye cevaplar önbelleğe alınır
+        self.response_cache = TieredCache(namespace="llm",
+                                          max_entries=Config.LLM_CACHE_MAX_ENTRIES,
+                                          ttl_seconds=Config.LLM_CACHE_TTL_SECONDS,
+                                          redis_max_entries=Config.LLM_CACHE_REDIS_MAX_ENTRIES)
+
+    def model_for(self, stage: str) -> str:
+        return self.stage_models.get(stage, self.model_name)
 
-    async def invoke(self, prompt):
+    def get_llm(self, stage: str):
+        """Aşamanın modeli için ChatOpenAI istemcisini döndürür; aynı modeli kullanan aşamalar istemciyi paylaşır."""
+        model_name = self.model_for(stage)
+        if model_name not in self._llms:
+            try:
+                logging.info(f"--- Initializing ChatOpenAI for {model_name} [Step 5]")
+                self._llms[model_name] = ChatOpenAI(api_key=self._openai_api_key, model_name=model_name,
+                                                    callbacks=self._callback_manager)
+                logging.info("--- ChatOpenAI initialized successfully. [Step 5]")
+            except Exception as e:
+                logging.error(f"--- Failed to initialize ChatOpenAI: {str(e)} [Step 5]")
+                return None
+        return self._llms[model_name]
+
+    async def invoke(self, prompt, prompt_version: str = "raw", use_cache: bool = True, stage: str = TOOL):
         """
         Verilen planner_prompt'u kullanarak bir planner nesnesi oluşturur ve çalıştırır.
+        prompt_version, promptun üretildiği şablonun sürümüdür ve önbellek anahtarına eklenir.
+        stage, çağrının hangi aşamaya ait olduğunu (planner, tool, summary) ve dolayısıyla modeli belirler.
         """
         try:
+            cache_key = self.cache_key(prompt, prompt_version, stage) if use_cache else None
+            cached = await self._get_cached(cache_key, stage)
+            if cached is not None:
+                return cached
+
             # Prompt şablonunu oluştur
             prompt_template = [{"role": "user", "content": prompt}]
 
             # Planner'ı çalıştır ve sonucu al
             #result = await self.llm.ainvoke(prompt_template.format_messages())
-            result = await self.llm.ainvoke(prompt_template)
+            result = await self.get_llm(stage).ainvoke(prompt_template)
+            await self._store_cached(cache_key, result)
             return result
         except Exception as e:
             logging.error(f"--- Failed to create planner or execute prompt: {str(e)}")
             return "Failed to create planner or execute prompt: {str(e)}"
 
 
-    async def invoke_solve(self,final_prompt):
+    async def stream_solve(self, final_prompt, prompt_version: str = "raw"):
+        """
+        Solver cevabını token token üretir. Son parça üretildikten sonra toplam kullanım bilgisi
+        (usage_metadata) birleştirilmiş mesajda yer alır. Önbellekteki cevap tek parça olarak döner.
+        """
+        async for chunk in self.stream(final_prompt, prompt_version, stage=LLMService.SOLVER):
+            yield chunk
+
+    async def stream(self, prompt, prompt_version: str = "raw", stage: str = SOLVER):
+        """Verilen promptun cevabını parça parça üretir (planner ve solver stream modları için)."""
+        cache_key = self.cache_key(prompt, prompt_version, stage)
+        cached = await self._get_cached(cache_key, stage)
+        if cached is not None:
+            yield AIMessageChunk(content=cached.content, usage_metadata=cached.usage_metadata,
+                                 response_metadata=cached.response_metadata)
+            return
+
+        formatted_prompt = [{"role": "user", "content": prompt}]
+        try:
+            result = None
+            async for chunk in self.get_llm(stage).astream(formatted_prompt, stream_usage=True):
+                result = chunk if result is None else result + chunk
+                yield chunk
+            await self._store_cached(cache_key, result)
+        except Exception as e:
+            logging.error(f"Error in LLM stream: {str(e)}")
+            raise ValueError(f"Failed to stream LLM response: {str(e)}")
+
+    async def invoke_solve(self, final_prompt, prompt_version: str = "raw"):
         try:
+            cache_key = self.cache_key(final_prompt, prompt_version, LLMService.SOLVER)
+            cached = await self._get_cached(cache_key, LLMService.SOLVER)
+            if cached is not None:
+                return cached
+
             formatted_prompt = [{"role": "user", "content": final_prompt}]
 
-            result = await self.llm.ainvoke(formatted_prompt)
+            result = await self.get_llm(LLMService.SOLVER).ainvoke(formatted_prompt)
+            await self._store_cached(cache_key, result)
             return result
         except Exception as e:
             logging.error(f"Error in LLM invoke: {str(e)}")
             raise ValueError(f"Failed to invoke LLM: {str(e)}")
 
+    def cache_key(self, prompt: str, prompt_version: str, stage: str = TOOL) -> str:
+        """Aşamanın model adı, şablon sürümü ve normalize edilmiş promptun özetinden önbellek anahtarı üretir."""
+        digest = hashlib.sha256(LLMService.normalize_prompt(prompt).encode("utf-8")).hexdigest()
+        return f"{self.model_for(stage)}:{prompt_version}:{digest}"
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """
+        Yalnızca boşluk ya da Unicode biçimi farklı olan promptları eşitler. Büyük/küçük harf korunur:
+        "CO" ile "Co" ya da koddaki tanımlayıcılar farklı cevaplar gerektirebilir.
+        """
+        normalized = unicodedata.normalize("NFKC", str(prompt))
+        return re.sub(r"\s+", " ", normalized).strip()
+
+    async def _get_cached(self, cache_key, stage: str):
+        if cache_key is None or not Config.LLM_CACHE_ENABLED:
+            return None
+        cached = await self.response_cache.get(cache_key)
+        if cached is None:
+            return None
+        # Önbellekten dönen cevap için LLM'e token harcanmadı
+        return AIMessage(content=cached["content"],
+                         response_metadata={"model_name": self.model_for(stage), "cached": True},
+                         usage_metadata={"input_tokens": 0, "output_tokens": 0, "total_tokens": 0})
+
+    async def _store_cached(self, cache_key, result):
+        if cache_key is None or not Config.LLM_CACHE_ENABLED:
+            return
+        content = getattr(result, "content", None)
+        if isinstance(content, str) and content:
+            await self.response_cache.set(cache_key, {"content": content})
+
@@ -0,0 +1,227 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from uuid import uuid4
+
+from app.config.config import Config
+from app.db.redis_client_manager import RedisClientManager
+from app.utils.web_socket_connection_manager import connection_manager
+
+
+class NotificationBus:
+    """
+    WebSocket bildirimlerini Redis pub/sub üzerinden tüm worker'lara dağıtır.
+    Her oturum/kullanıcı anahtarı ayrı bir kanaldır; her worker yalnızca kendi üzerinde bağlı
+    istemcisi olan kanallara abone olur ve gelen mesajları yerel soketlerine iletir.
+    Mesajlar bu worker'daki istemcilere her zaman doğrudan iletilir; Redis'e yalnızca başka bir worker'da
+    abonesi olan kanallar için yayınlanır (abone bilgisi PUBSUB NUMSUB ile kısa süreliğine tutulur).
+    Redis kullanılamıyorsa bildirimler yalnızca yerel bağlantı kaydına gönderilir.
+    """
+    _instance = None
+    RECENT_MESSAGE_LIMIT = 1000
+    PRESENCE_LIMIT = 10_000
+
+    def __init__(self, manager=None):
+        self.manager = manager or connection_manager
+        self.enabled = False
+        self._redis = None
+        self._pubsub = None
+        self._commands = None
+        self._writer = None
+        self._reader = None
+        self._subscribed = asyncio.Event()
+        self._recent_ids = OrderedDict()
+        self._subscribed_channels = set()
+        # Kanal -> (geçerlilik sonu, başka bir worker'da abone var mı); en eski yazılanlar atılarak sınırlanır
+        self._presence = OrderedDict()
+        self._presence_pending = set()
+
+    @staticmethod
+    def get_instance():
+        if NotificationBus._instance is None:
+            NotificationBus._instance = NotificationBus()
+        return NotificationBus._instance
+
+    async def start(self):
+        self._redis = RedisClientManager.get_client() if Config.NOTIFICATION_BUS_ENABLED else None
+        if self._redis is None:
+            logging.info("Notification bus disabled, WebSocket notifications are delivered locally.")
+            return
+        try:
+            await self._redis.ping()
+        except Exception as e:
+            logging.error(f"Notification bus could not connect to Redis, using local delivery: {e}")
+            self._redis = None
+            return
+
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._commands = asyncio.Queue(maxsize=Config.NOTIFICATION_QUEUE_SIZE)
+        self._writer = asyncio.create_task(self._process_commands())
+        self._reader = asyncio.create_task(self._relay_messages())
+        self.manager.subscription_listener = self
+        for key in list(self.manager.connections):
+            self.key_added(key)
+        self.enabled = True
+        logging.info("Notification bus started on Redis pub/sub.")
+
+    async def stop(self):
+        self.enabled = False
+        self.manager.subscription_listener = None
+        for task in (self._writer, self._reader):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*(task for task in (self._writer, self._reader) if task is not None),
+                             return_exceptions=True)
+        self._writer = self._reader = None
+        self._commands = None
+        self._subscribed_channels.clear()
+        self._presence.clear()
+        self._presence_pending.clear()
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        # Paylaşılan bağlantı havuzu RedisClientManager tarafından kapatılır
+        self._redis = None
+
+    def publish(self, keys, message: str):
+        """
+        Mesajı bu worker'daki istemcilere iletir; başka bir worker'da abonesi olan kanallara da yayınlanmak
+        üzere kuyruğa alır. Çağıran taraf beklemez. Yerel olarak kuyruğa alınan istemci sayısını döndürür.
+        """
+        keys = list(keys)
+        delivered = self.manager.send_to(keys, message)
+        if not self.enabled:
+            return delivered
+        remote_keys = [key for key in keys if self.has_remote_listeners([key])]
+        if not remote_keys:
+            return delivered
+
+        message_id = uuid4().hex
+        # Mesaj bu worker'ın da abone olduğu bir kanaldan geri geldiğinde ikinci kez iletilmez
+        self._remember(message_id)
+        envelope = json.dumps({"id": message_id, "keys": keys, "message": message}, ensure_ascii=False)
+        for key in remote_keys:
+            self._enqueue(("publish", NotificationBus._channel(key), envelope))
+        return delivered
+
+    def has_remote_listeners(self, keys) -> bool:
+        """
+        Anahtarlardan birinin başka bir worker'da abonesi olup olmadığı. Bilgi eskidiyse arka planda
+        yenilenir ve son bilinen değer kullanılır; hiç bilinmiyorsa mesaj kaybolmasın diye True döner.
+        """
+        if not self.enabled:
+            return False
+        now = time.monotonic()
+        found = False
+        for key in keys:
+            channel = NotificationBus._channel(key)
+            presence = self._presence.get(channel)
+            if presence is None or presence[0] <= now:
+                self._refresh_presence(channel)
+            if presence is None or presence[1]:
+                found = True
+        return found
+
+    def key_added(self, key: str):
+        """Bu worker'da anahtar için ilk istemci bağlandığında kanala abone olur."""
+        if self._commands is not None:
+            self._enqueue(("subscribe", NotificationBus._channel(key), None))
+
+    def key_removed(self, key: str):
+        """Bu worker'da anahtarın son istemcisi ayrıldığında aboneliği bırakır."""
+        channel = NotificationBus._channel(key)
+        self._presence.pop(channel, None)
+        if self._commands is not None:
+            self._enqueue(("unsubscribe", channel, None))
+
+    def _enqueue(self, command) -> bool:
+        try:
+            self._commands.put_nowait(command)
+            return True
+        except asyncio.QueueFull:
+            logging.warning(f"Notification bus queue is full, dropping {command[0]} for {command[1]}.")
+            return False
+
+    def _refresh_presence(self, channel: str):
+        if channel in self._presence_pending:
+            return
+        self._presence_pending.add(channel)
+        if not self._enqueue(("presence", channel, None)):
+            self._presence_pending.discard(channel)
+
+    async def _process_commands(self):
+        while True:
+            command, channel, payload = await self._commands.get()
+            try:
+                if command == "publish":
+                    await self._redis.publish(channel, payload)
+                elif command == "subscribe":
+                    await self._pubsub.subscribe(channel)
+                    self._subscribed_channels.add(channel)
+                    self._subscribed.set()
+                elif command == "unsubscribe":
+                    await self._pubsub.unsubscribe(channel)
+                    self._subscribed_channels.discard(channel)
+                elif command == "presence":
+                    await self._update_presence(channel)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Notification bus {command} failed for {channel}: {e}")
+                if command == "presence":
+                    # Redis'e ulaşılamıyorsa bir süre yayın yapılmaz; yerel iletim devam eder
+                    self._set_presence(channel, False)
+            finally:
+                if command == "presence":
+                    self._presence_pending.discard(channel)
+
+    async def _update_presence(self, channel: str):
+        subscribers = dict(await self._redis.pubsub_numsub(channel)).get(channel, 0)
+        # Bu worker'ın kendi aboneliği sayılmaz
+        if channel in self._subscribed_channels:
+            subscribers -= 1
+        self._set_presence(channel, subscribers > 0)
+
+    def _set_presence(self, channel: str, has_listeners: bool):
+        self._presence[channel] = (time.monotonic() + Config.NOTIFICATION_PRESENCE_TTL_SECONDS, has_listeners)
+        self._presence.move_to_end(channel)
+        if len(self._presence) > NotificationBus.PRESENCE_LIMIT:
+            self._presence.popitem(last=False)
+
+    async def _relay_messages(self):
+        while True:
+            await self._subscribed.wait()
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Notification bus read failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+            self._deliver_locally(message["data"])
+
+    def _deliver_locally(self, envelope: str):
+        try:
+            data = json.loads(envelope)
+        except (TypeError, ValueError):
+            logging.warning("Notification bus received a malformed message.")
+            return
+        # Aynı mesaj birden fazla anahtarın kanalından gelebilir; her worker bir kez iletir
+        if data["id"] in self._recent_ids:
+            return
+        self._remember(data["id"])
+        self.manager.send_to(data["keys"], data["message"])
+
+    def _remember(self, message_id: str):
+        self._recent_ids[message_id] = True
+        if len(self._recent_ids) > NotificationBus.RECENT_MESSAGE_LIMIT:
+            self._recent_ids.popitem(last=False)
+
+    @staticmethod
+    def _channel(key: str) -> str:
+        return f"{Config.NOTIFICATION_CHANNEL_PREFIX}{key}"
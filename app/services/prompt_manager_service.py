@@ -1,5 +1,6 @@
 ﻿from app.models import Prompt
 from app.repositories.mongo_db_prompts_repository import MongoDBPromptRepository
+from app.services.prompt_registry_service import PromptRegistry
 from app.config.logger import logging
 from pymongo.errors import DuplicateKeyError
 
@@ -59,6 +60,7 @@ class PromptService:
                 created_at=new_prompt.created_at
             )
             logger.info(f"Successfully added new prompt: {new_prompt.id}")
+            await PromptRegistry.get_instance().refresh()
         except KeyError as e:
             logger.error(f"Missing required field: {e}", exc_info=True)
             raise ValueError(f"Missing required field: {e}")
@@ -82,6 +84,7 @@ class PromptService:
                 description=updated_data.get("description", "")
             )
             logger.info(f"Successfully updated prompt: {prompt_type}")
+            await PromptRegistry.get_instance().refresh()
         except Exception as e:
             logger.error(f"Error updating prompt '{prompt_type}': {e}", exc_info=True)
             raise ValueError(f"Error updating prompt: {e}")
@@ -96,6 +99,7 @@ class PromptService:
                 logger.warning(f"Prompt type '{prompt_type}' not found for deletion.")
                 raise ValueError(f"Prompt type '{prompt_type}' not found")
             logger.info(f"Successfully deleted prompt: {prompt_type}")
+            await PromptRegistry.get_instance().refresh()
         except Exception as e:
             logger.error(f"Error deleting prompt '{prompt_type}': {e}", exc_info=True)
             raise ValueError(f"Error deleting prompt: {e}")
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from string import Formatter
+from typing import Dict, Tuple
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.config.config import Config
+from app.models.prompt_model import PromptType
+from app.repositories.mongo_db_prompts_repository import MongoDBPromptRepository
+from app.utils.promts import PLANNER_PROMPT, SOLVE_PROMPT
+
+# Her prompt tipinin çalışma anında doldurulan alanları
+REQUIRED_PLACEHOLDERS = {
+    PromptType.PLANNER: {"task", "chat_history"},
+    PromptType.SOLVER: {"task", "plan", "chat_history"},
+    PromptType.EXAM: set(),
+}
+
+BUILTIN_PROMPTS = {
+    PromptType.PLANNER: PLANNER_PROMPT,
+    PromptType.SOLVER: SOLVE_PROMPT,
+}
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    type: PromptType
+    template: str
+    placeholders: Tuple[str, ...]
+    version: str
+
+    def format(self, **kwargs) -> str:
+        return self.template.format(**kwargs)
+
+
+class PromptRegistry:
+    """
+    Aktif promptları MongoDBPromptRepository'den yükleyip bellekte derlenmiş halde tutar.
+    İstek başına veritabanı okuması yapılmaz; değişiklikler change stream ile (replica set yoksa
+    periyodik yoklama ile) algılanır. Geçerli bir kayıt yoksa koddaki varsayılan promptlar kullanılır.
+    """
+    _instance = None
+
+    def __init__(self, repository: MongoDBPromptRepository = None, refresh_interval: float = None):
+        self._repository = repository
+        self.refresh_interval = refresh_interval or Config.PROMPT_REGISTRY_REFRESH_SECONDS
+        self.version = 0
+        self._prompts: Dict[PromptType, CompiledPrompt] = PromptRegistry._builtin_prompts()
+        self._refresh_lock = asyncio.Lock()
+        self._watch_task = None
+
+    @staticmethod
+    def get_instance():
+        if PromptRegistry._instance is None:
+            PromptRegistry._instance = PromptRegistry()
+        return PromptRegistry._instance
+
+    @property
+    def repository(self):
+        if self._repository is None:
+            self._repository = MongoDBPromptRepository(db_name=Config.MONGO_DB_NAME,
+                                                       collection_name=Config.MONGO_DB_PROMPT_COLLECTION_NAME)
+        return self._repository
+
+    def get(self, prompt_type: PromptType) -> CompiledPrompt:
+        return self._prompts[prompt_type]
+
+    async def start(self):
+        """Promptları yükler ve değişiklikleri izleyen arka plan görevini başlatır."""
+        await self.refresh()
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch_changes())
+
+    async def stop(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            await asyncio.gather(self._watch_task, return_exceptions=True)
+            self._watch_task = None
+
+    async def refresh(self):
+        """Aktif promptları yeniden yükler; içerik değiştiyse sürüm sayacını artırır."""
+        async with self._refresh_lock:
+            documents = await self.repository.list_active_prompts()
+            if documents is None:
+                logging.warning("Prompt registry refresh failed, keeping current prompts.")
+                return
+
+            prompts = PromptRegistry._builtin_prompts()
+            for prompt_type, document in PromptRegistry._latest_by_type(documents).items():
+                compiled = PromptRegistry._compile(prompt_type, document)
+                if compiled is not None:
+                    prompts[prompt_type] = compiled
+
+            if prompts != self._prompts:
+                self._prompts = prompts
+                self.version += 1
+                logging.info(f"Prompt registry updated to version {self.version}.")
+
+    async def _watch_changes(self):
+        while True:
+            try:
+                async with self.repository.watch_prompts() as stream:
+                    logging.info("Prompt registry is watching the prompt collection for changes.")
+                    async for _ in stream:
+                        await self.refresh()
+            except OperationFailure as e:
+                logging.info(f"Change streams unavailable ({e}); polling prompts every "
+                             f"{self.refresh_interval}s.")
+                await self._poll_changes()
+                return
+            except PyMongoError as e:
+                logging.warning(f"Prompt change stream interrupted: {e}")
+                await asyncio.sleep(self.refresh_interval)
+                await self.refresh()
+
+    async def _poll_changes(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logging.error(f"Error polling prompts: {e}")
+
+    @staticmethod
+    def _latest_by_type(documents) -> dict:
+        """Her prompt tipi için en son oluşturulan ya da güncellenen kaydı seçer."""
+        latest = {}
+        for document in documents:
+            try:
+                prompt_type = PromptType(document.get("type"))
+            except ValueError:
+                continue
+            current = latest.get(prompt_type)
+            if current is None or PromptRegistry._changed_at(document) >= PromptRegistry._changed_at(current):
+                latest[prompt_type] = document
+        return latest
+
+    @staticmethod
+    def _changed_at(document: dict) -> datetime:
+        return document.get("updated_at") or document.get("created_at") or datetime.min
+
+    @staticmethod
+    def _compile(prompt_type: PromptType, document: dict):
+        """Şablonu ayrıştırır ve alanlarını doğrular. Geçersiz şablonlar için None döner."""
+        template = document.get("template") or ""
+        try:
+            placeholders = PromptRegistry._parse_placeholders(template)
+        except ValueError as e:
+            logging.error(f"Invalid {prompt_type.value} template, using the previous prompt: {e}")
+            return None
+
+        required = REQUIRED_PLACEHOLDERS[prompt_type]
+        if set(placeholders) != required and prompt_type in BUILTIN_PROMPTS:
+            logging.error(f"{prompt_type.value} template placeholders {sorted(placeholders)} "
+                          f"must be exactly {sorted(required)}; using the previous prompt.")
+            return None
+
+        declared = document.get("placeholders") or []
+        if set(declared) != set(placeholders):
+            logging.warning(f"{prompt_type.value} declares placeholders {declared} "
+                            f"but the template uses {list(placeholders)}.")
+
+        version = f"{document.get('id')}:{PromptRegistry._changed_at(document).isoformat()}"
+        return CompiledPrompt(type=prompt_type, template=template, placeholders=placeholders, version=version)
+
+    @staticmethod
+    def _parse_placeholders(template: str) -> Tuple[str, ...]:
+        placeholders = []
+        for _, field_name, _, _ in Formatter().parse(template):
+            if field_name is None:
+                continue
+            if not field_name.isidentifier():
+                raise ValueError(f"Unsupported placeholder '{{{field_name}}}'")
+            if field_name not in placeholders:
+                placeholders.append(field_name)
+        return tuple(placeholders)
+
+    @staticmethod
+    def _builtin_prompts() -> Dict[PromptType, CompiledPrompt]:
+        return {
+            prompt_type: CompiledPrompt(type=prompt_type, template=template,
+                                        placeholders=PromptRegistry._parse_placeholders(template),
+                                        version="builtin")
+            for prompt_type, template in BUILTIN_PROMPTS.items()
+        }
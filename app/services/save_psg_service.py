@@ -1,63 +1,98 @@
 import json
 import logging
+from uuid import uuid4
+
 import redis.asyncio as redis
 
 from app.config.config import Config
+from app.db.redis_client_manager import RedisClientManager
 from app.repositories.mongo_db_repository import MongoDBRepository
 
 
 class RedisService:
+    """
+    Konuşma verisini backend'e devretmek için Redis'e yazar.
+    Her oturum `SESSION_REDIS_PREFIX + session_id` anahtarında, SESSION_REDIS_TTL_SECONDS ömürlü bir hash'tir:
+    son soru/cevap alanları üzerine yazılır, token sayaçları (TOKEN_FIELDS) HINCRBY ile oturum boyunca toplanır.
+    Yazılan konuşma id'leri `<anahtar>:turns` kümesinde tutulur; yeniden denenen bir yazma aynı konuşmayı
+    ikinci kez saymaz. Bağlantılar RedisClientManager'ın paylaşılan havuzundan alınır.
+    """
+    TOKEN_FIELDS = ("prompt_tokens", "completion_tokens")
+    # KEYS: oturum hash'i, yazılmış konuşma id'leri kümesi
+    # ARGV: konuşma id, TTL, alan sayısı, alan/değer çiftleri, ardından token alanı/artış çiftleri
+    WRITE_TURN_SCRIPT = """
+if redis.call('SADD', KEYS[2], ARGV[1]) == 1 then
+    local field_end = 3 + tonumber(ARGV[3]) * 2
+    for i = 4, field_end, 2 do
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+    for i = field_end + 1, #ARGV, 2 do
+        redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+    end
+    redis.call('HINCRBY', KEYS[1], 'turns', 1)
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+return 1
+"""
+
     def __init__(self):
         """
         RedisService constructor.
         """
         self.redis_url = Config.REDIS_URL
         self.backend_url = Config.BACKEND_URL
-        self.redis_client = None
-        self.mongo_repository = MongoDBRepository()
+        self.mongo_repository = MongoDBRepository(db_name=Config.MONGO_DB_NAME,
+                                                  collection_name=Config.MONGO_DB_COLLECTION_NAME)
 
-    async def connect(self):
-        """Redis'e bağlanır."""
-        try:
-            self.redis_client = await redis.from_url(self.redis_url, decode_responses=True)
-            logging.info(f"Connected to Redis at {self.redis_url}")
-        except redis.ConnectionError as e:
-            logging.error(f"Redis connection error: {e}")
-        except Exception as e:
-            logging.error(f"Unexpected error during Redis connection: {e}")
-
-    async def close(self):
-        """Redis bağlantısını kapatır."""
-        if self.redis_client:
-            try:
-                await self.redis_client.aclose()
-                logging.info("Redis connection closed.")
-            except Exception as e:
-                logging.error(f"Error closing Redis connection: {e}")
-
-    async def write_to_redis(self, session_id: str, chat_data: dict):
+    async def write_to_redis(self, session_id: str, chat_data: dict, turn_id: str = None):
         """
         Veriyi Redis'e yazar ve backend endpoint'ini tetikler.
         """
-        try:
-            if not self.redis_client:
-                logging.error("Redis client is not connected. Attempting to reconnect...")
-                await self.connect()
-                if not self.redis_client:
-                    logging.error("Failed to reconnect to Redis.")
-                    return
+        await self.write_many_to_redis([(turn_id or uuid4().hex, session_id, chat_data)])
 
-            # Veriyi JSON formatına çevir ve Redis'e yaz
-            serialized_data = json.dumps(chat_data, ensure_ascii=False)
-            await self.redis_client.set(session_id, serialized_data)
-            logging.info(f"Chat data written to Redis for session: {session_id}")
+    async def write_many_to_redis(self, chats: list) -> bool:
+        """
+        (turn_id, session_id, chat_data) üçlülerini tek bir MULTI/EXEC pipeline ile Redis'e yazar ve her oturum
+        için backend'i tetikler. Yazma başarısız olursa False döner; çağıran taraf aynı turn_id'lerle yeniden
+        dener. Sunucuda uygulanmış ama cevabı alınamamış bir yazma tekrarlandığında sayaçlar değişmez.
+        """
+        client = RedisClientManager.get_client()
+        if client is None:
+            logging.error("Redis is not available, chat data not written.")
+            return False
+
+        try:
+            write_turn = client.register_script(RedisService.WRITE_TURN_SCRIPT)
+            async with client.pipeline(transaction=True) as pipe:
+                for turn_id, session_id, chat_data in chats:
+                    key = RedisService._session_key(session_id)
+                    fields = [item for field, value in chat_data.items() if field not in RedisService.TOKEN_FIELDS
+                              for item in (field, value if isinstance(value, str)
+                                           else json.dumps(value, ensure_ascii=False))]
+                    tokens = [item for field in RedisService.TOKEN_FIELDS if chat_data.get(field)
+                              for item in (field, int(chat_data[field]))]
+                    await write_turn(keys=[key, f"{key}:turns"],
+                                     args=[turn_id, Config.SESSION_REDIS_TTL_SECONDS, len(fields) // 2,
+                                           *fields, *tokens],
+                                     client=pipe)
+                await pipe.execute()
+            logging.info(f"Chat data written to Redis for {len(chats)} turns.")
 
-            # Backend endpoint'ini tetikle
-            RedisService.trigger_backend(session_id=session_id)
+            for _, session_id, _ in chats:
+                RedisService.trigger_backend(session_id=session_id)
+            return True
         except redis.RedisError as e:
-            logging.error(f"Redis operation failed: {e}")
+            logging.error(f"Redis pipeline failed: {e}")
+            RedisClientManager.mark_failed(e)
+            return False
         except Exception as e:
             logging.error(f"Unexpected error while writing to Redis: {e}")
+            return False
+
+    @staticmethod
+    def _session_key(session_id: str) -> str:
+        return f"{Config.SESSION_REDIS_PREFIX}{session_id}"
 
     @staticmethod
     def trigger_backend(session_id: str):
@@ -0,0 +1,159 @@
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import redis.asyncio as redis
+
+from app.config.config import Config
+from app.db.redis_client_manager import RedisClientManager
+
+
+class SearchQuotaService:
+    """
+    Web arama (Google Custom Search) çağrılarını oturum başına ve global olarak sayar ve
+    PLANNER_PROMPT'taki politikayı kodda uygular:
+    - ilk SEARCH_FREE_QUESTIONS soru: soru başına SEARCH_MAX_PER_QUESTION arama, toplamda en fazla
+      SEARCH_MAX_PER_CONVERSATION arama,
+    - sonraki SEARCH_PAUSE_QUESTIONS soru: arama yok,
+    - sonrasında: soru başına SEARCH_MAX_PER_QUESTION arama.
+    Yalnızca API'ye giden çağrılar sayılır; önbellekten dönen aramalar kotadan düşmez.
+    Sayaçlar tüm worker'larca paylaşılsın diye Redis'te tutulur; Redis yoksa süreç içinde tutulur.
+    Bir aramanın denetimi ve sayaçların artırılması tek bir Lua betiğiyle yapılır; sınır aşılırsa hiçbir sayaç
+    değişmez. Redis çağrı sırasında hata verirse o çağrının tamamı süreç içi sayaçlarla yapılır.
+    """
+    _instance = None
+    LOCAL_SESSION_LIMIT = 10000
+    # KEYS: oturum sayaçları, günlük sayaç; ARGV: soru alanı, soru başı sınır, ücretsiz aşama (1/0),
+    # konuşma başı sınır, günlük sınır (0: sınırsız), TTL. İzin verilirse "", verilmezse ret nedeni döner.
+    ACQUIRE_SCRIPT = """
+if tonumber(redis.call('HGET', KEYS[1], ARGV[1]) or '0') >= tonumber(ARGV[2]) then
+    return 'per-question limit'
+end
+local free_phase = ARGV[3] == '1'
+if free_phase and tonumber(redis.call('HGET', KEYS[1], 'searches') or '0') >= tonumber(ARGV[4]) then
+    return 'per-conversation limit'
+end
+local daily_limit = tonumber(ARGV[5])
+if daily_limit > 0 and tonumber(redis.call('HGET', KEYS[2], 'searches') or '0') >= daily_limit then
+    return 'daily limit'
+end
+redis.call('HINCRBY', KEYS[1], ARGV[1], 1)
+if free_phase then
+    redis.call('HINCRBY', KEYS[1], 'searches', 1)
+end
+redis.call('HINCRBY', KEYS[2], 'searches', 1)
+redis.call('EXPIRE', KEYS[1], ARGV[6])
+redis.call('EXPIRE', KEYS[2], ARGV[6])
+return ''
+"""
+
+    def __init__(self):
+        self._local_sessions = OrderedDict()
+        self._local_daily = {}
+        self.api_calls = 0
+        self.denied = 0
+
+    @staticmethod
+    def get_instance():
+        if SearchQuotaService._instance is None:
+            SearchQuotaService._instance = SearchQuotaService()
+        return SearchQuotaService._instance
+
+    async def start_question(self, session_id: str) -> int:
+        """Oturumdaki soru sayacını artırır ve bu sorunun sırasını döndürür."""
+        return await self._incr(SearchQuotaService._session_key(session_id), "questions", 1)
+
+    async def acquire(self, session_id: str, question_number: int) -> bool:
+        """
+        Bir arama API çağrısı için kota ayırır. Politika izin vermiyorsa sayaçlara dokunmadan False döner.
+        """
+        if (Config.SEARCH_FREE_QUESTIONS < question_number
+                <= Config.SEARCH_FREE_QUESTIONS + Config.SEARCH_PAUSE_QUESTIONS):
+            return self._deny(session_id, question_number, "pause phase")
+
+        session_key = SearchQuotaService._session_key(session_id)
+        daily_key = SearchQuotaService._daily_key()
+        question_field = f"q{question_number}"
+        free_phase = question_number <= Config.SEARCH_FREE_QUESTIONS
+
+        reason = None
+        client = RedisClientManager.get_client()
+        if client is not None:
+            try:
+                reason = await client.register_script(SearchQuotaService.ACQUIRE_SCRIPT)(
+                    keys=[session_key, daily_key],
+                    args=[question_field, Config.SEARCH_MAX_PER_QUESTION, int(free_phase),
+                          Config.SEARCH_MAX_PER_CONVERSATION, Config.SEARCH_DAILY_LIMIT,
+                          Config.SEARCH_QUOTA_TTL_SECONDS])
+            except redis.RedisError as e:
+                self._redis_failed(e)
+                client = None
+        if client is None:
+            reason = self._acquire_local(session_key, daily_key, question_field, free_phase)
+
+        if reason:
+            return self._deny(session_id, question_number, reason.decode() if isinstance(reason, bytes) else reason)
+        self.api_calls += 1
+        return True
+
+    def stats(self) -> dict:
+        return {"api_calls": self.api_calls, "denied": self.denied,
+                "daily_limit": Config.SEARCH_DAILY_LIMIT, "redis_connected": RedisClientManager.is_available()}
+
+    def _deny(self, session_id: str, question_number: int, reason: str) -> bool:
+        self.denied += 1
+        logging.info(f"Session: {session_id}, web search denied for question {question_number} ({reason}).")
+        return False
+
+    async def _incr(self, key: str, field: str, amount: int) -> int:
+        client = RedisClientManager.get_client()
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=True) as pipe:
+                    pipe.hincrby(key, field, amount)
+                    pipe.expire(key, Config.SEARCH_QUOTA_TTL_SECONDS)
+                    value, _ = await pipe.execute()
+                return value
+            except redis.RedisError as e:
+                self._redis_failed(e)
+
+        counters = self._local_counters(key)
+        counters[field] = counters.get(field, 0) + amount
+        return counters[field]
+
+    def _acquire_local(self, session_key: str, daily_key: str, question_field: str, free_phase: bool):
+        """ACQUIRE_SCRIPT'in süreç içi karşılığı; ret nedenini ya da izin verilirse None döndürür."""
+        session = self._local_counters(session_key)
+        daily = self._local_counters(daily_key)
+        if session.get(question_field, 0) >= Config.SEARCH_MAX_PER_QUESTION:
+            return "per-question limit"
+        if free_phase and session.get("searches", 0) >= Config.SEARCH_MAX_PER_CONVERSATION:
+            return "per-conversation limit"
+        if daily.get("searches", 0) >= Config.SEARCH_DAILY_LIMIT > 0:
+            return "daily limit"
+        session[question_field] = session.get(question_field, 0) + 1
+        if free_phase:
+            session["searches"] = session.get("searches", 0) + 1
+        daily["searches"] = daily.get("searches", 0) + 1
+        return None
+
+    def _local_counters(self, key: str) -> dict:
+        if not key.startswith(f"{Config.CACHE_REDIS_PREFIX}quota:session:"):
+            return self._local_daily.setdefault(key, {})
+        counters = self._local_sessions.setdefault(key, {})
+        self._local_sessions.move_to_end(key)
+        while len(self._local_sessions) > SearchQuotaService.LOCAL_SESSION_LIMIT:
+            self._local_sessions.popitem(last=False)
+        return counters
+
+    def _redis_failed(self, error):
+        logging.warning(f"Search quota counters unavailable in Redis, counting in process: {error}")
+        RedisClientManager.mark_failed(error)
+
+    @staticmethod
+    def _session_key(session_id: str) -> str:
+        return f"{Config.CACHE_REDIS_PREFIX}quota:session:{session_id}"
+
+    @staticmethod
+    def _daily_key() -> str:
+        return f"{Config.CACHE_REDIS_PREFIX}quota:global:{datetime.now(timezone.utc):%Y%m%d}"
@@ -0,0 +1,48 @@
+import logging
+
+from app.config.config import Config
+from app.models.state_model import WorkflowState
+from app.services.user_notification_service import UserNotificationService
+
+
+class StreamEventService:
+    """
+    İş akışı ilerlemesini (plan, araç adımları, cevap token'ları) dinleyicilere iletir:
+    SSE isteği için WorkflowState.event_queue'ya, WebSocket istemcileri için bildirim kuyruğuna.
+    """
+    SESSION = "session"
+    PLAN = "plan"
+    TOOL_START = "tool_start"
+    TOOL_END = "tool_end"
+    TOKEN = "token"
+    DONE = "done"
+    ERROR = "error"
+
+    @staticmethod
+    def has_listeners(state: WorkflowState) -> bool:
+        if state.event_queue is not None:
+            return True
+        return Config.STREAM_WEBSOCKET_EVENTS and UserNotificationService.has_listeners(
+            state.session_id, StreamEventService.notification_user(state))
+
+    @staticmethod
+    def notification_user(state: WorkflowState):
+        """
+        Bildirimlerin kullanıcı anahtarına da gönderilip gönderilmeyeceği. Yalnızca oturum bu istekte
+        oluşturulduysa kullanıcı kimliği döner; aksi halde bildirimler sadece isteği yapan oturuma gider.
+        """
+        return state.user_id if state.new_session else None
+
+    @staticmethod
+    def emit(state: WorkflowState, event_type: str, data: dict):
+        if not StreamEventService.has_listeners(state):
+            return
+
+        event = {"event": event_type, "session_id": state.session_id, "data": data}
+        try:
+            if state.event_queue is not None:
+                state.event_queue.put_nowait(event)
+            if Config.STREAM_WEBSOCKET_EVENTS:
+                UserNotificationService.notify_event(event, user_id=StreamEventService.notification_user(state))
+        except Exception as e:
+            logging.error(f"Error emitting {event_type} event: {e}")
@@ -1,23 +1,63 @@
-﻿import logging
-from app.utils.web_socket_connection_manager import ConnectionManager
+﻿import json
+import logging
+from app.services.notification_bus_service import NotificationBus
+from app.utils.web_socket_connection_manager import ConnectionManager, connection_manager
 
 
 class UserNotificationService:
-    manager = ConnectionManager()
+    manager = connection_manager
 
     @staticmethod
-    async def notify_user(results):
+    async def notify_user(results, session_id: str = None, user_id: str = None):
         """
-        Kullanıcıya verilen sonuçları WebSocket üzerinden gönderir.
+        Kullanıcıya verilen sonuçları WebSocket üzerinden, yalnızca isteği yapan oturumun istemcilerine gönderir.
+        Mesajlar istemci kuyruklarına alınır; çağıran taraf (ör. web_search) beklemez.
         Args:
             results (list): Gönderilecek mesajların listesi.
+            session_id (str): İsteğin oturum kimliği.
+            user_id (str): İsteği yapan kullanıcı (oturum kimliğini henüz bilmeyen istemciler için).
         """
-        manager = ConnectionManager()
         if not results:
             logging.warning("No results to notify users.")
             return
 
         for result in results:
-            message = f"Snippet: {result.get('snippet', 'No snippet')}, Link: {result.get('link', 'No link')}"
-            logging.info(f"Sending message: {message}")
-            await manager.broadcast(message=message)
+            UserNotificationService.send(
+                f"Snippet: {result.get('snippet', 'No snippet')}, Link: {result.get('link', 'No link')}",
+                session_id=session_id, user_id=user_id)
+
+    @staticmethod
+    def notify_event(event: dict, user_id: str = None):
+        """İş akışı olaylarını (plan, araç ilerlemesi, cevap token'ları) JSON frame olarak gönderir."""
+        UserNotificationService.send(json.dumps(event, ensure_ascii=False),
+                                     session_id=event.get("session_id"), user_id=user_id)
+
+    @staticmethod
+    def send(message: str, session_id: str = None, user_id: str = None) -> int:
+        """Mesajı bu worker'daki ilgili istemcilere iletir; gerekirse veriyolu ile diğer worker'lara yayınlar."""
+        keys = UserNotificationService.target_keys(session_id, user_id)
+        if not keys:
+            return 0
+        return NotificationBus.get_instance().publish(keys, message)
+
+    @staticmethod
+    def has_listeners(session_id: str = None, user_id: str = None) -> bool:
+        """Bu worker'da ya da (bildirim veriyolu açıksa) başka bir worker'da ilgili istemci olup olmadığı."""
+        keys = UserNotificationService.target_keys(session_id, user_id)
+        if UserNotificationService.manager.has_clients(keys):
+            return True
+        return NotificationBus.get_instance().has_remote_listeners(keys)
+
+    @staticmethod
+    def target_keys(session_id: str = None, user_id: str = None):
+        keys = []
+        if session_id:
+            keys.append(ConnectionManager.session_key(session_id))
+        if user_id:
+            keys.append(ConnectionManager.user_key(user_id))
+        return keys
+
+    @staticmethod
+    async def flush():
+        """Uygulama kapanırken bağlı istemcileri kapatır."""
+        await UserNotificationService.manager.close_connections()
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.config.config import Config
+from app.utils.math_engine import MathEngine
+
+
+class MathTool:
+    """
+    math[problem, context] adımlarını MathEngine (sympy) ile ayrı süreçlerde çözer.
+    Hesaplama CPU'ya bağlı olduğundan event loop'u bloklamaması için süreç havuzunda çalışır ve
+    MATH_TOOL_TIMEOUT ile sınırlandırılır. Çözülemeyen problemler için None döner; çağıran taraf LLM'e düşer.
+    """
+    _executor = None
+
+    @staticmethod
+    def get_executor() -> ProcessPoolExecutor:
+        if MathTool._executor is None:
+            logging.info("Initializing math process pool...")
+            MathTool._executor = ProcessPoolExecutor(max_workers=Config.MATH_TOOL_WORKERS,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+        return MathTool._executor
+
+    @staticmethod
+    def start():
+        """Süreçleri ve sympy importunu önceden başlatır; ilk math adımı bu maliyeti ödemez."""
+        MathTool.get_executor().submit(MathEngine.solve, "1+1")
+
+    @staticmethod
+    async def shutdown():
+        if MathTool._executor is not None:
+            executor, MathTool._executor = MathTool._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+            logging.info("Math process pool closed.")
+
+    @staticmethod
+    async def solve(problem: str):
+        loop = asyncio.get_running_loop()
+        try:
+            # Süre sınırı süreç içinde uygulanır; wait_for yalnızca yanıt vermeyen süreçlere karşı yedektir
+            result = await asyncio.wait_for(
+                loop.run_in_executor(MathTool.get_executor(), MathEngine.solve, problem, Config.MATH_TOOL_TIMEOUT),
+                timeout=Config.MATH_TOOL_TIMEOUT + 2)
+        except asyncio.TimeoutError:
+            logging.error(f"Math tool did not respond in time: {problem}")
+            MathTool._reset(terminate=True)
+            return None
+        except BrokenProcessPool as e:
+            logging.error(f"Math process pool is broken, recreating it: {e}")
+            MathTool._reset()
+            return None
+
+        if not result["ok"]:
+            logging.info(f"Math tool could not solve '{problem}': {result['error']}")
+            return None
+        return result["result"]
+
+    @staticmethod
+    def _reset(terminate: bool = False):
+        """
+        Havuzu bırakır; sonraki çağrı yeni bir havuz açar. terminate=True ise havuzun süreçleri de
+        sonlandırılır: SIGALRM'in kesemediği bir işlemde takılan süreç, bırakılırsa CPU ve bellek
+        tüketmeye devam eder. Aynı havuzda çalışan diğer adımlar None döner ve LLM'e düşer.
+        """
+        executor, MathTool._executor = MathTool._executor, None
+        if executor is None:
+            return
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        if terminate:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
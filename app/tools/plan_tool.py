@@ -1,51 +1,115 @@
 ﻿# plan_tool.py
+import asyncio
 import json
 import logging
+import time
 from datetime import datetime, timezone
+from app.config.config import Config
+from app.models.prompt_model import PromptType
 from app.models.state_model import WorkflowState
+from app.services.stream_event_service import StreamEventService
 from app.utils.chat_history_optimizer import ChatHistoryOptimizer
 from app.utils.get_tokens_from_mesaages import GetMessageTokens
-from app.utils.promts import PLANNER_PROMPT
 
 
 class PlanTool:
-    def __init__(self, llm_service):
+    def __init__(self, llm_service, prompt_registry):
         self.llm_service = llm_service
+        self.prompt_registry = prompt_registry
         self.regex_pattern = r"#E\d+"
 
     async def run(self, state: WorkflowState):
         logging.info("PlanTool is running.")
 
         if state.messages is None:
-            messages = ""
+            messages = state.summary
         else:
-            messages = ChatHistoryOptimizer.format_chat_history(state.messages)
+            messages = ChatHistoryOptimizer.build_chat_history(state.messages,
+                                                               max_tokens=Config.PLANNER_HISTORY_MAX_TOKENS,
+                                                               summary=state.summary)
             logging.info("Chat history optimized.")
 
-        planner_prompt = PLANNER_PROMPT.format(task=state.task, chat_history=messages)
+        template = self.prompt_registry.get(PromptType.PLANNER)
+        planner_prompt = template.format(task=state.task, chat_history=messages)
 
-        result = await self.llm_service.invoke(planner_prompt)
+        state.results = {}
+        if Config.STREAMING_PLANNER:
+            # Planner arka planda stream edilir; tamamlanan her adım satırı tool düğümüne hemen iletilir
+            state.plan_stream = asyncio.Queue()
+            state.plan_task = asyncio.create_task(
+                self._stream_plan(state, planner_prompt, template.version, state.plan_stream))
+            return state
+
+        model_name = self.llm_service.model_for(self.llm_service.PLANNER)
+        started = time.perf_counter()
+        result = await self.llm_service.invoke(planner_prompt, prompt_version=template.version,
+                                               stage=self.llm_service.PLANNER)
+        PlanTool.apply_plan(state, (result, model_name, (time.perf_counter() - started) * 1000))
+        # Yalnızca LLM adımlarından oluşan plan: araç adımları atlanır, soru doğrudan solver'a gider
+        state.fast_path = Config.FAST_PATH_ENABLED and PlanTool.is_llm_only(state.steps)
 
-        prompt_tokens, completion_tokens = GetMessageTokens.get_tokens_from_messages(message=result)
+        StreamEventService.emit(state, StreamEventService.PLAN,
+                                {"plan": state.plan_string,
+                                 "steps": [{"step": name, "tool": tool} for name, tool, _ in state.steps]})
+        return state
+
+    @staticmethod
+    def apply_plan(state: WorkflowState, plan):
+        """
+        Planner cevabını state'e yazar: plan metni, adımlar ve token kullanımı.
+        plan, (planner mesajı, model adı, gecikme ms) üçlüsüdür.
+        """
+        result, model_name, latency_ms = plan
+        GetMessageTokens.record_usage(state, result, model_name, latency_ms)
 
         # Yanıtı doğrudan state'e ekle
         state.plan_string = result.content
-        state.prompt_tokens += prompt_tokens
-        state.completion_tokens += completion_tokens
-        state.results = {}
         # `plan_string` içindeki adımları `steps` formatında ayrıştırma
         state.steps = PlanTool._parse_steps_from_plan(state.plan_string)
 
         logging.info("Plan content added to state.")
         logging.info("PlanTool steps: %s", state.steps)
 
-        return state
+    async def _stream_plan(self, state: WorkflowState, planner_prompt, prompt_version, step_queue: asyncio.Queue):
+        """
+        Planner cevabını stream eder ve `#E` satırları tamamlandıkça adımları kuyruğa koyar.
+        (planner mesajı, model adı, gecikme ms) döndürür; kuyruk her durumda None ile kapatılır.
+        """
+        try:
+            model_name = self.llm_service.model_for(self.llm_service.PLANNER)
+            started = time.perf_counter()
+            result = None
+            buffer = ""
+            async for chunk in self.llm_service.stream(planner_prompt, prompt_version=prompt_version,
+                                                       stage=self.llm_service.PLANNER):
+                result = chunk if result is None else result + chunk
+                buffer += chunk.content or ""
+                while "\n" in buffer:
+                    line, buffer = buffer.split("\n", 1)
+                    for step in PlanTool._parse_steps_from_plan(line):
+                        step_queue.put_nowait(step)
+            for step in PlanTool._parse_steps_from_plan(buffer):
+                step_queue.put_nowait(step)
+
+            StreamEventService.emit(state, StreamEventService.PLAN,
+                                    {"plan": result.content,
+                                     "steps": [{"step": name, "tool": tool}
+                                               for name, tool, _ in PlanTool._parse_steps_from_plan(result.content)]})
+            return result, model_name, (time.perf_counter() - started) * 1000
+        finally:
+            step_queue.put_nowait(None)
+
+    @staticmethod
+    def is_llm_only(steps) -> bool:
+        """Plan yalnızca LLM[...] adımlarından oluşuyorsa, solver aynı cevabı tek çağrıda üretebilir."""
+        return bool(steps) and all(tool == "LLM" for _, tool, _ in steps)
 
     @staticmethod
     def _parse_steps_from_plan(plan_string):
         """plan_string'den `steps` yapısını oluşturur."""
         steps = []
         for line in plan_string.splitlines():
+            line = line.strip()
             if line.startswith("#E"):
                 # Her adımı `(name, tool, input)` formatında ayrıştırıyoruz
                 step_id, content = line.split("=", 1)
@@ -1,16 +1,19 @@
 ﻿import json
 import logging
+import time
+from app.config.config import Config
+from app.models.prompt_model import PromptType
 from app.models.state_model import WorkflowState
+from app.services.stream_event_service import StreamEventService
 from app.utils.chat_history_optimizer import ChatHistoryOptimizer
+from app.utils.evidence_compressor import EvidenceCompressor
 from app.utils.get_tokens_from_mesaages import GetMessageTokens
-from app.utils.promts import SOLVE_PROMPT
 
 
 class SolveTool:
-    def __init__(self, llm_service):
+    def __init__(self, llm_service, prompt_registry):
         self.llm_service = llm_service
-
-        self.MAX_CHARACTERS = 3000
+        self.prompt_registry = prompt_registry
 
     async def run(self, state: WorkflowState):
         """
@@ -18,26 +21,30 @@ class SolveTool:
         """
         logging.info("SolveTool is running.")
 
-        for key, value in state.results.items():
-            result_value = value
-            state.final_plan += self._flat_and_clean(result_value) + "\n"
+        # Araç sonuçlarından soruyla en ilgili pasajları token bütçesine sığacak şekilde seç
+        state.final_plan = EvidenceCompressor.compress(results=state.results, query=state.task,
+                                                       max_tokens=Config.SOLVER_EVIDENCE_MAX_TOKENS)
 
         if state.messages is None:
-            messages = ""
+            messages = state.summary
         else:
-            messages = ChatHistoryOptimizer.format_chat_history(state.messages)
+            messages = ChatHistoryOptimizer.build_chat_history(state.messages,
+                                                               max_tokens=Config.SOLVER_HISTORY_MAX_TOKENS,
+                                                               summary=state.summary)
 
-        final_prompt = SOLVE_PROMPT.format(
-            task=state.task, plan=state.final_plan, chat_history=messages)
+        template = self.prompt_registry.get(PromptType.SOLVER)
+        final_prompt = template.format(task=state.task, plan=state.final_plan, chat_history=messages)
 
         # logging.info("Prompting solver with the following prompt:\n\n%s", final_prompt)
 
-        result = await self.llm_service.invoke_solve(final_prompt=final_prompt)
-
-        prompt_tokens, completion_tokens = GetMessageTokens.get_tokens_from_messages(message=result)
+        model_name = self.llm_service.model_for(self.llm_service.SOLVER)
+        started = time.perf_counter()
+        if StreamEventService.has_listeners(state):
+            result = await self._stream_solve(state, final_prompt, template.version)
+        else:
+            result = await self.llm_service.invoke_solve(final_prompt=final_prompt, prompt_version=template.version)
 
-        state.prompt_tokens += prompt_tokens
-        state.completion_tokens += completion_tokens
+        GetMessageTokens.record_usage(state, result, model_name, (time.perf_counter() - started) * 1000)
 
         # Sonucu kaydet
         state.final_result = result.content
@@ -47,48 +54,11 @@ class SolveTool:
 
         return state
 
-    def _flat_and_clean(self, data):
-        """
-        Verilen herhangi bir veri yapısını düz bir metne dönüştürür ve temizler.
-        Recursive olmayan bir yöntemle veriyi işler.
-
-        Args:
-            data (any): İşlenecek veri (list, dict, str veya başka bir veri yapısı).
-
-        Returns:
-            str: Temizlenmiş ve düzleştirilmiş metin.
-        """
-        flat_text = ""
-        stack = [data]  # Verileri işlemek için bir yığın kullanıyoruz
-
-        while stack:
-            current = stack.pop()
-            if isinstance(current, dict):
-                # Sözlük içeriğini stack'e ekle
-                stack.extend(current.values())
-            elif isinstance(current, list):
-                # Liste içeriğini stack'e ekle
-                stack.extend(current)
-            else:
-                # Düz metin ise temizleyip ekle
-                cleaned = SolveTool._clean_text(current)
-                if len(flat_text) + len(cleaned) <= self.MAX_CHARACTERS:
-                    flat_text += cleaned + " "
-                else:
-                    flat_text += cleaned[:self.MAX_CHARACTERS - len(flat_text)]
-                    break
-
-        return flat_text.strip()
-
-    @staticmethod
-    def _clean_text(text):
-        """
-        Metni temizler: Nokta, satır sonu ve çift boşlukları kaldırır.
-
-        Args:
-            text (str): Temizlenecek metin.
-
-        Returns:
-            str: Temizlenmiş metin.
-        """
-        return str(text).replace("...", "").replace("\n", "").replace("  ", " ").strip()
+    async def _stream_solve(self, state: WorkflowState, final_prompt, prompt_version):
+        """Cevabı stream eder, her token'ı dinleyicilere iletir ve birleştirilmiş mesajı döndürür."""
+        result = None
+        async for chunk in self.llm_service.stream_solve(final_prompt=final_prompt, prompt_version=prompt_version):
+            if chunk.content:
+                StreamEventService.emit(state, StreamEventService.TOKEN, {"content": chunk.content})
+            result = chunk if result is None else result + chunk
+        return result
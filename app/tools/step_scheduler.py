@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import re
+
+
+class StepScheduler:
+    """
+    Plan adımlarını #E referanslarından kurulan bağımlılık grafiğine (DAG) göre çalıştırır.
+    Bağımlılıkları tamamlanan adımlar, eşzamanlılık sınırı altında paralel yürütülür.
+    """
+    REFERENCE_PATTERN = r"#(E\d+)"
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, int(max_concurrency))
+
+    async def run(self, steps, completed_steps: set, execute_step):
+        """
+        Tamamlanmamış adımları bağımlılık sırasına göre çalıştırır.
+
+        Args:
+            steps (list): `(name, tool, input)` formatındaki plan adımları.
+            completed_steps (set): Tamamlanan adımlar; başarılı her adım buraya eklenir.
+            execute_step (callable): `(name, tool, input)` alıp coroutine döndüren fonksiyon.
+                Hata fırlatan adım tamamlanmış sayılmaz ve ona bağlı adımlar bu turda çalıştırılmaz.
+        """
+        return await self.run_stream(StepScheduler._iterate(steps), completed_steps, execute_step)
+
+    async def run_stream(self, step_source, completed_steps: set, execute_step):
+        """
+        Adımları bir async iterator'dan (ör. stream edilen planner çıktısından) geldikçe alır ve
+        referans verdiği adımlar tamamlanan her adımı plan bitmeden çalıştırmaya başlar.
+        Kaynak kapandığında planda olmayan adımlara verilen referanslar yok sayılır (run ile aynı davranış).
+        """
+        source = step_source.__aiter__()
+        next_step = None
+        source_open = True
+        pending = {}
+        dependencies = {}
+        known_steps = set()
+        running = {}
+        failed = set()
+
+        try:
+            while True:
+                if source_open and next_step is None:
+                    next_step = asyncio.ensure_future(source.__anext__())
+
+                for step_name in list(pending):
+                    if len(running) >= self.max_concurrency:
+                        break
+                    step_dependencies = dependencies[step_name]
+                    if step_dependencies & failed:
+                        logging.warning(f"Skipping step {step_name}: a step it depends on failed.")
+                        failed.add(step_name)
+                        del pending[step_name]
+                    elif step_dependencies <= completed_steps:
+                        running[asyncio.create_task(execute_step(*pending.pop(step_name)))] = step_name
+
+                if not running and not source_open:
+                    if not pending:
+                        break
+                    # Döngüsel ya da ileriye dönük referans: sıradaki adımı eksik referanslarla çalıştır
+                    step_name = next(iter(pending))
+                    logging.warning(f"Unresolvable references for step {step_name}, executing it anyway.")
+                    running[asyncio.create_task(execute_step(*pending.pop(step_name)))] = step_name
+
+                waiting = set(running)
+                if source_open:
+                    waiting.add(next_step)
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+                if next_step in done:
+                    try:
+                        step = next_step.result()
+                    except StopAsyncIteration:
+                        source_open = False
+                        for step_name in pending:
+                            dependencies[step_name] &= known_steps
+                    else:
+                        StepScheduler._add_step(step, pending, dependencies, known_steps, completed_steps)
+                    next_step = None
+
+                for task in done:
+                    step_name = running.pop(task, None)
+                    if step_name is None:
+                        continue
+                    if task.exception() is not None:
+                        logging.error(f"Error in step {step_name}: {str(task.exception())}")
+                        failed.add(step_name)
+                    else:
+                        completed_steps.add(step_name)
+        finally:
+            if next_step is not None and not next_step.done():
+                next_step.cancel()
+            for task in running:
+                task.cancel()
+
+        return completed_steps
+
+    @staticmethod
+    def _add_step(step, pending, dependencies, known_steps, completed_steps):
+        step_name, _, tool_input = step
+        if step_name in known_steps:
+            logging.warning(f"Duplicate step name in plan, ignoring: {step_name}")
+            return
+        known_steps.add(step_name)
+        if step_name in completed_steps:
+            return
+        references = set(re.findall(StepScheduler.REFERENCE_PATTERN, str(tool_input)))
+        references.discard(step_name)
+        # Henüz gelmemiş adımlara verilen referanslar da beklenir; kaynak kapanınca bilinmeyenler atılır
+        dependencies[step_name] = references
+        pending[step_name] = step
+
+    @staticmethod
+    async def _iterate(steps):
+        for step in steps:
+            yield step
@@ -1,59 +1,118 @@
-﻿import logging
+﻿import asyncio
+import hashlib
+import logging
 import re
-from asyncio import sleep
+import time
+import unicodedata
 from urllib.parse import urlparse
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
 from app.config.config import Config
 from app.models.state_model import WorkflowState
+from app.services.search_quota_service import SearchQuotaService
+from app.services.stream_event_service import StreamEventService
 from app.services.user_notification_service import UserNotificationService
+from app.tools.math_tool import MathTool
+from app.tools.plan_tool import PlanTool
+from app.tools.step_scheduler import StepScheduler
 from app.utils.get_tokens_from_mesaages import GetMessageTokens
+from app.utils.html_extractor import HtmlExtractor
+from app.utils.http_client_manager import HttpClientManager
+from app.utils.metrics import Metrics
+from app.utils.promts import MATH_FALLBACK_PROMPT
+from app.utils.tiered_cache import TieredCache
 
 
 class ToolExecution:
+    TOOLS = ("web_search", "parser", "LLM", "math")
+
     def __init__(self, llm_service):
         self.llm_service = llm_service
-        self.PROMPT_TOKENS = 0
-        self.COMPLETION_TOKENS = 0
+        self.step_scheduler = StepScheduler(max_concurrency=Config.TOOL_MAX_CONCURRENCY)
+        self.search_cache = TieredCache(namespace="search",
+                                        max_entries=Config.SEARCH_CACHE_MAX_ENTRIES,
+                                        ttl_seconds=Config.SEARCH_CACHE_TTL_SECONDS,
+                                        redis_max_entries=Config.SEARCH_CACHE_REDIS_MAX_ENTRIES)
+        self.page_cache = TieredCache(namespace="page",
+                                      max_entries=Config.PAGE_CACHE_MAX_ENTRIES,
+                                      ttl_seconds=Config.PAGE_CACHE_TTL_SECONDS,
+                                      redis_max_entries=Config.PAGE_CACHE_REDIS_MAX_ENTRIES)
 
     async def run(self, state: WorkflowState):
         logging.info("ToolExecution started.")
 
-        for step_name, tool, tool_input in state.steps:
-            if step_name not in state.completed_steps:
-                try:
-                    logging.info(f"Executing step: {step_name} with tool: {tool}")
-                    results_temp = state.results
-
-                    if "#" in tool_input:
-                        tool_input = await self._resolve_references(tool_input=tool_input,
-                                                                    results=results_temp,
-                                                                    current_tool=tool)
-                    # Aracı çalıştır ve sonucu al
-                    # result = await self.execute_tool(tool, tool_input)
-                    state.results[step_name] = await self.execute_tool(tool, tool_input)
-                    state.completed_steps.add(step_name)
-
-                except Exception as e:
-                    logging.error(f"Error in ToolExecution: {str(e)}")
-                    break
-
-        state.prompt_tokens += self.PROMPT_TOKENS
-        state.completion_tokens += self.COMPLETION_TOKENS
+        def execute_step(step_name, tool, tool_input):
+            return self._execute_step(state, step_name, tool, tool_input)
+
+        if state.plan_task is not None:
+            # Stream planner: adımlar planner cevabı tamamlanmadan, geldikçe çalıştırılır
+            try:
+                await self.step_scheduler.run_stream(ToolExecution._plan_steps(state),
+                                                     completed_steps=state.completed_steps,
+                                                     execute_step=execute_step)
+                PlanTool.apply_plan(state, await state.plan_task)
+            finally:
+                if not state.plan_task.done():
+                    state.plan_task.cancel()
+                state.plan_task = None
+                state.plan_stream = None
+        else:
+            await self.step_scheduler.run(steps=state.steps,
+                                          completed_steps=state.completed_steps,
+                                          execute_step=execute_step)
 
         logging.info("ToolExecution finished.")
         return state
 
-    async def execute_tool(self, tool, tool_input):
-        """Verilen aracı ve girişi çalıştırır ve sonucu döndürür."""
+    @staticmethod
+    async def _plan_steps(state: WorkflowState):
+        """
+        Stream edilen plan adımlarını döndürür. LLM adımları plan tamamlanana kadar bekletilir:
+        plan yalnızca LLM adımlarından oluşuyorsa hiç çalıştırılmaz ve soru doğrudan solver'a gider.
+        """
+        deferred = []
+        received = 0
+        while (step := await state.plan_stream.get()) is not None:
+            received += 1
+            if Config.FAST_PATH_ENABLED and step[1] == "LLM":
+                deferred.append(step)
+            else:
+                yield step
+
+        if deferred and len(deferred) == received:
+            state.fast_path = True
+            return
+        for step in deferred:
+            yield step
+
+    async def _execute_step(self, state: WorkflowState, step_name, tool, tool_input):
+        """Tek bir plan adımını çalıştırır ve sonucunu state.results içine yazar."""
+        logging.info(f"Executing step: {step_name} with tool: {tool}")
+        StreamEventService.emit(state, StreamEventService.TOOL_START, {"step": step_name, "tool": tool})
+
+        if "#" in tool_input:
+            tool_input = await self._resolve_references(tool_input=tool_input,
+                                                        results=state.results,
+                                                        current_tool=tool)
+        # Aracı çalıştır ve sonucu al
+        state.results[step_name] = await self.execute_tool(tool, tool_input, state)
+        StreamEventService.emit(state, StreamEventService.TOOL_END, {"step": step_name, "tool": tool})
+
+    async def execute_tool(self, tool, tool_input, state: WorkflowState):
+        """
+        Verilen aracı ve girişi çalıştırır ve sonucu döndürür.
+        Token kullanımı doğrudan isteğe ait state'e yazılır; ToolExecution örneği
+        eşzamanlı istekler arasında paylaşıldığından örnek üzerinde sayaç tutulmaz.
+        """
+        tool_label = tool if tool in ToolExecution.TOOLS else "unknown"
+        started = time.perf_counter()
         try:
             if tool == "web_search":
                 logging.info(f"Executing web_search tool")
                 if tool_input is None:
                     logging.warning("Web search tool input is empty.")
                     return {"link": "", "snippet": "Web search input is empty."}
-                return await self._web_search(tool_input)
+                return await self._web_search(tool_input, state)
 
             elif tool == "parser":
                 logging.info(f"Executing parser tool")
@@ -63,12 +122,8 @@ class ToolExecution:
                     return {"title": "No input", "content": "Parser tool input is empty."}
 
                 if isinstance(tool_input, list):
-                    # Eğer tool_input bir listeyse, her URL'yi ayrı ayrı işlemeye başlıyoruz
-                    parsed_results = []
-                    for url in tool_input:
-                        # parsed_result = await self._parser(url)  # Her URL için parser fonksiyonunu çağır
-                        parsed_results.append(await self._parser(url))
-                    return parsed_results  # Tüm sonuçları liste olarak döndür
+                    # Eğer tool_input bir listeyse, her URL'yi eşzamanlı olarak işliyoruz
+                    return list(await asyncio.gather(*(self._parser(url) for url in tool_input)))
                 else:
                     return await self._parser(tool_input)  # Tek bir URL varsa doğrudan işle
 
@@ -79,25 +134,40 @@ class ToolExecution:
                     logging.warning("LLM tool input is empty.")
                     return "LLM tool input is empty."
 
-                result = await self.llm_service.invoke(prompt=tool_input)
+                return await self._invoke_llm(state, tool_input)
 
-                prompt_tokens, completion_tokens = GetMessageTokens.get_tokens_from_messages(message=result)
-                self._update_tokens(prompt_tokens, completion_tokens)
+            elif tool == "math":
+                logging.info(f"Executing math tool")
 
-                return result.content
+                if not tool_input:
+                    logging.warning("Math tool input is empty.")
+                    return "Math tool input is empty."
+
+                result = await MathTool.solve(tool_input)
+                if result is not None:
+                    return result
+
+                # Yerel olarak çözülemeyen problemler LLM'e bırakılır
+                return await self._invoke_llm(state, MATH_FALLBACK_PROMPT.format(problem=tool_input))
 
             else:
                 logging.warning(f"Unknown tool: {tool}")
                 return f"Unknown tool: {tool}"
 
         except Exception as e:
+            Metrics.TOOL_ERRORS.inc(tool=tool_label)
             logging.error(f"Error in execute_tool: {str(e)}")
             return f"Error occurred during tool execution: {str(e)}"
+        finally:
+            Metrics.TOOL_DURATION.observe(time.perf_counter() - started, tool=tool_label)
 
-    def _update_tokens(self, prompt_tokens, completion_tokens):
-        """Token bilgilerini günceller."""
-        self.PROMPT_TOKENS += prompt_tokens
-        self.COMPLETION_TOKENS += completion_tokens
+    async def _invoke_llm(self, state: WorkflowState, prompt: str):
+        """Ara LLM adımlarını tool aşamasının modeliyle çalıştırır ve kullanımı state'e ekler."""
+        model_name = self.llm_service.model_for(self.llm_service.TOOL)
+        started = time.perf_counter()
+        result = await self.llm_service.invoke(prompt=prompt, prompt_version="tool", stage=self.llm_service.TOOL)
+        GetMessageTokens.record_usage(state, result, model_name, (time.perf_counter() - started) * 1000)
+        return result.content
 
     @staticmethod
     async def _resolve_references(tool_input, results, current_tool):
@@ -123,14 +193,20 @@ class ToolExecution:
                 if ref in results:
                     referenced_data = results[ref]
 
+                    # Parser tek URL için sözlük döndürür; liste sonuçlarıyla aynı şekilde işlenir
+                    if isinstance(referenced_data, dict):
+                        referenced_data = [referenced_data]
+
                     # Eğer önceki adımın sonucu bir liste ise (web_search gibi)
                     if isinstance(referenced_data, list):
                         if current_tool == "LLM":
-                            # LLM aracı için snippet alanlarını al
-                            resolved_data.extend(item['snippet'] for item in referenced_data)
+                            # LLM aracı için snippet alanlarını (parser sonuçlarında content) al
+                            resolved_data.extend(item.get('snippet') or item.get('content') or ""
+                                                 for item in referenced_data)
                         elif current_tool == "parser":
                             # Parser aracı için link alanlarını al
-                            resolved_data.extend(item['link'] for item in referenced_data)
+                            resolved_data.extend(item.get('link') or item.get('url')
+                                                 for item in referenced_data if item.get('link') or item.get('url'))
                     elif isinstance(referenced_data, str):
                         resolved_data.append(referenced_data)
 
@@ -148,52 +224,77 @@ class ToolExecution:
             # tool_input düz metin ise, olduğu gibi döndür
             return tool_input
 
-    @staticmethod
-    async def _web_search(query):
+    async def _web_search(self, query, state: WorkflowState):
         try:
             google_api_key = Config.GOOGLE_API_KEY
             search_engine_id = Config.SEARCH_ENGINE_ID
             if not google_api_key or not search_engine_id:
                 raise ValueError("Google API key and Search Engine ID must be set.")
-            search_url = f"https://www.googleapis.com/customsearch/v1?q={query}&key={google_api_key}&cx={search_engine_id}"
-            response = requests.get(search_url)
+
+            # Aynı (normalize edilmiş) sorgu önbellekteyse API'ye gidilmez ve kotadan düşülmez
+            cache_key = ToolExecution._search_cache_key(query)
+            results = await self.search_cache.get(cache_key)
+            if results is not None:
+                logging.info(f"Web search served from cache: {query}")
+                await UserNotificationService.notify_user(results=results,
+                                                          session_id=state.session_id,
+                                                          user_id=StreamEventService.notification_user(state))
+                return results
+
+            if not await SearchQuotaService.get_instance().acquire(state.session_id, state.question_number):
+                return [{"link": "", "snippet": "Web search limit reached for this conversation. "
+                                                "Answer using the chat history and your own knowledge."}]
+
+            search_url = "https://www.googleapis.com/customsearch/v1"
+            response = await HttpClientManager.get(search_url, params={"q": query,
+                                                                       "key": google_api_key,
+                                                                       "cx": search_engine_id})
             if response.status_code == 200:
                 data = response.json()
                 results = [{"link": item.get("link"), "snippet": item.get("snippet")} for item in data.get("items", [])]
 
                 if results:
-                    await UserNotificationService.notify_user(results=results)
-                    await sleep(5)
+                    await self.search_cache.set(cache_key, results)
+                    await UserNotificationService.notify_user(results=results,
+                                                              session_id=state.session_id,
+                                                              user_id=StreamEventService.notification_user(state))
                 else:
                     logging.warning("There are no significant results to notify the users.")
 
                 return results
             else:
                 logging.error(f"Search API error: {response.status_code}")
+                Metrics.TOOL_ERRORS.inc(tool="web_search")
                 return [{"link": "", "snippet": f"Error: {response.status_code}"}]
         except Exception as e:
             logging.error(f"Web search failed: {e}")
+            Metrics.TOOL_ERRORS.inc(tool="web_search")
             return [{"link": "", "snippet": "Error occurred during web search."}]
 
     @staticmethod
-    async def _parser(input_data):
+    def _search_cache_key(query: str) -> str:
+        """Yalnızca boşluk, büyük/küçük harf ya da sondaki noktalama farklı olan sorgular aynı anahtarı alır."""
+        normalized = unicodedata.normalize("NFKC", str(query)).casefold()
+        normalized = re.sub(r"\s+", " ", normalized).strip().strip("\"'").rstrip("?.!")
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    async def _parser(self, input_data):
         """Verilen veri tipine göre uygun parser fonksiyonunu çağırır."""
         if isinstance(input_data, list):
 
-            return ToolExecution._parser_list(input_data)
+            return await self._parser_list(input_data)
         elif isinstance(input_data, str):
 
-            return ToolExecution._parser_url(input_data)
+            return await self._parser_url(input_data)
         elif isinstance(input_data, dict):
 
-            return ToolExecution._parser_url(input_data["link"])
+            return await self._parser_url(input_data["link"])
         else:
             logging.error("Input data is not in the expected format (list of dicts or str).")
             return "Input data must be a URL string or a list of dictionaries containing URLs."
 
-    @staticmethod
-    async def _parser_list(url_list):
-        """URL içeren dictionary listesini işler."""
+    async def _parser_list(self, url_list):
+        """URL içeren dictionary listesini işler. URL'ler eşzamanlı olarak indirilir."""
         parsed_results = []
         for item in url_list:
             url = item['link']
@@ -206,21 +307,27 @@ class ToolExecution:
                 }
 
             if url:  # Eğer 'link' anahtarı varsa işle
-                parsed_results.append(ToolExecution._parser_url(url))
+                parsed_results.append(self._parser_url(url))
             else:
                 logging.warning("Item does not contain 'link' key.")
-                parsed_results.append({
-                    "url": None,
-                    "title": "No URL",
-                    "content": "Item does not contain a valid 'link' key."
-                })
-        return parsed_results
+                parsed_results.append(ToolExecution._missing_link_result())
+        return list(await asyncio.gather(*parsed_results))
 
     @staticmethod
-    async def _parser_url(url):
+    async def _missing_link_result():
+        return {
+            "url": None,
+            "title": "No URL",
+            "content": "Item does not contain a valid 'link' key."
+        }
+
+    async def _parser_url(self, url):
         """
         Tek bir URL'nin geçerli olup olmadığını kontrol eder, içeriğini alır,
         başlık ve ilk birkaç paragrafı çıkarır.
+        Ayrıştırılmış sayfalar önbellekte tutulur. PAGE_CACHE_FRESH_SECONDS içinde ağa çıkılmaz;
+        sonrasında ETag/Last-Modified ile koşullu istek gönderilir, sayfa değişmemişse (304) önbellekteki
+        içerik kullanılır.
         """
         # URL doğrulama
         if not ToolExecution._is_valid_url(url):
@@ -231,58 +338,56 @@ class ToolExecution:
             }
 
         try:
-            # User-Agent başlığı ekleniyor
-            headers = {'User-Agent': Config.USER_AGENT}
-
-            # Zaman aşımı kontrolü ile isteği gönder
-            response = requests.get(url, headers=headers, timeout=10)
-
-            # HTTP durumu kontrol et
-            if response.status_code == 200:
-                # İçerik tipi kontrolü
-                content_type = response.headers.get('Content-Type', '')
-
-                if 'text/html' not in content_type:
-                    logging.warning(f"URL {url} returned non-HTML content: {content_type}")
+            cached = await self.page_cache.get(url)
+            if cached is not None and time.time() - cached["validated_at"] < Config.PAGE_CACHE_FRESH_SECONDS:
+                return {"url": url, "title": cached["title"], "content": cached["content"]}
+
+            # Paylaşılan bağlantı havuzu üzerinden isteği stream ederek gönder (zaman aşımları Config'den gelir)
+            async with HttpClientManager.stream(url, headers=ToolExecution._conditional_headers(cached)) as response:
+                if response.status_code == 304 and cached is not None:
+                    logging.info(f"Page not modified, using cached content: {url}")
+                    cached["validated_at"] = time.time()
+                    await self.page_cache.set(url, cached)
+                    return {"url": url, "title": cached["title"], "content": cached["content"]}
+
+                # HTTP durumu kontrol et
+                if response.status_code == 200:
+                    # İçerik tipi kontrolü
+                    content_type = response.headers.get('Content-Type', '')
+
+                    if 'text/html' not in content_type:
+                        logging.warning(f"URL {url} returned non-HTML content: {content_type}")
+                        return {
+                            "title": "Unsupported Content",
+                            "content": f"The content type '{content_type}' is not supported."
+                        }
+
+                    # HTML içeriği işleme
+                    page = await ToolExecution._extract_page(response)
+                    await self.page_cache.set(url, {**page,
+                                                    "etag": response.headers.get("ETag"),
+                                                    "last_modified": response.headers.get("Last-Modified"),
+                                                    "validated_at": time.time()})
+                    return {"url": url, **page}
+                else:
+                    logging.error(f"HTTP error for URL {url}: {response.status_code}")
+                    Metrics.TOOL_ERRORS.inc(tool="parser")
                     return {
-                        "title": "Unsupported Content",
-                        "content": f"The content type '{content_type}' is not supported."
+                        "title": "Error",
+                        "content": f"Error fetching URL content: HTTP {response.status_code}"
                     }
 
-                # HTML içeriği işleme
-                html_content = response.text
-                soup = BeautifulSoup(html_content, "html.parser")
-
-                # Sayfa başlığı
-                title = soup.title.string.strip() if soup.title else "No Title"
-
-                # İlk birkaç paragrafı al
-                paragraphs = soup.find_all("p")
-                if paragraphs:
-                    content = "\n".join([p.get_text(strip=True) for p in paragraphs[:5]])
-                else:
-                    content = "No content found in paragraphs."
-
-                return {
-                    "title": title,
-                    "content": content
-                }
-            else:
-                logging.error(f"HTTP error for URL {url}: {response.status_code}")
-                return {
-                    "title": "Error",
-                    "content": f"Error fetching URL content: HTTP {response.status_code}"
-                }
-
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             logging.error(f"Timeout occurred while trying to fetch {url}")
+            Metrics.TOOL_ERRORS.inc(tool="parser")
             return {
                 "title": "Timeout Error",
                 "content": "The request timed out while trying to fetch the URL."
             }
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logging.error(f"Request exception for URL {url}: {e}")
+            Metrics.TOOL_ERRORS.inc(tool="parser")
             return {
                 "title": "Request Error",
                 "content": f"An error occurred while making the request: {e}"
@@ -290,11 +395,36 @@ class ToolExecution:
 
         except Exception as e:
             logging.error(f"Parser failed for URL {url}: {e}")
+            Metrics.TOOL_ERRORS.inc(tool="parser")
             return {
                 "title": "Parsing Error",
                 "content": "An unexpected error occurred during parsing."
             }
 
+    @staticmethod
+    async def _extract_page(response: httpx.Response):
+        """
+        Yanıtı parça parça okuyup başlığı ve ilk birkaç paragrafı çıkarır. Sayfanın tamamı belleğe
+        alınmaz: yeterli metin toplandığında ya da PARSER_MAX_BYTES aşıldığında okuma durdurulur.
+        """
+        extractor = HtmlExtractor.create()
+        async for chunk in response.aiter_text():
+            extractor.feed(chunk)
+            if extractor.done or response.num_bytes_downloaded >= Config.PARSER_MAX_BYTES:
+                break
+        return extractor.result()
+
+    @staticmethod
+    def _conditional_headers(cached):
+        """Önbellekteki sayfanın doğrulayıcılarından koşullu istek başlıklarını oluşturur."""
+        headers = {}
+        if cached is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        return headers
+
     @staticmethod
     def _is_valid_url(url):
         """
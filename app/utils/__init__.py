@@ -1,4 +1,7 @@
 ﻿from app.utils.chat_history_optimizer import ChatHistoryOptimizer
 from app.utils.errors import PromptNotFoundError, BaseAppException
 from app.utils.get_tokens_from_mesaages import GetMessageTokens
+from app.utils.http_client_manager import HttpClientManager
+from app.utils.tiered_cache import TieredCache
+from app.utils.token_counter import TokenCounter
 from app.utils.web_socket_connection_manager import ConnectionManager
\ No newline at end of file
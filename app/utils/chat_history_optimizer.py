@@ -3,27 +3,27 @@ from typing import List
 
 from langchain_core.messages import BaseMessage
 
+from app.utils.token_counter import TokenCounter
+
 
 class ChatHistoryOptimizer:
 
     @staticmethod
-    def filter_chat_history(chat_hist_list: list[str, str], max_characters_per_message=None) -> str:
-        if max_characters_per_message is None:
-            filtered_chat_history = "\n".join(
-                f"\nHuman: {entry['question']['content']}\nAI: {entry['answer']['content']}"
-                for entry in chat_hist_list
-            )
-            logging.info("Filtering chat history.")
-            return filtered_chat_history
-
-        else:
-            filtered_chat_history = "\n".join(
-                f"\nHuman: {entry['question']['content']}\nAI: {entry['answer']['content'][:max_characters_per_message - len(entry['question']['content'])]}"
-                for entry in chat_hist_list
-                if len(entry['question']['content']) + len(entry['answer']['content']) <= max_characters_per_message
-            )
-        logging.info("Filtering chat history. Max characters per message: %s", max_characters_per_message)
-        return filtered_chat_history
+    def filter_chat_history(chat_hist_list: list[str, str], max_tokens_per_message=None) -> str:
+        """
+        Konuşmaları metne dönüştürür. max_tokens_per_message verilirse her konuşmanın cevabı,
+        soru ile birlikte bu token sınırına sığacak şekilde kısaltılır; konuşmalar atlanmaz.
+        """
+        entries = []
+        for entry in chat_hist_list:
+            question = entry['question']['content']
+            answer = entry['answer']['content']
+            if max_tokens_per_message is not None:
+                answer = TokenCounter.truncate(answer, max_tokens_per_message - TokenCounter.count(question))
+            entries.append(f"\nHuman: {question}\nAI: {answer}")
+
+        logging.info("Filtering chat history. Max tokens per message: %s", max_tokens_per_message)
+        return "\n".join(entries)
 
     # todo: request type must be BaseMessage model
     @staticmethod
@@ -47,8 +47,39 @@ class ChatHistoryOptimizer:
         """
         BaseMessage nesnelerinden oluşan bir listeyi string formatına dönüştürür.
         """
-        formatted_history = ""
-        for message in messages:
-            formatted_history += f"{message.role}: {message.content}\n"
-        return formatted_history.strip()
+        return "\n".join(f"{message.role}: {message.content}" for message in messages).strip()
+
+    @staticmethod
+    def build_chat_history(messages: List[BaseMessage], max_tokens: int, model_name: str = None,
+                           summary: str = "") -> str:
+        """
+        En yeni konuşmalardan başlayarak, verilen token bütçesine sığan konuşmaları
+        (soru + cevap) eskiden yeniye sıralı metin olarak döndürür.
+
+        Args:
+            messages (List[BaseMessage]): convert_chat_hist_to_messages çıktısı.
+            max_tokens (int): Geçmiş için ayrılan token bütçesi.
+            model_name (str): Token sayımı için kullanılacak model.
+            summary (str): Eski konuşmaların özeti; verilirse başa eklenir ve bütçeden düşülür.
+        """
+        summary_block = f"Summary of the earlier conversation:\n{summary}" if summary else ""
+        if not messages:
+            return summary_block
+
+        selected_lines = []
+        total_tokens = TokenCounter.count(summary_block, model_name)
+        # Mesajlar (human, ai) çiftleri halinde, sondan başa doğru işlenir
+        for end in range(len(messages), 0, -2):
+            turn = messages[max(end - 2, 0):end]
+            turn_lines = [f"{message.role}: {message.content}" for message in turn]
+            turn_tokens = sum(TokenCounter.count(line, model_name) for line in turn_lines)
+            if total_tokens + turn_tokens > max_tokens:
+                break
+            total_tokens += turn_tokens
+            selected_lines[:0] = turn_lines
+
+        if summary_block:
+            selected_lines.insert(0, summary_block)
+        logging.info("Chat history built with %s tokens (budget: %s).", total_tokens, max_tokens)
+        return "\n".join(selected_lines).strip()
 
@@ -0,0 +1,122 @@
+import math
+import re
+from collections import Counter, deque
+
+from app.utils.token_counter import TokenCounter
+
+
+class EvidenceCompressor:
+    """
+    Araç sonuçlarını (arama sonuçları, ayrıştırılmış sayfalar, LLM çıktıları) pasajlara böler,
+    pasajları soruya göre BM25 ile puanlar ve en ilgili olanları token bütçesine sığacak şekilde seçer.
+    Seçilen pasajlar orijinal sıralarıyla ve kaynak URL'leriyle birlikte solver'a verilir.
+    """
+    K1 = 1.5
+    B = 0.75
+    PASSAGE_WORDS = 80
+    TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+    @staticmethod
+    def compress(results: dict, query: str, max_tokens: int) -> str:
+        passages = EvidenceCompressor.split_passages(results)
+        if not passages:
+            return ""
+
+        scores = EvidenceCompressor.score(query, [text for text, _ in passages])
+        ranked = sorted(range(len(passages)), key=lambda index: (-scores[index], index))
+
+        selected = []
+        used_tokens = 0
+        for index in ranked:
+            line = EvidenceCompressor._format(*passages[index])
+            tokens = TokenCounter.count(line)
+            if used_tokens + tokens > max_tokens:
+                continue
+            selected.append(index)
+            used_tokens += tokens
+
+        return "\n".join(EvidenceCompressor._format(*passages[index]) for index in sorted(selected))
+
+    @staticmethod
+    def split_passages(results: dict):
+        """Sonuçları adım sırasıyla (source_url, metin) pasajlarına böler; tekrar eden pasajları atar."""
+        passages = []
+        seen = set()
+        for _, value in sorted(results.items(), key=lambda item: EvidenceCompressor._step_order(item[0])):
+            for text, source in EvidenceCompressor._documents(value):
+                for passage in EvidenceCompressor._windows(text):
+                    key = passage.casefold()
+                    if key not in seen:
+                        seen.add(key)
+                        passages.append((passage, source))
+        return passages
+
+    @staticmethod
+    def score(query: str, passages) -> list:
+        """Her pasaj için BM25 puanını hesaplar."""
+        query_terms = set(EvidenceCompressor._tokenize(query))
+        documents = [Counter(EvidenceCompressor._tokenize(passage)) for passage in passages]
+        if not query_terms or not documents:
+            return [0.0] * len(documents)
+
+        average_length = sum(sum(document.values()) for document in documents) / len(documents) or 1
+        document_frequency = Counter(term for document in documents for term in query_terms if term in document)
+
+        scores = []
+        for document in documents:
+            length = sum(document.values())
+            score = 0.0
+            for term in query_terms:
+                frequency = document.get(term, 0)
+                if not frequency:
+                    continue
+                idf = math.log(1 + (len(documents) - document_frequency[term] + 0.5) /
+                               (document_frequency[term] + 0.5))
+                score += idf * frequency * (EvidenceCompressor.K1 + 1) / (
+                        frequency + EvidenceCompressor.K1 *
+                        (1 - EvidenceCompressor.B + EvidenceCompressor.B * length / average_length))
+            scores.append(score)
+        return scores
+
+    @staticmethod
+    def _documents(value, source=None):
+        """Bir araç sonucundaki metinleri kaynak URL'leriyle birlikte döndürür."""
+        stack = deque([(value, source)])
+        while stack:
+            current, current_source = stack.popleft()
+            if isinstance(current, dict):
+                current_source = current.get("link") or current.get("url") or current_source
+                texts = [current.get(key) for key in ("title", "snippet", "content") if current.get(key)]
+                if texts:
+                    yield ". ".join(str(text) for text in texts), current_source
+                else:
+                    stack.extendleft(reversed([(item, current_source) for item in current.values()]))
+            elif isinstance(current, (list, tuple)):
+                stack.extendleft(reversed([(item, current_source) for item in current]))
+            elif current is not None:
+                text = str(getattr(current, "content", current))
+                if text.strip():
+                    yield text, current_source
+
+    @staticmethod
+    def _windows(text: str):
+        """Metni paragraf sınırlarına göre en fazla PASSAGE_WORDS kelimelik pasajlara böler."""
+        for paragraph in re.split(r"\n\s*\n|\n", text):
+            words = paragraph.replace("...", " ").split()
+            for start in range(0, len(words), EvidenceCompressor.PASSAGE_WORDS):
+                passage = " ".join(words[start:start + EvidenceCompressor.PASSAGE_WORDS])
+                if passage:
+                    yield passage
+
+    @staticmethod
+    def _tokenize(text: str):
+        return [token for token in EvidenceCompressor.TOKEN_PATTERN.findall(text.casefold()) if len(token) > 1]
+
+    @staticmethod
+    def _step_order(step_name: str):
+        digits = re.sub(r"\D", "", str(step_name))
+        return int(digits) if digits else 0
+
+    @staticmethod
+    def _format(passage: str, source):
+        return f"- {passage} (source: {source})" if source else f"- {passage}"
@@ -0,0 +1,34 @@
+import re
+
+
+class FastPathClassifier:
+    """
+    Planlamaya gerek olmayan mesajları (selamlaşma, teşekkür, vedalaşma ya da önceki cevaba dair kısa
+    takip istekleri) kurallarla tanır. Bu mesajlar plan ve araç adımları atlanarak doğrudan solver'a
+    gönderilir. Yanlış pozitif maliyeti yüksek olduğundan yalnızca açık kalıplar eşleşir. Tek başına
+    "evet", "hayır" ya da "tamam" eşleşmez: asistanın sorusuna ("X'i arayayım mı?") verilen cevap olabilir.
+    """
+    SMALL_TALK = re.compile(
+        r"^(?:hi|hello|hey|hoi|hallo|goedemorgen|goedemiddag|merhaba|selam|good (?:morning|afternoon|evening)|"
+        r"thanks?(?: you)?(?: (?:so|very) much)?|thx|bedankt|dank (?:je|u)(?: wel)?|teşekkürler|teşekkür ederim|"
+        r"sağ ?ol|great|cool|nice|perfect|super|bye|goodbye|doei|tot ziens|görüşürüz|"
+        r"got it|i see|understood)$",
+        re.IGNORECASE)
+    FOLLOW_UP = re.compile(
+        r"^(?:(?:can|could) you )?(?:please )?(?:explain|say|write|summari[sz]e|rephrase|simplify|shorten|repeat|"
+        r"translate)(?: (?:it|that|this|your (?:last )?answer))(?: (?:again|simpler|more simply|shorter|"
+        r"in simpler words|(?:to|into|in) \w+))?(?: please)?$|"
+        r"^(?:(?:can|could) you )?(?:please )?give (?:me )?(?:an(?:other)? )?example(?: please)?$|"
+        r"^(?:what do you mean|i don'?t understand|ik snap het niet|anlamadım)$",
+        re.IGNORECASE)
+
+    @staticmethod
+    def is_direct(task: str, has_history: bool) -> bool:
+        """Mesaj araç kullanmadan, yalnızca solver ile cevaplanabiliyorsa True döner."""
+        text = re.sub(r"[!?.,;:\s]+$", "", str(task or "")).strip()
+        text = re.sub(r"\s+", " ", text)
+        if not text:
+            return False
+        if FastPathClassifier.SMALL_TALK.match(text):
+            return True
+        return has_history and bool(FastPathClassifier.FOLLOW_UP.match(text))
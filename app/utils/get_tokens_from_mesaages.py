@@ -1,8 +1,39 @@
-﻿class GetMessageTokens:
+﻿from app.utils.metrics import Metrics
+
+
+class GetMessageTokens:
     @staticmethod
     def get_tokens_from_messages(message):
         token_usage = message.response_metadata.get('token_usage', {})
         completion_tokens = token_usage.get('completion_tokens', 0)
         prompt_tokens = token_usage.get('prompt_tokens', 0)
 
-        return completion_tokens, prompt_tokens
+        # Stream edilen cevaplarda kullanım bilgisi usage_metadata içinde gelir
+        usage_metadata = getattr(message, 'usage_metadata', None)
+        if not token_usage and usage_metadata:
+            completion_tokens = usage_metadata.get('output_tokens', 0)
+            prompt_tokens = usage_metadata.get('input_tokens', 0)
+
+        return prompt_tokens, completion_tokens
+
+    @staticmethod
+    def record_usage(state, message, model_name: str, latency_ms: float):
+        """
+        LLM çağrısının token kullanımını state toplamlarına, gecikme ve tokenları da
+        model bazında state.model_usage'a ekler.
+        """
+        prompt_tokens, completion_tokens = GetMessageTokens.get_tokens_from_messages(message)
+        state.prompt_tokens += prompt_tokens
+        state.completion_tokens += completion_tokens
+
+        usage = state.model_usage.setdefault(str(model_name), {"calls": 0, "prompt_tokens": 0,
+                                                               "completion_tokens": 0, "latency_ms": 0.0})
+        usage["calls"] += 1
+        usage["prompt_tokens"] += prompt_tokens
+        usage["completion_tokens"] += completion_tokens
+        usage["latency_ms"] = round(usage["latency_ms"] + latency_ms, 1)
+
+        Metrics.LLM_DURATION.observe(latency_ms / 1000, model=model_name)
+        Metrics.LLM_TOKENS.observe(prompt_tokens, model=model_name, kind="prompt")
+        Metrics.LLM_TOKENS.observe(completion_tokens, model=model_name, kind="completion")
+        return prompt_tokens, completion_tokens
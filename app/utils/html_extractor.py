@@ -0,0 +1,174 @@
+import logging
+import re
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+
+from app.config.config import Config
+
+try:
+    from lxml import etree
+except ImportError:  # lxml opsiyoneldir; yoksa standart kütüphane ayrıştırıcısı kullanılır
+    etree = None
+
+
+class HtmlExtractor(ABC):
+    """
+    HTML'den sayfa başlığını ve ilk birkaç paragrafı çıkaran artımlı (streaming) ayrıştırıcı.
+    İçerik parça parça beslenir (feed); yeterli paragraf toplandığında `done` True olur ve
+    sayfanın geri kalanı indirilmez/ayrıştırılmaz. script, style, nav gibi gürültü etiketlerinin
+    içindeki metinler atlanır.
+    """
+    SKIP_TAGS = frozenset({"script", "style", "noscript", "nav", "header", "footer", "aside",
+                           "form", "svg", "template", "iframe", "button", "select"})
+
+    def __init__(self, max_paragraphs: int = None, max_chars: int = None):
+        self.max_paragraphs = max_paragraphs or Config.PARSER_MAX_PARAGRAPHS
+        self.max_chars = max_chars or Config.PARSER_MAX_CHARS
+        self.title = None
+        self.paragraphs = []
+        self._chars = 0
+
+    @staticmethod
+    def create(backend: str = None, **kwargs) -> "HtmlExtractor":
+        """Yapılandırılan ayrıştırıcıyı oluşturur: "lxml", "html.parser" ya da "auto" (lxml varsa lxml)."""
+        backend = (backend or Config.HTML_EXTRACTOR_BACKEND).lower()
+        if backend in ("lxml", "auto") and etree is not None:
+            return LxmlHtmlExtractor(**kwargs)
+        if backend == "lxml":
+            logging.warning("lxml is not installed, falling back to html.parser extractor.")
+        return StdlibHtmlExtractor(**kwargs)
+
+    @staticmethod
+    def extract(html: str, backend: str = None, **kwargs) -> dict:
+        """Tam bir HTML metninden başlık ve içeriği çıkarır."""
+        extractor = HtmlExtractor.create(backend, **kwargs)
+        extractor.feed(html)
+        return extractor.result()
+
+    @property
+    def done(self) -> bool:
+        return len(self.paragraphs) >= self.max_paragraphs or self._chars >= self.max_chars
+
+    @abstractmethod
+    def feed(self, chunk: str):
+        """Sıradaki HTML parçasını ayrıştırır. `done` True olduktan sonra gelen parçalar yok sayılır."""
+
+    def close(self):
+        pass
+
+    def result(self) -> dict:
+        self.close()
+        return {
+            "title": self.title or "No Title",
+            "content": "\n".join(self.paragraphs) if self.paragraphs else "No content found in paragraphs."
+        }
+
+    def _add_title(self, text: str):
+        if self.title is None:
+            text = HtmlExtractor._normalize(text)
+            if text:
+                self.title = text
+
+    def _add_paragraph(self, text: str):
+        text = HtmlExtractor._normalize(text)
+        if not text or self.done:
+            return
+        text = text[:self.max_chars - self._chars]
+        self.paragraphs.append(text)
+        self._chars += len(text)
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return re.sub(r"\s+", " ", text).strip()
+
+
+class StdlibHtmlExtractor(HtmlExtractor, HTMLParser):
+    """Standart kütüphanedeki HTMLParser ile çalışan, ek bağımlılık gerektirmeyen ayrıştırıcı."""
+    # Açık bir <p> etiketini örtük olarak kapatan blok etiketleri
+    BLOCK_TAGS = frozenset({"p", "div", "section", "article", "table", "ul", "ol", "h1", "h2", "h3",
+                            "h4", "h5", "h6", "pre", "blockquote", "hr", "main", "body"})
+
+    def __init__(self, **kwargs):
+        HtmlExtractor.__init__(self, **kwargs)
+        HTMLParser.__init__(self, convert_charrefs=True)
+        self._skip_depth = 0
+        self._in_title = False
+        self._title_parts = []
+        self._paragraph = None
+
+    def feed(self, chunk: str):
+        if not self.done:
+            HTMLParser.feed(self, chunk)
+
+    def close(self):
+        if not self.done:
+            try:
+                HTMLParser.close(self)
+            except Exception as e:
+                logging.debug(f"HTML parser could not be closed cleanly: {e}")
+        self._end_paragraph()
+
+    def handle_starttag(self, tag, attrs):
+        if tag in HtmlExtractor.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in StdlibHtmlExtractor.BLOCK_TAGS:
+            self._end_paragraph()
+            if tag == "p" and self._skip_depth == 0:
+                self._paragraph = []
+
+    def handle_endtag(self, tag):
+        if tag in HtmlExtractor.SKIP_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag == "title":
+            self._in_title = False
+            self._add_title("".join(self._title_parts))
+        elif tag in StdlibHtmlExtractor.BLOCK_TAGS:
+            self._end_paragraph()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_parts.append(data)
+        elif self._paragraph is not None and self._skip_depth == 0:
+            self._paragraph.append(data)
+
+    def _end_paragraph(self):
+        if self._paragraph is not None:
+            self._add_paragraph("".join(self._paragraph))
+            self._paragraph = None
+
+
+class LxmlHtmlExtractor(HtmlExtractor):
+    """lxml'in artımlı HTMLPullParser'ı ile çalışan hızlı ayrıştırıcı. İşlenen elemanlar bellekten silinir."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._parser = etree.HTMLPullParser(events=("end",), no_network=True, recover=True)
+        self._skip_tags = HtmlExtractor.SKIP_TAGS
+
+    def feed(self, chunk: str):
+        if self.done:
+            return
+        self._parser.feed(chunk)
+        self._read_events()
+
+    def close(self):
+        if not self.done:
+            try:
+                self._parser.close()
+            except etree.LxmlError as e:
+                logging.debug(f"HTML parser could not be closed cleanly: {e}")
+            self._read_events()
+
+    def _read_events(self):
+        for _, element in self._parser.read_events():
+            tag = element.tag if isinstance(element.tag, str) else ""
+            if tag == "title":
+                self._add_title("".join(element.itertext()))
+            elif tag == "p" and not any(parent.tag in self._skip_tags for parent in element.iterancestors()):
+                self._add_paragraph("".join(element.itertext()))
+            if tag in ("p", "title") or tag in self._skip_tags:
+                element.clear(keep_tail=True)
+            if self.done:
+                return
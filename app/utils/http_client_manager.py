@@ -0,0 +1,81 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+import httpx
+
+from app.config.config import Config
+
+
+class HttpClientManager:
+    """
+    Araçların (web_search, parser) paylaştığı async HTTP istemcisi.
+    Keep-alive bağlantı havuzu uygulama ömrü boyunca tek bir istemcide tutulur,
+    her host için eşzamanlı bağlantı sayısı ayrıca sınırlandırılır.
+    """
+    _client = None
+    # Host -> [semafor, semaforu bekleyen/kullanan istek sayısı]; yalnızca kullanımdaki host'lar tutulur
+    _host_slots = {}
+
+    @staticmethod
+    def get_client() -> httpx.AsyncClient:
+        if HttpClientManager._client is None:
+            try:
+                logging.info("Initializing HTTP client...")
+                limits = httpx.Limits(max_connections=Config.HTTP_MAX_CONNECTIONS,
+                                      max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                                      keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY)
+                timeout = httpx.Timeout(connect=Config.HTTP_CONNECT_TIMEOUT,
+                                        read=Config.HTTP_READ_TIMEOUT,
+                                        write=Config.HTTP_READ_TIMEOUT,
+                                        pool=Config.HTTP_CONNECT_TIMEOUT)
+                headers = {"User-Agent": Config.USER_AGENT} if Config.USER_AGENT else None
+                HttpClientManager._client = httpx.AsyncClient(limits=limits, timeout=timeout,
+                                                              headers=headers, follow_redirects=True)
+            except Exception as e:
+                logging.error(f"Error initializing HTTP client: {e}")
+                raise
+        return HttpClientManager._client
+
+    @staticmethod
+    async def close():
+        """Bağlantı havuzunu kapatır. Uygulama kapanırken çağrılır."""
+        if HttpClientManager._client is not None:
+            await HttpClientManager._client.aclose()
+            HttpClientManager._client = None
+            HttpClientManager._host_slots = {}
+            logging.info("HTTP client closed.")
+
+    @staticmethod
+    @asynccontextmanager
+    async def host_slot(url: str):
+        """
+        Aynı host'a giden eşzamanlı istek sayısını HTTP_MAX_CONNECTIONS_PER_HOST ile sınırlar.
+        Host'un son isteği bittiğinde semaforu silinir; LLM'in seçtiği URL'ler kaydı büyütmez.
+        """
+        host = urlparse(url).netloc.lower()
+        slot = HttpClientManager._host_slots.get(host)
+        if slot is None:
+            slot = HttpClientManager._host_slots[host] = [asyncio.Semaphore(Config.HTTP_MAX_CONNECTIONS_PER_HOST), 0]
+        slot[1] += 1
+        try:
+            async with slot[0]:
+                yield
+        finally:
+            slot[1] -= 1
+            if slot[1] == 0 and HttpClientManager._host_slots.get(host) is slot:
+                del HttpClientManager._host_slots[host]
+
+    @staticmethod
+    async def get(url: str, **kwargs) -> httpx.Response:
+        async with HttpClientManager.host_slot(url):
+            return await HttpClientManager.get_client().get(url, **kwargs)
+
+    @staticmethod
+    @asynccontextmanager
+    async def stream(url: str, **kwargs):
+        """Yanıt gövdesini belleğe almadan, parça parça okumak için GET isteği açar."""
+        async with HttpClientManager.host_slot(url):
+            async with HttpClientManager.get_client().stream("GET", url, **kwargs) as response:
+                yield response
@@ -0,0 +1,329 @@
+import math
+import re
+import signal
+
+import sympy
+from sympy.parsing.sympy_parser import (convert_xor, implicit_multiplication, parse_expr,
+                                        standard_transformations)
+from sympy.physics import units
+
+
+class MathEngine:
+    """
+    math[...] plan adımlarını LLM'e gitmeden, sympy ile yerel olarak çözer:
+    sayısal/sembolik ifadeler, denklemler (ve denklem sistemleri) ve birim dönüşümleri.
+    Bu sınıf işlem havuzundaki (ProcessPoolExecutor) süreçlerde çalışır; uygulama yapılandırmasına
+    bağımlı değildir. Girdi LLM tarafından üretildiği için yalnızca izin verilen karakterler ve
+    isimlerle ayrıştırılır. Büyük sayı işlemleri (üs alma, faktöriyel) C seviyesinde çalıştığından
+    SIGALRM ile kesilemez; bu yüzden ifade hesaplanmadan önce üs, faktöriyel argümanı ve tahmini sonuç
+    basamak sayısı sınırlanır.
+    """
+    MAX_RESULT_CHARS = 2000
+    MAX_EXPONENT = 100_000
+    MAX_FACTORIAL_ARGUMENT = 10_000
+    MAX_RESULT_DIGITS = 10_000
+    TRANSFORMATIONS = standard_transformations + (implicit_multiplication, convert_xor)
+    ALLOWED_CHARACTERS = re.compile(r"^[\w+\-*/^().,=\s%!<>°]*$")
+    FORBIDDEN_PATTERN = re.compile(r"__|[A-Za-z_]\w*\s*\.\s*[A-Za-z_]|\b(?:lambda|import|exec|eval|open|getattr|"
+                                   r"setattr|globals|locals|vars|compile|input|print)\b")
+    PREFIX_PATTERN = re.compile(r"^(?:what\s+is|what's|calculate|compute|evaluate|simplify|find|solve|"
+                                r"wat\s+is|bereken|hesapla)\s+", re.IGNORECASE)
+    CONVERSION_PATTERN = re.compile(r"^(?P<value>[-+\d.eE*/() ]*\d[-+\d.eE*/() ]*?)\s*(?P<source>[A-Za-z°][\w°/*^ ]*?)"
+                                    r"\s+(?:to|in|into|as|naar|->)\s+(?P<target>[A-Za-z°][\w°/*^ ]*?)\s*$",
+                                    re.IGNORECASE)
+    # İfadelerde kullanılabilecek sympy isimleri
+    FUNCTIONS = ("sqrt", "cbrt", "root", "exp", "log", "ln", "sin", "cos", "tan", "cot", "sec", "csc", "asin",
+                 "acos", "atan", "atan2", "sinh", "cosh", "tanh", "pi", "E", "I", "oo", "factorial", "binomial",
+                 "gcd", "lcm", "Abs", "floor", "ceiling", "Rational", "Mod", "Min", "Max", "diff", "integrate",
+                 "limit", "expand", "factor", "simplify", "Sum", "Product", "isprime", "prime", "re", "im")
+    SYMBOLS = {
+        "×": "*", "·": "*", "÷": "/", "−": "-", "–": "-", "²": "**2", "³": "**3", "√": "sqrt", "π": "pi",
+    }
+    UNIT_ALIASES = {
+        "lbs": units.pound, "lb": units.pound, "oz": units.pound / 16, "ounce": units.pound / 16,
+        "ounces": units.pound / 16, "gallon": 3.785411784 * units.liter, "gallons": 3.785411784 * units.liter,
+        "mph": units.mile / units.hour, "kmh": units.kilometer / units.hour, "kph": units.kilometer / units.hour,
+        "sec": units.second, "secs": units.second, "min": units.minute, "mins": units.minute,
+        "hr": units.hour, "hrs": units.hour, "ml": units.milliliter, "tonne": 1000 * units.kilogram,
+        "tonnes": 1000 * units.kilogram,
+    }
+    TEMPERATURES = {
+        "c": "C", "°c": "C", "degc": "C", "celsius": "C",
+        "f": "F", "°f": "F", "degf": "F", "fahrenheit": "F",
+        "k": "K", "kelvin": "K",
+    }
+
+    @staticmethod
+    def solve(problem: str, timeout: float = None) -> dict:
+        """
+        Problemi çözer. {"ok": True, "result": "..."} ya da çözülemiyorsa {"ok": False, "error": "..."} döner.
+        timeout verilirse hesaplama süreç içinde SIGALRM ile kesilir.
+        """
+        use_alarm = bool(timeout) and hasattr(signal, "SIGALRM")
+        if use_alarm:
+            signal.signal(signal.SIGALRM, MathEngine._on_timeout)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            result = MathEngine._solve(problem)
+            return {"ok": True, "result": result[:MathEngine.MAX_RESULT_CHARS]}
+        except TimeoutError:
+            return {"ok": False, "error": "Math evaluation timed out."}
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+
+    @staticmethod
+    def _on_timeout(signum, frame):
+        raise TimeoutError()
+
+    @staticmethod
+    def _solve(problem: str) -> str:
+        text = MathEngine._prepare(problem)
+        # "problem, context": bağlam kısmı ayrıştırılamazsa yalnızca problem kısmı denenir
+        parts = MathEngine._split_top_level(text)
+        candidates = [text] + [", ".join(parts[:count]) for count in range(len(parts) - 1, 0, -1)]
+
+        last_error = None
+        for candidate in candidates:
+            try:
+                return MathEngine._solve_candidate(candidate)
+            except (ValueError, TypeError, SyntaxError, sympy.SympifyError, NotImplementedError) as e:
+                last_error = e
+        raise ValueError(f"Could not parse math problem: {last_error}")
+
+    @staticmethod
+    def _solve_candidate(text: str) -> str:
+        conversion = MathEngine.CONVERSION_PATTERN.match(text)
+        if conversion:
+            return MathEngine._convert(conversion.group("value"), conversion.group("source"),
+                                       conversion.group("target"))
+
+        text, variable = MathEngine._split_target_variable(text)
+        parts = MathEngine._split_top_level(text)
+        if all(MathEngine._is_equation(part) for part in parts):
+            return MathEngine._solve_equations(parts, variable)
+        if len(parts) > 1 and not MathEngine._is_call(text):
+            raise ValueError("Unexpected comma in expression")
+
+        expression = MathEngine._parse(text)
+        if isinstance(expression, sympy.logic.boolalg.Boolean):
+            return f"Result: {expression}"
+        if expression.free_symbols:
+            return f"Simplified: {sympy.simplify(expression)}"
+        return MathEngine._format_number(expression)
+
+    @staticmethod
+    def _prepare(problem: str) -> str:
+        text = str(problem).strip().strip("\"'").strip()
+        for symbol, replacement in MathEngine.SYMBOLS.items():
+            text = text.replace(symbol, replacement)
+        text = MathEngine.PREFIX_PATTERN.sub("", text).rstrip("?").strip()
+        text = re.sub(r"(\d+(?:\.\d+)?)\s*%\s*of\s+", r"(\1/100)*", text, flags=re.IGNORECASE)
+        text = re.sub(r"(\d+(?:\.\d+)?)\s*%", r"(\1/100)", text)
+        if not MathEngine.ALLOWED_CHARACTERS.match(text) or MathEngine.FORBIDDEN_PATTERN.search(text):
+            raise ValueError("Unsupported characters in math problem")
+        # Python'da == ve != ifadeleri yapısal karşılaştırmadır (x**2 == 4 -> False); == denklem olarak çözülür,
+        # != ise LLM'e bırakılır
+        if "!=" in text:
+            raise ValueError("Inequations (!=) are not supported")
+        return re.sub(r"(?<![<>=])==(?!=)", "=", text)
+
+    @staticmethod
+    def _parse(text: str):
+        # Önce hesaplanmadan ayrıştırılıp boyutu denetlenir (ör. 9^9^9^9 ya da (9^9)! reddedilir)
+        with sympy.evaluate(False):
+            unevaluated = parse_expr(text, local_dict={}, global_dict=MathEngine._namespace(unevaluated=True),
+                                     transformations=MathEngine.TRANSFORMATIONS, evaluate=False)
+        MathEngine._magnitude(unevaluated)
+
+        expression = parse_expr(text, local_dict={}, global_dict=MathEngine._namespace(),
+                                transformations=MathEngine.TRANSFORMATIONS, evaluate=True)
+        if not isinstance(expression, sympy.Basic):
+            expression = sympy.sympify(expression)
+        # Çok harfli serbest semboller genellikle matematik dışı metindir (ör. "of", "area")
+        if any(len(symbol.name) > 1 for symbol in expression.free_symbols):
+            raise ValueError(f"Unknown names in expression: {sorted(s.name for s in expression.free_symbols)}")
+        return expression
+
+    @staticmethod
+    def _magnitude(expression) -> float:
+        """
+        Hesaplanmamış ifadenin mutlak değerinin basamak sayısı (log10) için kaba bir üst sınır.
+        Üs, faktöriyel argümanı ya da sonuç sınırları aşılırsa ValueError verir.
+        """
+        if not isinstance(expression, sympy.Basic):
+            return 0.0
+        if expression.is_Rational:
+            return math.log10(max(abs(expression.p), expression.q, 1))
+        if expression.is_Float:
+            try:
+                return min(max(math.log10(abs(float(expression)) or 1), 0.0), 308.0)
+            except (OverflowError, ValueError):
+                return 308.0
+        if expression.is_Atom:
+            return 1.0
+
+        magnitudes = [MathEngine._magnitude(argument) for argument in expression.args]
+        if expression.is_Add:
+            return max(magnitudes) + math.log10(len(magnitudes))
+        if expression.is_Mul:
+            return sum(magnitudes)
+        if expression.is_Pow:
+            base, exponent = expression.args
+            if exponent.free_symbols:
+                return magnitudes[0]
+            value = MathEngine._bounded_value(exponent, magnitudes[1], MathEngine.MAX_EXPONENT, "Exponent")
+            digits = value * max(magnitudes[0], 1.0)
+            if digits > MathEngine.MAX_RESULT_DIGITS:
+                raise ValueError("Result is too large to compute")
+            return digits
+        if isinstance(expression, (sympy.factorial, sympy.binomial)):
+            argument = expression.args[0]
+            if argument.free_symbols:
+                return max(magnitudes)
+            value = MathEngine._bounded_value(argument, magnitudes[0], MathEngine.MAX_FACTORIAL_ARGUMENT,
+                                              "Factorial argument")
+            return value * math.log10(max(value, 10.0))
+        return max(magnitudes, default=1.0)
+
+    @staticmethod
+    def _bounded_value(expression, magnitude: float, limit: int, name: str) -> float:
+        """Sembolsüz bir alt ifadenin mutlak değerini sınırı aşmıyorsa döndürür, aşıyorsa ValueError verir."""
+        if magnitude > math.log10(limit) + 1:
+            raise ValueError(f"{name} is too large")
+        try:
+            value = abs(complex(sympy.N(expression)))
+        except (TypeError, ValueError):
+            value = 10 ** magnitude
+        if not value <= limit:
+            raise ValueError(f"{name} is too large")
+        return value
+
+    @staticmethod
+    def _solve_equations(equations, variable=None) -> str:
+        parsed = []
+        for equation in equations:
+            left, right = equation.split("=", 1)
+            parsed.append(sympy.Eq(MathEngine._parse(left), MathEngine._parse(right)))
+        symbols = set().union(*(equation.free_symbols for equation in parsed))
+        if variable is not None:
+            targets = [sympy.Symbol(variable)]
+        else:
+            targets = sorted(symbols, key=lambda symbol: symbol.name)
+        if not targets:
+            return f"Result: {all(bool(equation) for equation in parsed)}"
+
+        solutions = sympy.solve(parsed, targets, dict=True)
+        if not solutions:
+            return "No solution."
+        lines = []
+        for solution in solutions:
+            lines.append(", ".join(f"{symbol} = {MathEngine._exact_and_numeric(value)}"
+                                   for symbol, value in solution.items()))
+        return "Solutions: " + "; ".join(lines)
+
+    @staticmethod
+    def _convert(value: str, source: str, target: str) -> str:
+        amount = MathEngine._parse(value)
+        source_key, target_key = source.strip().lower(), target.strip().lower()
+        if source_key in MathEngine.TEMPERATURES and target_key in MathEngine.TEMPERATURES:
+            converted = MathEngine._convert_temperature(amount, MathEngine.TEMPERATURES[source_key],
+                                                        MathEngine.TEMPERATURES[target_key])
+            return f"{value.strip()} {source.strip()} = {MathEngine._exact_and_numeric(converted)} {target.strip()}"
+
+        source_unit, target_unit = MathEngine._parse_unit(source), MathEngine._parse_unit(target)
+        converted = units.convert_to(amount * source_unit, target_unit)
+        number = sympy.simplify(converted / target_unit)
+        if number.free_symbols or number.atoms(units.Quantity):
+            raise ValueError(f"Incompatible units: {source} and {target}")
+        return f"{value.strip()} {source.strip()} = {MathEngine._exact_and_numeric(number)} {target.strip()}"
+
+    @staticmethod
+    def _convert_temperature(amount, source: str, target: str):
+        kelvin = {"C": amount + sympy.Rational(27315, 100),
+                  "F": (amount - 32) * sympy.Rational(5, 9) + sympy.Rational(27315, 100),
+                  "K": amount}[source]
+        return {"C": kelvin - sympy.Rational(27315, 100),
+                "F": (kelvin - sympy.Rational(27315, 100)) * sympy.Rational(9, 5) + 32,
+                "K": kelvin}[target]
+
+    @staticmethod
+    def _parse_unit(text: str):
+        names = {}
+        for name in re.findall(r"[A-Za-z_]\w*", text):
+            unit = MathEngine.UNIT_ALIASES.get(name.lower())
+            if unit is None:
+                unit = getattr(units, name, None)
+                if unit is None:
+                    unit = getattr(units, name.lower(), None)
+            if unit is None or not isinstance(unit, sympy.Expr) or not unit.atoms(units.Quantity):
+                raise ValueError(f"Unknown unit: {name}")
+            names[name] = unit
+        expression = text.strip().replace(" per ", "/").replace("^", "**")
+        return parse_expr(expression, local_dict=names, global_dict=MathEngine._namespace(),
+                          transformations=standard_transformations)
+
+    @staticmethod
+    def _namespace(unevaluated: bool = False) -> dict:
+        """
+        Ayrıştırmada kullanılabilecek isimler. unevaluated=True ise hemen hesap yapan yardımcı fonksiyonlar
+        (diff, integrate, expand, sqrt, ...) yalnızca argümanlarını tutan tanımsız fonksiyonlarla değiştirilir;
+        boyut denetimi sırasında hiçbir hesaplama yapılmaz.
+        """
+        namespace = {name: getattr(sympy, name) for name in MathEngine.FUNCTIONS}
+        if unevaluated:
+            namespace = {name: value if isinstance(value, (type, sympy.Basic)) else sympy.Function(name)
+                         for name, value in namespace.items()}
+        namespace.update({"abs": sympy.Abs, "Integer": sympy.Integer, "Float": sympy.Float,
+                          "Symbol": sympy.Symbol, "__builtins__": {}})
+        # evaluate=False ile ayrıştırılan kod işlemleri bu sınıflarla kurar
+        namespace.update({name: getattr(sympy, name) for name in ("Add", "Mul", "Pow", "Eq", "Ne", "Lt", "Le",
+                                                                  "Gt", "Ge")})
+        return namespace
+
+    @staticmethod
+    def _format_number(expression) -> str:
+        return f"Result: {MathEngine._exact_and_numeric(expression)}"
+
+    @staticmethod
+    def _exact_and_numeric(value) -> str:
+        exact = sympy.nsimplify(value) if isinstance(value, sympy.Float) else sympy.simplify(value)
+        if exact.free_symbols or exact.is_Integer:
+            return str(exact)
+        numeric = sympy.N(exact, 12)
+        if isinstance(value, sympy.Float) or str(numeric) == str(exact):
+            return str(numeric)
+        return f"{exact} ≈ {numeric}"
+
+    @staticmethod
+    def _split_target_variable(text: str):
+        match = re.search(r"\s+(?:for|voor|wrt)\s+([A-Za-z])\s*$", text, re.IGNORECASE)
+        if match:
+            return text[:match.start()], match.group(1)
+        return text, None
+
+    @staticmethod
+    def _split_top_level(text: str):
+        parts, depth, current = [], 0, []
+        for char in text:
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                depth -= 1
+            if char == "," and depth == 0:
+                parts.append("".join(current).strip())
+                current = []
+            else:
+                current.append(char)
+        parts.append("".join(current).strip())
+        return [part for part in parts if part]
+
+    @staticmethod
+    def _is_equation(text: str) -> bool:
+        return text.count("=") == 1 and not re.search(r"[<>!]=|==", text)
+
+    @staticmethod
+    def _is_call(text: str) -> bool:
+        return bool(re.match(r"^[A-Za-z]\w*\s*\(.*\)$", text))
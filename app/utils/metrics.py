@@ -0,0 +1,166 @@
+import functools
+import math
+import time
+
+
+class Counter:
+    """Etiket değerlerine göre ayrı tutulan, yalnızca artan sayaç."""
+    TYPE = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_values(self, labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in sorted(self._values.items()):
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Histogram:
+    """Gözlemleri kümülatif kovalara (bucket) dağıtan histogram; toplam ve sayı da tutulur."""
+    TYPE = "histogram"
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._values = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_values(self, labels)
+        series = self._values.get(key)
+        if series is None:
+            series = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series["buckets"][index] += 1
+                break
+        series["sum"] += value
+        series["count"] += 1
+
+    def samples(self):
+        for key, series in sorted(self._values.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["buckets"]):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, series["sum"]
+            yield f"{self.name}_count", labels, series["count"]
+
+
+class MetricsRegistry:
+    """
+    Uygulama metriklerinin süreç içi kaydı. Metrikler /metrics uç noktasında Prometheus metin
+    formatında (0.0.4) sunulur. Her worker kendi değerlerini tutar; toplama Prometheus tarafında yapılır.
+    """
+    _instance = None
+
+    def __init__(self):
+        self._metrics = {}
+
+    @staticmethod
+    def get_instance():
+        if MetricsRegistry._instance is None:
+            MetricsRegistry._instance = MetricsRegistry()
+        return MetricsRegistry._instance
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation, help_text=True)}")
+            lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+            for name, labels, value in metric.samples():
+                label_text = ",".join(f'{label}="{_escape(str(label_value))}"' for label, label_value in labels.items())
+                lines.append(f"{name}{{{label_text}}} {_format_value(value)}" if label_text
+                             else f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+
+class Metrics:
+    """İş akışı düğümleri, araç çağrıları, LLM çağrıları ve önbellekler için kullanılan metrikler."""
+    _registry = MetricsRegistry.get_instance()
+    TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+    WORKFLOW_DURATION = _registry.histogram(
+        "agent_workflow_duration_seconds", "End-to-end duration of a query workflow.")
+    NODE_DURATION = _registry.histogram(
+        "agent_node_duration_seconds", "Duration of a workflow graph node.", ["node"])
+    NODE_TOKENS = _registry.histogram(
+        "agent_node_tokens", "LLM tokens used by a single run of a workflow graph node.", ["node", "kind"],
+        buckets=TOKEN_BUCKETS)
+    NODE_ERRORS = _registry.counter(
+        "agent_node_errors_total", "Workflow graph node runs that raised an exception.", ["node"])
+    TOOL_DURATION = _registry.histogram(
+        "agent_tool_duration_seconds", "Duration of a tool call.", ["tool"])
+    TOOL_ERRORS = _registry.counter(
+        "agent_tool_errors_total",
+        "Failed tool calls, including error results returned by a tool (one per failed page for the parser).",
+        ["tool"])
+    LLM_DURATION = _registry.histogram(
+        "agent_llm_call_duration_seconds", "Duration of an LLM call.", ["model"])
+    LLM_TOKENS = _registry.histogram(
+        "agent_llm_call_tokens", "Tokens used by a single LLM call.", ["model", "kind"], buckets=TOKEN_BUCKETS)
+    CACHE_REQUESTS = _registry.counter(
+        "agent_cache_requests_total", "Cache lookups by cache and result.", ["cache", "result"])
+
+    @staticmethod
+    def instrument_node(node: str, run):
+        """Bir graf düğümünü süre, token ve hata metrikleriyle sarar."""
+
+        @functools.wraps(run)
+        async def instrumented(state):
+            prompt_tokens, completion_tokens = state.prompt_tokens or 0, state.completion_tokens or 0
+            started = time.perf_counter()
+            try:
+                return await run(state)
+            except Exception:
+                Metrics.NODE_ERRORS.inc(node=node)
+                raise
+            finally:
+                Metrics.NODE_DURATION.observe(time.perf_counter() - started, node=node)
+                Metrics.NODE_TOKENS.observe((state.prompt_tokens or 0) - prompt_tokens, node=node, kind="prompt")
+                Metrics.NODE_TOKENS.observe((state.completion_tokens or 0) - completion_tokens,
+                                            node=node, kind="completion")
+
+        return instrumented
+
+
+def _label_values(metric, labels: dict) -> tuple:
+    if set(labels) != set(metric.labelnames):
+        raise ValueError(f"{metric.name} expects labels {metric.labelnames}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in metric.labelnames)
+
+
+def _escape(value: str, help_text: bool = False) -> str:
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value if help_text else value.replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return str(value)
@@ -55,6 +55,8 @@ Use this tool to read the website and generate accurate answer to the given ques
 (4) math[problem, context]: Solves the provided math problem. Use this tool for any mathematical \
 calculations needed in the task. 
 Ensure to provide the problem and any relevant context for accurate results.
+Write the problem as an expression (e.g. 15% of 80, sqrt(2)/3), an equation (e.g. 2x + 3 = 7 for x) \
+or a unit conversion (e.g. 60 mph to km/h) so it can be calculated exactly.
 
 Note: Ensure that each step is followed by the variable assignment in the format #E1 = tool_name[tool_input].
 
@@ -96,3 +98,22 @@ Chat History:
 {chat_history}
 
 Task: {task}"""
+
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a student and an AI assistant.
+Update the existing summary with the new conversation turns below. Keep the facts, questions, answers, \
+sources (URLs) and open points that later questions may refer to. Drop greetings and repetition.
+Write the summary in the same language as the conversation and keep it under {max_words} words.
+
+Existing summary:
+{summary}
+
+New conversation turns:
+{conversation}
+
+Updated summary:"""
+
+
+MATH_FALLBACK_PROMPT = """Solve the following math problem step by step and state the final result clearly.
+
+Problem: {problem}"""
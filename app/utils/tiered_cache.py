@@ -0,0 +1,134 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+
+import redis.asyncio as redis
+
+from app.config.config import Config
+from app.db.redis_client_manager import RedisClientManager
+from app.utils.metrics import Metrics
+
+
+class TieredCache:
+    """
+    İki katmanlı önbellek: süreç içi, boyutu sınırlı bir LRU ve onun arkasında tüm worker'ların
+    paylaştığı Redis (RedisClientManager havuzu). Her kayıt TTL ile saklanır. Değerler JSON olarak
+    serileştirilir. Redis yoksa ya da erişilemiyorsa yalnızca bellek katmanı kullanılır.
+    Redis katmanı da sınırlıdır: CACHE_REDIS_MAX_ENTRY_BYTES'ı aşan değerler Redis'e yazılmaz ve her
+    namespace'in anahtarları bitiş zamanına göre sıralı bir kümede (sorted set) izlenir; kayıt sayısı
+    redis_max_entries'i aşınca bitişi en yakın kayıtlar silinir.
+    """
+
+    def __init__(self, namespace: str, max_entries: int, ttl_seconds: float, redis_max_entries: int = None):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis_max_entries = redis_max_entries or max_entries
+        self._entries = OrderedDict()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    async def get(self, key: str):
+        """Değeri önce bellekten, yoksa Redis'ten okur. Bulunamazsa None döner."""
+        value = self._get_local(key)
+        if value is not None:
+            self.local_hits += 1
+            Metrics.CACHE_REQUESTS.inc(cache=self.namespace, result="local_hit")
+            return value
+
+        client = RedisClientManager.get_client()
+        if client is not None:
+            try:
+                # Değer ve kalan ömrü tek gidiş-dönüşte okunur
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.get(self._redis_key(key))
+                    pipe.ttl(self._redis_key(key))
+                    raw, ttl = await pipe.execute()
+                if raw is not None:
+                    value = json.loads(raw)
+                    self._set_local(key, value, ttl if ttl and ttl > 0 else self.ttl_seconds)
+                    self.redis_hits += 1
+                    Metrics.CACHE_REQUESTS.inc(cache=self.namespace, result="redis_hit")
+                    return value
+            except (redis.RedisError, ValueError) as e:
+                self._redis_failed(e)
+
+        self.misses += 1
+        Metrics.CACHE_REQUESTS.inc(cache=self.namespace, result="miss")
+        return None
+
+    async def set(self, key: str, value, ttl_seconds: float = None):
+        ttl = ttl_seconds or self.ttl_seconds
+        self._set_local(key, value, ttl)
+
+        client = RedisClientManager.get_client()
+        if client is None:
+            return
+        try:
+            raw = json.dumps(value, ensure_ascii=False)
+            if len(raw.encode("utf-8")) > Config.CACHE_REDIS_MAX_ENTRY_BYTES:
+                logging.debug(f"{self.namespace} cache entry exceeds CACHE_REDIS_MAX_ENTRY_BYTES, kept in memory only.")
+                return
+            redis_key, index_key, now = self._redis_key(key), self._index_key(), time.time()
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.set(redis_key, raw, ex=int(ttl))
+                pipe.zadd(index_key, {redis_key: now + ttl})
+                # Süresi dolmuş anahtarlar indeksten de düşülür
+                pipe.zremrangebyscore(index_key, "-inf", now)
+                pipe.zcard(index_key)
+                *_, size = await pipe.execute()
+            if size > self.redis_max_entries:
+                evicted = await client.zpopmin(index_key, size - self.redis_max_entries)
+                if evicted:
+                    await client.delete(*(member for member, _ in evicted))
+        except (redis.RedisError, TypeError) as e:
+            self._redis_failed(e)
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        hits = self.local_hits + self.redis_hits
+        return {
+            "namespace": self.namespace,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "redis_max_entries": self.redis_max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "redis_connected": RedisClientManager.is_available(),
+        }
+
+    def clear(self):
+        self._entries.clear()
+
+    def _get_local(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _redis_failed(self, error):
+        # Redis hatası isteği bozmaz; bir süre yalnızca bellek katmanı kullanılır
+        logging.warning(f"{self.namespace} cache Redis tier unavailable, using memory only: {error}")
+        RedisClientManager.mark_failed(error)
+
+    def _redis_key(self, key: str) -> str:
+        return f"{Config.CACHE_REDIS_PREFIX}{self.namespace}:{key}"
+
+    def _index_key(self) -> str:
+        return f"{Config.CACHE_REDIS_PREFIX}{self.namespace}"
@@ -0,0 +1,54 @@
+import logging
+from functools import lru_cache
+
+import tiktoken
+
+from app.config.config import Config
+
+
+class TokenCounter:
+    """
+    Metinlerin token sayısını modelin tokenizer'ı ile hesaplar.
+    Aynı metin (ör. geçmişteki bir konuşma) her istekte yeniden sayılmasın diye sonuçlar önbelleğe alınır.
+    Tokenizer yüklenemezse (ör. encoding dosyası indirilemezse) ~4 karakter/token tahmini kullanılır.
+    """
+    DEFAULT_ENCODING = "o200k_base"
+
+    @staticmethod
+    def get_encoding(model_name: str = None):
+        return TokenCounter._load_encoding(model_name or Config.LLM_MODEL_NAME)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _load_encoding(model_name: str):
+        try:
+            try:
+                return tiktoken.encoding_for_model(model_name)
+            except KeyError:
+                return tiktoken.get_encoding(TokenCounter.DEFAULT_ENCODING)
+        except Exception as e:
+            logging.warning(f"Tokenizer for model '{model_name}' could not be loaded, estimating tokens: {e}")
+            return None
+
+    @staticmethod
+    @lru_cache(maxsize=Config.TOKEN_COUNT_CACHE_SIZE)
+    def count(text: str, model_name: str = None) -> int:
+        if not text:
+            return 0
+        encoding = TokenCounter.get_encoding(model_name)
+        if encoding is None:
+            return len(text) // 4 + 1
+        return len(encoding.encode(text, disallowed_special=()))
+
+    @staticmethod
+    def truncate(text: str, max_tokens: int, model_name: str = None) -> str:
+        """Metni en fazla max_tokens token olacak şekilde kısaltır."""
+        if max_tokens <= 0:
+            return ""
+        encoding = TokenCounter.get_encoding(model_name)
+        if encoding is None:
+            return text[:max_tokens * 4]
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens])
@@ -1,45 +1,160 @@
-﻿import logging
+﻿import asyncio
+import logging
+from typing import Dict, Iterable, Set
+
 from fastapi import WebSocket
 
+from app.config.config import Config
+
+
+class ClientConnection:
+    """
+    Tek bir WebSocket istemcisi. Mesajlar sınırlı bir kuyruğa alınır ve istemciye özel
+    bir yazma görevi tarafından gönderilir; yavaş bir istemci diğerlerini bekletmez.
+    """
+
+    def __init__(self, websocket: WebSocket, keys: Set[str], queue_size: int):
+        self.websocket = websocket
+        self.keys = keys
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.writer = None
+
+    def send(self, message: str) -> bool:
+        """Mesajı kuyruğa ekler. Kuyruk doluysa False döner."""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def write_loop(self, on_error):
+        while True:
+            message = await self.queue.get()
+            try:
+                await self.websocket.send_text(message)
+            except Exception as e:
+                logging.error(f"Error sending message to client: {e}")
+                on_error(self)
+                return
+
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections = []
+    """
+    Oturum ve kullanıcı kimliklerine göre WebSocket bağlantı kaydı.
+    Bildirimler yalnızca ilgili oturumun/kullanıcının istemcilerine gönderilir.
+    """
+
+    def __init__(self, queue_size: int = None):
+        self.queue_size = queue_size or Config.WS_CLIENT_QUEUE_SIZE
+        self.connections: Dict[str, Set[ClientConnection]] = {}
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        self._closing = set()
+        # Anahtar ilk kez eklendiğinde/son istemcisi ayrıldığında haberdar edilir (ör. Redis bildirim kanalı)
+        self.subscription_listener = None
+
+    @property
+    def active_connections(self):
+        return list(self.clients)
 
-    async def connect(self, websocket: WebSocket):
-        """Yeni bir WebSocket bağlantısını kabul eder."""
+    @staticmethod
+    def session_key(session_id: str) -> str:
+        return f"session:{session_id}"
+
+    @staticmethod
+    def user_key(user_id: str) -> str:
+        return f"user:{user_id}"
+
+    async def connect(self, websocket: WebSocket, session_id: str = None, user_id: str = None):
+        """Yeni bir WebSocket bağlantısını kabul eder ve oturum/kullanıcı anahtarlarıyla kaydeder."""
         await websocket.accept()
-        logging.info("WebSocket client connected")
-        self.active_connections.append(websocket)
+        keys = set()
+        if session_id:
+            keys.add(ConnectionManager.session_key(session_id))
+        if user_id:
+            keys.add(ConnectionManager.user_key(user_id))
+
+        client = ClientConnection(websocket, keys, self.queue_size)
+        client.writer = asyncio.create_task(client.write_loop(on_error=self._drop))
+        self.clients[websocket] = client
+        for key in keys:
+            if key not in self.connections:
+                self.connections[key] = set()
+                if self.subscription_listener is not None:
+                    self.subscription_listener.key_added(key)
+            self.connections[key].add(client)
+        logging.info(f"WebSocket client connected: {sorted(keys)}")
+        return client
 
     def disconnect(self, websocket: WebSocket):
         """WebSocket bağlantısını sonlandırır."""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-            logging.info("WebSocket client disconnected")
+        client = self.clients.pop(websocket, None)
+        if client is None:
+            return
+        for key in client.keys:
+            clients = self.connections.get(key)
+            if clients is not None:
+                clients.discard(client)
+                if not clients:
+                    del self.connections[key]
+                    if self.subscription_listener is not None:
+                        self.subscription_listener.key_removed(key)
+        if client.writer is not None and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+        logging.info("WebSocket client disconnected")
+
+    def has_clients(self, keys: Iterable[str]) -> bool:
+        return any(key in self.connections for key in keys)
+
+    def send_to(self, keys: Iterable[str], message: str) -> int:
+        """Mesajı verilen anahtarlara kayıtlı istemcilerin kuyruklarına ekler. Kuyruğa alınan istemci sayısını döndürür."""
+        targets = set()
+        for key in keys:
+            targets.update(self.connections.get(key, ()))
+
+        delivered = 0
+        for client in targets:
+            if client.send(message):
+                delivered += 1
+            else:
+                logging.warning(f"WebSocket client queue is full, disconnecting slow client: {sorted(client.keys)}")
+                self._drop(client)
+        return delivered
 
     async def send_message(self, websocket: WebSocket, message: str):
         """Belirli bir WebSocket istemcisine mesaj gönderir."""
-        try:
-            await websocket.send_text(message)
-        except Exception as e:
-            logging.error(f"Error sending message to client: {e}")
-            self.disconnect(websocket)
+        client = self.clients.get(websocket)
+        if client is not None and not client.send(message):
+            self._drop(client)
 
     async def broadcast(self, message: str):
         """Tüm bağlı istemcilere mesaj gönderir."""
-        for connection in self.active_connections:
-            await self.send_message(connection, message)
-
-    async def connect_websocket(self):
-        """WebSocket bağlantısını manuel olarak başlatır."""
-        if not self.active_connections:
-            logging.info("Initializing WebSocket connections.")
-            # Bağlantı başlatma işlemleri (ör. bir test bağlantısı)
-
+        for client in list(self.clients.values()):
+            if not client.send(message):
+                self._drop(client)
 
     async def close_connections(self):
         """Tüm WebSocket bağlantılarını kapatır."""
-        for connection in self.active_connections:
-            await connection.close()
-            self.active_connections.remove(connection)
+        for websocket in list(self.clients):
+            self.disconnect(websocket)
+            try:
+                await websocket.close()
+            except Exception as e:
+                logging.error(f"Error closing WebSocket connection: {e}")
             logging.info("WebSocket connection closed")
+
+    def _drop(self, client: ClientConnection):
+        self.disconnect(client.websocket)
+        task = asyncio.create_task(ConnectionManager._close_quietly(client.websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket):
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+
+# Uygulama genelinde paylaşılan bağlantı kaydı
+connection_manager = ConnectionManager()
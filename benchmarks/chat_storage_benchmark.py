@@ -0,0 +1,75 @@
+"""
+Konuşma geçmişinin iki saklama düzenini ("turns": konuşma başına doküman, "session": oturum başına
+tek doküman) gerçek bir MongoDB üzerinde karşılaştırır. Her oturum boyutu için konuşmalar tek tek
+yazılır (yazma gecikmesi), ardından geçmiş CHAT_HISTORY_MAX_TURNS / CHAT_HISTORY_MAX_TOKENS sınırlarıyla
+tekrar tekrar okunur (okuma gecikmesi). Geçici koleksiyonlar sonunda silinir.
+
+Kullanım:
+    python -m benchmarks.chat_storage_benchmark --turns 10 100 1000 --reads 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from uuid import uuid4
+
+from app.config.config import Config
+from app.repositories.mongo_db_repository import MongoDBRepository
+
+ANSWER = "The answer explains the topic in a few sentences. " * 8
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def run_layout(storage_mode: str, collection_name: str, turn_count: int, reads: int):
+    repository = MongoDBRepository(db_name=Config.MONGO_DB_NAME, collection_name=collection_name,
+                                   storage_mode=storage_mode)
+    await repository.ensure_indexes()
+    session_id = str(uuid4())
+
+    write_ms = []
+    for index in range(turn_count):
+        started = time.perf_counter()
+        await repository.add_new_chat_to_db(session_id=session_id, question_id=str(uuid4()),
+                                            question=f"Question {index} about the topic?", answer=ANSWER,
+                                            token_count=120)
+        write_ms.append((time.perf_counter() - started) * 1000)
+
+    read_ms = []
+    for _ in range(reads):
+        started = time.perf_counter()
+        await repository.get_session_history(session_id=session_id, max_turns=Config.CHAT_HISTORY_MAX_TURNS,
+                                             max_tokens=Config.CHAT_HISTORY_MAX_TOKENS)
+        read_ms.append((time.perf_counter() - started) * 1000)
+    return write_ms, read_ms
+
+
+async def benchmark(turn_counts, reads: int):
+    collection_name = f"chat_storage_benchmark_{uuid4().hex[:8]}"
+    print(f"{'layout':<10}{'turns':>7}{'write p50 ms':>14}{'write p95 ms':>14}{'read p50 ms':>13}{'read p95 ms':>13}")
+    try:
+        for turn_count in turn_counts:
+            for storage_mode in (MongoDBRepository.TURNS, MongoDBRepository.SESSION):
+                write_ms, read_ms = await run_layout(storage_mode, collection_name, turn_count, reads)
+                print(f"{storage_mode:<10}{turn_count:>7}"
+                      f"{statistics.median(write_ms):>14.2f}{percentile(write_ms, 0.95):>14.2f}"
+                      f"{statistics.median(read_ms):>13.2f}{percentile(read_ms, 0.95):>13.2f}")
+    finally:
+        repository = MongoDBRepository(db_name=Config.MONGO_DB_NAME, collection_name=collection_name)
+        await repository.collection.drop()
+        await repository.session_collection.drop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat history storage layout benchmark")
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 100, 1000], help="Turns per session")
+    parser.add_argument("--reads", type=int, default=200, help="History reads per measurement")
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.turns, args.reads))
+
+
+if __name__ == "__main__":
+    main()
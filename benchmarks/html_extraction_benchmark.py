@@ -0,0 +1,110 @@
+"""
+Parser aracının HTML ayrıştırma maliyetini ölçer: kaydedilmiş HTML sayfalarından oluşan bir korpus
+üzerinde, eski BeautifulSoup yöntemi ile HtmlExtractor arka uçlarının sayfa başına CPU süresini ve
+tepe bellek kullanımını karşılaştırır.
+
+Kullanım:
+    python -m benchmarks.html_extraction_benchmark --corpus ./saved_pages --repeat 5
+    python -m benchmarks.html_extraction_benchmark --synthetic 20   # korpus yoksa üretilmiş sayfalar
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from app.config.config import Config
+from app.utils.html_extractor import HtmlExtractor, etree
+
+CHUNK_SIZE = 64 * 1024
+
+
+def bs4_full_tree(html: str) -> dict:
+    """Önceki yöntem: tüm sayfa için BeautifulSoup ağacı kurulur, ilk 5 <p> alınır."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.string.strip() if soup.title and soup.title.string else "No Title"
+    paragraphs = soup.find_all("p")
+    content = "\n".join(p.get_text(strip=True) for p in paragraphs[:5])
+    return {"title": title, "content": content}
+
+
+def streaming_extractor(backend: str):
+    def run(html: str) -> dict:
+        # Gerçek istekteki gibi sayfa parça parça beslenir; byte sınırı ve erken durma uygulanır
+        extractor = HtmlExtractor.create(backend)
+        fed = 0
+        for start in range(0, len(html), CHUNK_SIZE):
+            chunk = html[start:start + CHUNK_SIZE]
+            extractor.feed(chunk)
+            fed += len(chunk)
+            if extractor.done or fed >= Config.PARSER_MAX_BYTES:
+                break
+        return extractor.result()
+
+    return run
+
+
+def load_corpus(path: str):
+    pages = []
+    for file in sorted(Path(path).rglob("*.htm*")):
+        pages.append((file.name, file.read_text(encoding="utf-8", errors="replace")))
+    return pages
+
+
+def synthetic_corpus(count: int):
+    """Gezinme menüsü, script blokları ve çok sayıda paragraf içeren büyük sayfalar üretir."""
+    pages = []
+    for index in range(count):
+        nav = "".join(f"<li><a href='/p{i}'>Menu {i}</a></li>" for i in range(300))
+        scripts = "<script>" + "var x = '<p>not text</p>';" * 2000 + "</script>"
+        paragraphs = "".join(f"<p>Paragraph {i} of page {index}. " + "Lorem ipsum dolor sit amet. " * 20 + "</p>"
+                             for i in range(2000))
+        html = (f"<html><head><title>Page {index}</title>{scripts}</head><body>"
+                f"<nav><ul>{nav}</ul></nav><main>{paragraphs}</main></body></html>")
+        pages.append((f"synthetic-{index}.html", html))
+    return pages
+
+
+def measure(extract, html: str, repeat: int):
+    cpu_times = []
+    for _ in range(repeat):
+        started = time.process_time()
+        extract(html)
+        cpu_times.append(time.process_time() - started)
+
+    tracemalloc.start()
+    extract(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(cpu_times), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML extraction benchmark")
+    parser.add_argument("--corpus", help="Directory of saved .html pages")
+    parser.add_argument("--synthetic", type=int, default=10, help="Number of generated pages when no corpus is given")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.synthetic)
+    if not pages:
+        raise SystemExit("No HTML pages found.")
+
+    engines = {"bs4 (full tree)": bs4_full_tree, "html.parser (streaming)": streaming_extractor("html.parser")}
+    if etree is not None:
+        engines["lxml (streaming)"] = streaming_extractor("lxml")
+
+    total_bytes = sum(len(html.encode("utf-8")) for _, html in pages)
+    print(f"{len(pages)} pages, {total_bytes / len(pages) / 1024:.0f} KiB average\n")
+    print(f"{'engine':<26}{'cpu ms/page (median)':>22}{'peak KiB/page (avg)':>22}")
+    for name, extract in engines.items():
+        results = [measure(extract, html, args.repeat) for _, html in pages]
+        cpu_ms = statistics.median(cpu for cpu, _ in results) * 1000
+        peak_kib = statistics.mean(peak for _, peak in results) / 1024
+        print(f"{name:<26}{cpu_ms:>22.2f}{peak_kib:>22.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Konuşma geçmişini konuşma başına doküman düzeninden ("turns") oturum başına tek doküman düzenine
+("session") taşır. Kaynak koleksiyon değiştirilmez; oturum dokümanları `{collection}_sessions`
+koleksiyonuna yeniden oluşturularak yazılır, bu yüzden betik tekrar çalıştırılabilir.
+
+Uygulama CHAT_STORAGE_MODE=session ile açılmadan önce çalıştırılmalıdır: geçiş sırasında "session"
+modunda yazılan konuşmalar, yeniden oluşturulan dokümanla üzerine yazılır.
+
+Kullanım:
+    python -m scripts.migrate_chat_storage
+    python -m scripts.migrate_chat_storage --batch-size 200 --dry-run
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from pymongo import ASCENDING, DESCENDING, ReplaceOne
+
+from app.config.config import Config
+from app.repositories.mongo_db_repository import MongoDBRepository
+
+
+async def migrate(batch_size: int, dry_run: bool):
+    repository = MongoDBRepository(db_name=Config.MONGO_DB_NAME, collection_name=Config.MONGO_DB_COLLECTION_NAME,
+                                   storage_mode=MongoDBRepository.TURNS)
+    started = time.perf_counter()
+    sessions = turns = 0
+    operations = []
+
+    async def flush():
+        if operations and not dry_run:
+            await repository.session_collection.bulk_write(operations, ordered=False)
+        operations.clear()
+
+    # (session_id, timestamp) indeksi sırasıyla okunur; bellekte yalnızca o anki oturum tutulur
+    cursor = repository.collection.find({}, {"session_id": 1, "question_id": 1, "simplified": 1,
+                                             "token_count": 1, "timestamp": 1}) \
+        .sort([("session_id", ASCENDING), ("timestamp", DESCENDING)])
+    current_session, documents = None, []
+    async for document in cursor:
+        if document["session_id"] != current_session and documents:
+            operations.append(_replace(current_session, documents))
+            sessions += 1
+            documents = []
+            if len(operations) >= batch_size:
+                await flush()
+        current_session = document["session_id"]
+        documents.append(document)
+        turns += 1
+
+    if documents:
+        operations.append(_replace(current_session, documents))
+        sessions += 1
+    await flush()
+
+    action = "Would migrate" if dry_run else "Migrated"
+    print(f"{action} {turns} turns into {sessions} session documents "
+          f"({repository.session_collection.name}) in {time.perf_counter() - started:.1f}s.")
+
+
+def _replace(session_id: str, documents_newest_first: list) -> ReplaceOne:
+    document = MongoDBRepository.build_session_document(session_id, list(reversed(documents_newest_first)))
+    return ReplaceOne({"_id": session_id}, document, upsert=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate chat history to one document per session")
+    parser.add_argument("--batch-size", type=int, default=500, help="Session documents per bulk write")
+    parser.add_argument("--dry-run", action="store_true", help="Read and convert without writing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(migrate(args.batch_size, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+import logging
+import os
+
+# Config, ortam değişkenlerini import anında okur; testler gerçek servislere bağlanmadan çalışır
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("LANGCHAIN_API_KEY", "test-key")
+os.environ.setdefault("LANGCHAIN_TRACING_V2", "false")
+os.environ.setdefault("LLM_MODEL_NAME", "solver-model")
+os.environ.setdefault("PLANNER_MODEL_NAME", "planner-model")
+os.environ.setdefault("TOOL_MODEL_NAME", "tool-model")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:1")
+os.environ.setdefault("MONGO_PORT", "27017")
+os.environ.setdefault("MONGO_DB_NAME", "test_db")
+os.environ.setdefault("MONGO_DB_COLLECTION_NAME", "chats")
+os.environ.setdefault("MONGO_DB_PROMPT_COLLECTION_NAME", "prompts")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+os.environ.setdefault("NOTIFICATION_BUS_ENABLED", "false")
+os.environ.pop("REDIS_URL", None)
+
+# app.config.logger basicConfig ile llm_agent_service.log dosyasına yazar; kök logger'da bir handler
+# olduğunda basicConfig bir şey yapmaz ve testler log dosyasını değiştirmez
+logging.getLogger().addHandler(logging.NullHandler())
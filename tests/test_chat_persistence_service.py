@@ -0,0 +1,30 @@
+from app.services.chat_persistence_service import ChatPersistenceService
+
+
+def turn(question):
+    return {"question": question, "answer": f"answer to {question}"}
+
+
+def test_merge_history_without_pending_returns_history():
+    history = [turn("a")]
+
+    assert ChatPersistenceService.merge_history(history, []) is history
+
+
+def test_merge_history_appends_pending_turns():
+    merged = ChatPersistenceService.merge_history([turn("a"), turn("b")], [turn("c")])
+
+    assert merged == [turn("a"), turn("b"), turn("c")]
+
+
+def test_merge_history_skips_turns_already_written():
+    # Okuma sırasında yazılmış olan konuşma her iki listede de bulunur
+    merged = ChatPersistenceService.merge_history([turn("a"), turn("b")], [turn("b"), turn("c")])
+
+    assert merged == [turn("a"), turn("b"), turn("c")]
+
+
+def test_merge_history_keeps_last_turns():
+    merged = ChatPersistenceService.merge_history([turn("a"), turn("b")], [turn("c")], max_turns=2)
+
+    assert merged == [turn("b"), turn("c")]
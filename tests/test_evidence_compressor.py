@@ -0,0 +1,52 @@
+from app.utils.evidence_compressor import EvidenceCompressor
+from app.utils.token_counter import TokenCounter
+
+RESULTS = {
+    "#E2": [{"link": "https://example.com/fruit", "snippet": "Bananas are yellow fruit rich in potassium."}],
+    "#E1": "Python 3.13 was released in October 2024.\nIt adds an experimental free-threaded build.",
+}
+
+
+def test_split_passages_keeps_step_order_and_sources():
+    passages = EvidenceCompressor.split_passages(RESULTS)
+
+    assert passages == [
+        ("Python 3.13 was released in October 2024.", None),
+        ("It adds an experimental free-threaded build.", None),
+        ("Bananas are yellow fruit rich in potassium.", "https://example.com/fruit"),
+    ]
+
+
+def test_split_passages_drops_duplicates():
+    results = {"#E1": "Same passage.", "#E2": "same passage."}
+
+    assert EvidenceCompressor.split_passages(results) == [("Same passage.", None)]
+
+
+def test_score_prefers_passages_with_query_terms():
+    scores = EvidenceCompressor.score("python release", ["Python was released", "Bananas are yellow"])
+
+    assert scores[0] > scores[1] == 0.0
+
+
+def test_compress_selects_relevant_passages_within_budget():
+    first = "- Python 3.13 was released in October 2024."
+    budget = TokenCounter.count(first) + 2
+
+    compressed = EvidenceCompressor.compress(RESULTS, "When was Python 3.13 released?", budget)
+
+    assert compressed == first
+
+
+def test_compress_keeps_original_order_and_source():
+    compressed = EvidenceCompressor.compress(RESULTS, "potassium in python", 1000)
+
+    assert compressed.splitlines() == [
+        "- Python 3.13 was released in October 2024.",
+        "- It adds an experimental free-threaded build.",
+        "- Bananas are yellow fruit rich in potassium. (source: https://example.com/fruit)",
+    ]
+
+
+def test_compress_without_results_is_empty():
+    assert EvidenceCompressor.compress({}, "anything", 100) == ""
@@ -0,0 +1,24 @@
+import pytest
+
+from app.utils.fast_path_classifier import FastPathClassifier
+
+
+@pytest.mark.parametrize("task", ["Hi!", "thank you so much", "Teşekkürler.", "Goedemorgen", "got it"])
+def test_small_talk_is_direct(task):
+    assert FastPathClassifier.is_direct(task, has_history=False)
+
+
+@pytest.mark.parametrize("task", ["yes", "No.", "ok", "tamam", "evet", "ja"])
+def test_bare_answers_are_planned(task):
+    # Asistanın sorusuna verilen cevap olabilir
+    assert not FastPathClassifier.is_direct(task, has_history=True)
+
+
+def test_follow_up_requires_history():
+    assert FastPathClassifier.is_direct("Can you explain that again?", has_history=True)
+    assert not FastPathClassifier.is_direct("Can you explain that again?", has_history=False)
+
+
+@pytest.mark.parametrize("task", ["", "   ", "What is the capital of France?", "hi, what is 2+2?"])
+def test_questions_are_planned(task):
+    assert not FastPathClassifier.is_direct(task, has_history=True)
@@ -0,0 +1,43 @@
+import pytest
+
+from app.utils.math_engine import MathEngine
+
+
+@pytest.mark.parametrize("problem, expected", [
+    ("2+3*4", "Result: 14"),
+    ("What is sqrt(16)?", "Result: 4"),
+    ("x**2-4=0", "Solutions: x = -2; x = 2"),
+    ("x**2 == 4", "Solutions: x = -2; x = 2"),
+    ("2+2 == 5", "Result: False"),
+    ("100 C to F", "100 C = 212 F"),
+])
+def test_solve(problem, expected):
+    assert MathEngine.solve(problem) == {"ok": True, "result": expected}
+
+
+def test_unit_conversion():
+    result = MathEngine.solve("10 km to miles")
+
+    assert result["ok"]
+    assert "6.2137" in result["result"]
+
+
+@pytest.mark.parametrize("problem, message", [
+    ("2**10000000", "Exponent is too large"),
+    ("9**9**9", "Exponent is too large"),
+    ("factorial(100000)", "Factorial argument is too large"),
+])
+def test_oversized_problems_are_rejected_before_evaluation(problem, message):
+    result = MathEngine.solve(problem, timeout=5)
+
+    assert not result["ok"]
+    assert message in result["error"]
+
+
+def test_inequation_is_left_to_the_llm():
+    assert not MathEngine.solve("x != 3")["ok"]
+
+
+@pytest.mark.parametrize("problem", ["__import__('os')", "x.__class__", "open('/etc/passwd')"])
+def test_unsafe_input_is_rejected(problem):
+    assert not MathEngine.solve(problem)["ok"]
@@ -0,0 +1,49 @@
+import pytest
+
+from app.utils.metrics import MetricsRegistry
+
+
+def test_render_counter_and_histogram():
+    registry = MetricsRegistry()
+    requests = registry.counter("app_requests_total", "Handled requests", ("path",))
+    duration = registry.histogram("app_duration_seconds", "Request duration", buckets=(0.1, 1.0))
+    requests.inc(path="/query")
+    requests.inc(2, path="/query")
+    duration.observe(0.05)
+    duration.observe(0.5)
+
+    assert registry.render() == (
+        "# HELP app_requests_total Handled requests\n"
+        "# TYPE app_requests_total counter\n"
+        'app_requests_total{path="/query"} 3\n'
+        "# HELP app_duration_seconds Request duration\n"
+        "# TYPE app_duration_seconds histogram\n"
+        'app_duration_seconds_bucket{le="0.1"} 1\n'
+        'app_duration_seconds_bucket{le="1"} 2\n'
+        'app_duration_seconds_bucket{le="+Inf"} 2\n'
+        "app_duration_seconds_sum 0.55\n"
+        "app_duration_seconds_count 2\n"
+    )
+
+
+def test_render_escapes_label_values_and_help():
+    registry = MetricsRegistry()
+    registry.counter("app_errors_total", "Errors\nby tool", ("tool",)).inc(tool='we"b\\search')
+
+    rendered = registry.render()
+
+    assert "# HELP app_errors_total Errors\\nby tool\n" in rendered
+    assert 'app_errors_total{tool="we\\"b\\\\search"} 1\n' in rendered
+
+
+def test_register_returns_existing_metric():
+    registry = MetricsRegistry()
+
+    assert registry.counter("app_total", "Total") is registry.counter("app_total", "Total")
+
+
+def test_unknown_labels_are_rejected():
+    counter = MetricsRegistry().counter("app_total", "Total", ("tool",))
+
+    with pytest.raises(ValueError):
+        counter.inc(stage="plan")
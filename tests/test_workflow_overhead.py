@@ -0,0 +1,140 @@
+import asyncio
+import statistics
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from app.config.config import Config
+from app.models import QueryRequest
+from app.services.chain_service import ChainService
+from app.utils.http_client_manager import HttpClientManager
+
+PLAN = ("Plan: Search for the latest Python release and read the first result.\n"
+        "#E1 = web_search[latest python release]\n"
+        "#E2 = parser[#E1]\n"
+        "#E3 = LLM[Summarize #E2]\n")
+PAGE = (b"<html><head><title>Python 3.13</title></head>"
+        b"<body><p>Python 3.13 was released in October 2024.</p></body></html>")
+# LLM ve ağ çağrıları gecikmesiz olduğundan ölçülen süre yalnızca iş akışının kendi yüküdür
+MAX_WORKFLOW_OVERHEAD_SECONDS = 0.25
+requested_urls = []
+
+
+class FakeChatModel:
+    """ChatOpenAI yerine sabit cevabı gecikmesiz döndürür."""
+
+    def __init__(self, reply: str):
+        self.reply = reply
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return AIMessage(content=self.reply,
+                         response_metadata={"token_usage": {"prompt_tokens": 10, "completion_tokens": 5}})
+
+    async def astream(self, messages, stream_usage=True):
+        self.calls += 1
+        for index, line in enumerate(self.reply.splitlines(keepends=True)):
+            usage = 10 if index == 0 else 0
+            yield AIMessageChunk(content=line, usage_metadata={"input_tokens": usage, "output_tokens": usage // 2,
+                                                               "total_tokens": usage + usage // 2})
+
+
+class FakeRepository:
+    def __init__(self):
+        self.saved_turns = []
+
+    async def get_session_summary(self, session_id):
+        return None
+
+    async def get_session_history(self, session_id, **kwargs):
+        return []
+
+    async def get_turns_since(self, session_id, since=None, limit=None):
+        return []
+
+    async def add_new_chat_to_db(self, **kwargs):
+        self.saved_turns.append(kwargs)
+        return True
+
+    async def add_chats_to_db(self, turns):
+        self.saved_turns.extend(turns)
+        return True
+
+
+class FakeRedisService:
+    redis_url = None
+
+    async def write_to_redis(self, **kwargs):
+        return True
+
+    async def write_many_to_redis(self, items):
+        return True
+
+
+async def fake_get(url, **kwargs):
+    requested_urls.append(url)
+    return httpx.Response(200, json={"items": [{"link": "https://example.com/python",
+                                                "snippet": "Python 3.13 was released."}]},
+                          request=httpx.Request("GET", url))
+
+
+@asynccontextmanager
+async def fake_stream(url, **kwargs):
+    requested_urls.append(url)
+    yield httpx.Response(200, headers={"Content-Type": "text/html"}, content=PAGE,
+                         request=httpx.Request("GET", url))
+
+
+def build_chain_service():
+    chain_service = ChainService()
+    chain_service.llm_service._llms = {
+        chain_service.llm_service.model_for(chain_service.llm_service.PLANNER): FakeChatModel(PLAN),
+        chain_service.llm_service.model_for(chain_service.llm_service.TOOL): FakeChatModel("Python 3.13 is out."),
+        chain_service.llm_service.model_for(chain_service.llm_service.SOLVER): FakeChatModel("final answer"),
+    }
+    chain_service._mongo_db_repository = FakeRepository()
+    chain_service._save_redis = FakeRedisService()
+    return chain_service
+
+
+async def run_workflow(chain_service):
+    # Her istek arama ve sayfa adımlarını baştan çalıştırsın
+    chain_service.tool_execution.search_cache.clear()
+    chain_service.tool_execution.page_cache.clear()
+    response, errors = await chain_service.execute_workflow(
+        QueryRequest(userID="user", question="What is the latest Python release?"))
+    assert errors is None
+    return response
+
+
+def test_execute_workflow_overhead(monkeypatch):
+    requested_urls.clear()
+    monkeypatch.setattr(HttpClientManager, "get", staticmethod(fake_get))
+    monkeypatch.setattr(HttpClientManager, "stream", staticmethod(fake_stream))
+    monkeypatch.setattr(Config, "GOOGLE_API_KEY", "test-key")
+    monkeypatch.setattr(Config, "SEARCH_ENGINE_ID", "test-engine")
+
+    async def measure():
+        chain_service = build_chain_service()
+        try:
+            # İlk istek grafiği derler ve tokenizer'ı yükler; ölçüme katılmaz
+            await run_workflow(chain_service)
+            durations = []
+            for _ in range(5):
+                started = time.perf_counter()
+                response = await run_workflow(chain_service)
+                durations.append(time.perf_counter() - started)
+            return chain_service, response, durations
+        finally:
+            await chain_service.shutdown()
+
+    chain_service, response, durations = asyncio.run(measure())
+
+    assert response.answer == "final answer"
+    assert set(response.model_usage) == set(chain_service.llm_service._llms)
+    assert requested_urls.count("https://example.com/python") == 6
+    assert len(chain_service.mongo_db_repository.saved_turns) == 6
+    assert statistics.median(durations) < MAX_WORKFLOW_OVERHEAD_SECONDS, durations